@@ -0,0 +1,91 @@
+"""Benchmark concurrent extractor workflows against a stubbed slow LLM.
+
+Runs one extractor on its own, then N extractors through asyncio.gather. With
+non-blocking LLM calls the batch should finish in roughly the time of one call.
+
+Usage:
+    poetry run python benchmarks/async_extractors.py --extractors 8 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from llama_index.core.llms import ChatMessage, ChatResponse  # noqa: E402
+
+from flows.simple_extractor import SimpleExtractorWorkflow  # noqa: E402
+from logger import setup_logging  # noqa: E402
+
+JOB_DESCRIPTION = "Senior Python Engineer. Remote in Europe. FastAPI, Postgres, AWS."
+
+
+class SlowStubLLM:
+    """Stand-in LLM whose async chat takes a fixed amount of time."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def achat(self, messages, **kwargs) -> ChatResponse:
+        await asyncio.sleep(self.latency)
+        content = json.dumps({"main_role": "Python Engineer", "related_roles": []})
+        return ChatResponse(message=ChatMessage(role="assistant", content=content))
+
+
+def create_stub_extractor(llm: SlowStubLLM) -> SimpleExtractorWorkflow:
+    return SimpleExtractorWorkflow(
+        system_prompt_func=lambda: "Extract the roles.",
+        user_prompt_func=lambda job_description: job_description,
+        validator_func=json.loads,
+        fallback_result={},
+        result_key="roles",
+        llm=llm,
+        use_cache=False,
+    )
+
+
+async def run_extractors(count: int, latency: float) -> float:
+    llm = SlowStubLLM(latency)
+    workflows = [create_stub_extractor(llm) for _ in range(count)]
+
+    start = time.perf_counter()
+    # Distinct descriptions, so identical in-flight calls aren't coalesced
+    await asyncio.gather(
+        *(
+            w.run(job_description=f"{JOB_DESCRIPTION} Opening {i}.")
+            for i, w in enumerate(workflows)
+        )
+    )
+    return time.perf_counter() - start
+
+
+async def main(extractors: int, latency: float) -> int:
+    single = await run_extractors(1, latency)
+    batch = await run_extractors(extractors, latency)
+    ratio = batch / single
+
+    print(f"1 extractor:  {single:.3f}s")
+    print(f"{extractors} extractors: {batch:.3f}s ({ratio:.2f}x single)")
+
+    # Serial execution would be ~extractors x single; allow generous overhead.
+    if ratio > 1.5:
+        print("FAIL: extractors did not run concurrently")
+        return 1
+    print("OK: extractors ran concurrently")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--extractors", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    setup_logging(log_level="WARNING")
+    sys.exit(asyncio.run(main(args.extractors, args.latency)))
@@ -0,0 +1,116 @@
+"""Microbenchmark for CVIndex metadata_index inserts and deletes.
+
+Indexes synthetic property nodes, then deletes them all, with the count-based
+metadata_index. For comparison it also runs the previous list-based
+implementation on a smaller node count, since that one is quadratic.
+
+Usage:
+    poetry run python benchmarks/cv_index_metadata.py --nodes 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from llama_index.core.schema import TextNode  # noqa: E402
+
+from cv_index import CVIndex  # noqa: E402
+from logger import setup_logging  # noqa: E402
+
+PROPERTY_KEYS = [f"key_{i}" for i in range(50)]
+SHARED_VALUES = [f"shared value {i}" for i in range(100)]
+
+
+def make_nodes(count: int, properties_per_node: int = 5) -> list[TextNode]:
+    rng = random.Random(42)
+    nodes = []
+    for i in range(count):
+        properties = {}
+        for key in rng.sample(PROPERTY_KEYS, properties_per_node):
+            # Mix of values shared across nodes and unique ones
+            if rng.random() < 0.3:
+                properties[key] = rng.choice(SHARED_VALUES)
+            else:
+                properties[key] = f"value {i} {key}"
+        nodes.append(
+            TextNode(
+                text="", id_=f"node-{i}", metadata={"properties": json.dumps(properties)}
+            )
+        )
+    return nodes
+
+
+def bench_cv_index(nodes: list[TextNode]) -> tuple[float, float]:
+    index = CVIndex(nodes=[])
+
+    start = time.perf_counter()
+    for node in nodes:
+        index._insert(node)
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node in nodes:
+        index._delete_node(node.id_)
+    delete_time = time.perf_counter() - start
+
+    assert not index._index_struct.metadata_index
+    return insert_time, delete_time
+
+
+def bench_legacy_lists(nodes: list[TextNode]) -> tuple[float, float]:
+    """The previous list-based metadata_index, for comparison."""
+    metadata_index = defaultdict(list)
+    parsed = [json.loads(node.metadata["properties"]) for node in nodes]
+
+    start = time.perf_counter()
+    for properties in parsed:
+        for key, value in properties.items():
+            if value not in metadata_index[key]:
+                metadata_index[key].append(value)
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for properties in parsed:
+        for key, value in properties.items():
+            if key in metadata_index and value in metadata_index[key]:
+                metadata_index[key].remove(value)
+                if not metadata_index[key]:
+                    del metadata_index[key]
+    delete_time = time.perf_counter() - start
+
+    return insert_time, delete_time
+
+
+def report(label: str, count: int, insert_time: float, delete_time: float) -> None:
+    print(
+        f"{label:<24} {count:>8} nodes | insert {insert_time:7.3f}s "
+        f"({count / insert_time:10.0f} nodes/s) | delete {delete_time:7.3f}s "
+        f"({count / delete_time:10.0f} nodes/s)"
+    )
+
+
+def main(node_count: int, legacy_count: int) -> None:
+    nodes = make_nodes(node_count)
+    report("count-based (current)", node_count, *bench_cv_index(nodes))
+
+    legacy_nodes = nodes[:legacy_count]
+    report("count-based (current)", legacy_count, *bench_cv_index(legacy_nodes))
+    report("list-based (previous)", legacy_count, *bench_legacy_lists(legacy_nodes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--legacy-nodes", type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup_logging(log_level="WARNING")
+    main(args.nodes, args.legacy_nodes)
@@ -0,0 +1,111 @@
+"""Check the JSON repair pass against a corpus of malformed LLM outputs.
+
+Each corpus entry names a validator, a raw output and the expected validated
+result (or null when the output must still be rejected and re-asked). Also
+reports how long validating the corpus takes with repairs.
+
+Usage:
+    poetry run python benchmarks/json_repair.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from flows.job_extractor.simple_extract_properties import (  # noqa: E402
+    validate_extract_properties_output,
+)
+from flows.job_extractor.simple_fused_extractor import (  # noqa: E402
+    validate_fused_output,
+)
+from flows.job_extractor.simple_heavy_constraints_extractor import (  # noqa: E402
+    validate_heavy_constraints_output,
+)
+from flows.job_extractor.simple_roles_extractor import (  # noqa: E402
+    validate_roles_output,
+)
+from flows.job_extractor.simple_tools_tech_extractor import (  # noqa: E402
+    validate_tools_tech_output,
+)
+from logger import setup_logging  # noqa: E402
+from utils.json_repair import get_repair_stats  # noqa: E402
+from utils.validation import ValidationError  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "json_repair_corpus.jsonl"
+
+VALIDATORS = {
+    "roles": validate_roles_output,
+    "tools_tech": validate_tools_tech_output,
+    "heavy_constraints": validate_heavy_constraints_output,
+    "properties": validate_extract_properties_output,
+    "fused": validate_fused_output,
+}
+
+
+def check_case(case: dict) -> str | None:
+    """Return an error message if the case doesn't behave as expected."""
+    validator = VALIDATORS[case["validator"]]
+    try:
+        result = validator(case["output"])
+    except ValidationError as e:
+        if case["expected"] is None:
+            return None
+        return f"rejected: {e}"
+
+    if case["expected"] is None:
+        return f"expected a rejection, got {result}"
+    if result != case["expected"]:
+        return f"got {result}, expected {case['expected']}"
+    return None
+
+
+def main(corpus_path: Path, rounds: int) -> int:
+    cases = [json.loads(line) for line in corpus_path.read_text().splitlines() if line]
+
+    failures = 0
+    for number, case in enumerate(cases, 1):
+        error = check_case(case)
+        if error:
+            failures += 1
+            print(f"FAIL case {number} ({case['validator']}): {error}")
+
+    stats = get_repair_stats()
+    expected_rejections = sum(case["expected"] is None for case in cases)
+    print(
+        f"{len(cases)} cases: {stats.saved} repaired (re-asks saved), "
+        f"{stats.failed} rejected ({expected_rejections} expected)")
+    print("Repairs by kind: " + ", ".join(
+        f"{kind} {count}" for kind, count in stats.by_kind.most_common()))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for case in cases:
+            try:
+                VALIDATORS[case["validator"]](case["output"])
+            except ValidationError:
+                pass
+    elapsed = time.perf_counter() - start
+    print(f"Validated {rounds * len(cases)} outputs in {elapsed:.3f}s "
+          f"({elapsed / (rounds * len(cases)) * 1e6:.1f}us each)")
+
+    if failures:
+        print(f"FAIL: {failures} cases did not repair as expected")
+        return 1
+    print("OK: every case repaired or rejected as expected")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_logging(log_level="WARNING")
+    sys.exit(main(args.corpus, args.rounds))
@@ -0,0 +1,142 @@
+"""Benchmark the single-pass text cleaner against the previous pipeline.
+
+Cleans large postings and a batch of documents with both clean_text and
+normalize_text(remove_all_emojis(text)), checks that the outputs are
+byte-identical, and reports the speedup. Randomized inputs full of emoji
+sequences, variation selectors and whitespace oddities are checked too.
+
+Usage:
+    poetry run python benchmarks/text_cleaner.py --documents 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+from logger import setup_logging  # noqa: E402
+from utils.text_cleaner import (  # noqa: E402
+    clean_text,
+    clean_texts,
+    normalize_text,
+    remove_all_emojis,
+)
+
+SENTENCES = [
+    "We are looking for a Senior Backend Engineer to join our platform team.",
+    "You will design, build and operate services in Python and Go!!",
+    "Experience with PostgreSQL, Kafka and Kubernetes is a plus...",
+    "Do you enjoy mentoring other engineers??",
+    "Remote-first, with an office in Berlin for those who want it.",
+    "Competitive salary, equity and 30 days of paid vacation.....",
+]
+ACCENTED_SENTENCES = [
+    "Wir suchen eine erfahrene Entwicklerin für unser Team in München.",
+    "Poste basé à Paris, télétravail possible — rémunération attractive.",
+]
+EMOJI_SENTENCES = [
+    "🚀 Join a fast-growing startup! 🎉🎉",
+    "Perks: ☕ free coffee, 🏋️‍♀️ gym, 👩🏽‍💻 flexible hours ✨",
+    "Apply now 👉 #️⃣ 1️⃣ ❤️ 🇩🇪",
+]
+WHITESPACE = [" ", "  ", "\n", "\n\n", "\t", " \r\n ", " ", " "]
+FUZZ_ALPHABET = (
+    list("ab #*019!?. ") + WHITESPACE + list("éü—©®™‼")
+    + ["‍", "︎", "️", "⃣", "🏽", "👩", "💻", "❤", "🇩", "🇪", "🚀"]
+)
+
+
+def make_document(rng: random.Random, sentences: int, kind: str) -> str:
+    pool = SENTENCES + (ACCENTED_SENTENCES if kind != "ascii" else [])
+    if kind == "emoji":
+        pool = pool + EMOJI_SENTENCES
+    parts = []
+    for _ in range(sentences):
+        parts.append(rng.choice(pool))
+        parts.append(rng.choice(WHITESPACE if kind != "ascii" else [" ", "\n", "  "]))
+    return "".join(parts)
+
+
+def make_documents(count: int) -> list[str]:
+    rng = random.Random(42)
+    kinds = ["ascii", "accented", "emoji"]
+    return [
+        make_document(rng, rng.randint(20, 80), kinds[i % len(kinds)]) for i in range(count)
+    ]
+
+
+def baseline(text: str) -> str:
+    return normalize_text(remove_all_emojis(text))
+
+
+def timed(func: Callable[[], list[str]], rounds: int) -> tuple[float, list[str]]:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare(label: str, texts: list[str], rounds: int) -> bool:
+    old_time, old = timed(lambda: [baseline(text) for text in texts], rounds)
+    new_time, new = timed(lambda: [clean_text(text) for text in texts], rounds)
+    batch_time, batch = timed(lambda: clean_texts(texts), rounds)
+    identical = old == new == batch
+    print(
+        f"{label}: baseline {old_time * 1000:.1f} ms, clean_text {new_time * 1000:.1f} ms "
+        f"({old_time / new_time:.1f}x), clean_texts {batch_time * 1000:.1f} ms "
+        f"({old_time / batch_time:.1f}x), identical: {identical}")
+    return identical
+
+
+def fuzz(cases: int) -> int:
+    rng = random.Random(7)
+    mismatches = 0
+    for _ in range(cases):
+        text = "".join(rng.choices(FUZZ_ALPHABET, k=rng.randint(0, 40)))
+        if clean_text(text) != baseline(text):
+            mismatches += 1
+            print(f"Mismatch for {text!r}: {clean_text(text)!r} != {baseline(text)!r}")
+    print(f"Fuzzed {cases} random strings, {mismatches} mismatches")
+    return mismatches
+
+
+def main(documents: int, posting_kb: int, rounds: int, fuzz_cases: int) -> int:
+    rng = random.Random(1)
+    ok = True
+    for kind in ["ascii", "accented", "emoji"]:
+        posting = make_document(rng, posting_kb * 1024 // 60, kind)
+        ok &= compare(f"{len(posting) // 1024} KB {kind} posting", [posting], rounds)
+
+    corpus = make_documents(documents)
+    ok &= compare(f"{documents} documents", corpus, rounds)
+    # Scraped corpora repeat postings; clean_texts cleans each one once
+    repeated = corpus[: documents // 2] * 2
+    ok &= compare(f"{documents} documents, half duplicates", repeated, rounds)
+
+    ok &= fuzz(fuzz_cases) == 0
+
+    if not ok:
+        print("FAIL: clean_text output differs from the previous pipeline")
+        return 1
+    print("OK: outputs are byte-identical")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=10_000)
+    parser.add_argument("--posting-kb", type=int, default=128)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--fuzz", type=int, default=20_000)
+    args = parser.parse_args()
+
+    setup_logging(log_level="WARNING")
+    sys.exit(main(args.documents, args.posting_kb, args.rounds, args.fuzz))
@@ -0,0 +1,123 @@
+"""Token-budgeted context packing for CV questions.
+
+Retrieved CV nodes repeat a lot: the same property value shows up in several
+chunks, and fields like the file name are on every node. The context builder
+splits the nodes into facts, drops duplicates, ranks the facts by the
+relevance of their key to the query and keeps the best ones that fit a token
+budget.
+"""
+
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from llama_index.core.schema import NodeWithScore
+
+from settings import settings
+from utils.rate_limiter import estimate_tokens
+
+# Node metadata field holding the keys picked for the query, most relevant first
+SELECTED_KEYWORDS_KEY = "selected_keywords"
+# Node metadata field holding the node's parsed properties for those keys
+SELECTED_PROPERTIES_KEY = "selected_properties"
+# Stored node metadata field telling whether 'properties' is "extracted" or "fallback"
+PROPERTIES_STATUS_KEY = "properties_status"
+
+# Metadata fields that are never shown as plain facts
+_HIDDEN_METADATA_KEYS = {
+    "content",
+    "properties",
+    "chunk_hash",
+    PROPERTIES_STATUS_KEY,
+    SELECTED_KEYWORDS_KEY,
+    SELECTED_PROPERTIES_KEY,
+}
+
+# Fact groups, in the order they fill the budget
+_PROPERTY_FACT = 0
+_CONTENT_FACT = 1
+_METADATA_FACT = 2
+
+
+@dataclass
+class ContextFact:
+    """One line of context and where it ranks."""
+
+    text: str
+    rank: tuple[int, ...]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class CVContextBuilder:
+    """Build deduplicated, ranked context that fits a token budget."""
+
+    def __init__(self, token_budget: int = None):
+        # 0 or less keeps every fact
+        self.token_budget = (
+            settings.cv_context_token_budget if token_budget is None else token_budget
+        )
+
+    def _node_facts(self, node_index: int, node_with_score: NodeWithScore) -> list[ContextFact]:
+        node = node_with_score.node
+        metadata = node.metadata or {}
+        selected_keywords = metadata.get(SELECTED_KEYWORDS_KEY)
+
+        # Plain nodes (not from a CVRetriever) are used as a whole
+        if selected_keywords is None:
+            content = node.get_content()
+            return [ContextFact(content, (_CONTENT_FACT, node_index))] if content else []
+
+        facts = []
+        key_ranks = {key: rank for rank, key in enumerate(selected_keywords)}
+        properties = metadata.get(SELECTED_PROPERTIES_KEY) or {}
+        for key, value in properties.items():
+            if key in key_ranks and value:
+                facts.append(ContextFact(
+                    f"{key}: {value}", (_PROPERTY_FACT, key_ranks[key], node_index)))
+
+        if metadata.get("content"):
+            facts.append(ContextFact(
+                f"Content: {metadata['content']}", (_CONTENT_FACT, node_index)))
+
+        for key, value in metadata.items():
+            if key not in _HIDDEN_METADATA_KEYS and value:
+                facts.append(ContextFact(
+                    f"{key}: {value}", (_METADATA_FACT, node_index)))
+        return facts
+
+    def build(self, nodes: Sequence[NodeWithScore]) -> list[str]:
+        """Pick the context lines for a query from the retrieved nodes.
+
+        Args:
+            nodes: Retrieved nodes, higher scores first
+
+        Returns:
+            Unique facts, most relevant first, within the token budget
+        """
+        ordered_nodes = sorted(nodes, key=lambda node: -(node.score or 0.0))
+        facts = [
+            fact
+            for node_index, node_with_score in enumerate(ordered_nodes)
+            for fact in self._node_facts(node_index, node_with_score)
+        ]
+        facts.sort(key=lambda fact: fact.rank)
+
+        seen = set()
+        context = []
+        used_tokens = 0
+        for fact in facts:
+            normalized = _normalize(fact.text)
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+
+            tokens = estimate_tokens(fact.text)
+            # Skip facts that don't fit; a shorter one further down still might
+            if self.token_budget > 0 and used_tokens + tokens > self.token_budget:
+                continue
+            context.append(fact.text)
+            used_tokens += tokens
+        return context
@@ -1,39 +1,110 @@
-from typing import Sequence, Any, Dict, List, DefaultDict
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
 from collections import defaultdict
+from collections.abc import AsyncGenerator, Generator, Sequence
 from dataclasses import dataclass, field
-import json
-from llama_index.core.base.base_retriever import BaseRetriever
-from llama_index.core.indices.base import BaseIndex
-from llama_index.core.response_synthesizers.base import BaseSynthesizer
+from pathlib import Path
+from typing import Any
+
 from llama_index.core import Document
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.response.schema import (
+    AsyncStreamingResponse,
+    Response,
+    StreamingResponse,
+)
 from llama_index.core.data_structs.data_structs import IndexStruct
 from llama_index.core.data_structs.struct_type import IndexStructType
-from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.indices.base import BaseIndex
 from llama_index.core.llms import LLM
-from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.prompts import PromptTemplate
-from llama_index.core.base.response.schema import Response
-from llama_index.core.schema import QueryBundle
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.response_synthesizers.base import BaseSynthesizer
+from llama_index.core.schema import NodeWithScore, QueryBundle, TextNode
+
+from cv_context import (
+    SELECTED_KEYWORDS_KEY,
+    SELECTED_PROPERTIES_KEY,
+    CVContextBuilder,
+)
+from cv_keyword_selector import KeywordSelector
+from logger import get_logger
+from settings import settings
+from utils.llm_clients import get_llm
+from utils.metrics import get_metrics
+from utils.rate_limiter import estimate_request_tokens, get_llm_rate_limiter
+
+log = get_logger(__name__)
+
+# Bump when the on-disk layout written by CVIndex.save changes
+CV_INDEX_FORMAT_VERSION = 1
+
+
+def compute_cv_fingerprint(source: bytes, *parts: str) -> str:
+    """Fingerprint a CV source file together with the settings that index it.
+
+    Args:
+        source: Raw bytes of the CV (e.g. the PDF)
+        *parts: Anything else the index depends on, like the extraction
+            prompt version or chunking settings
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256(source)
+    for part in parts:
+        digest.update(b"\0" + part.encode("utf-8"))
+    return digest.hexdigest()
 
 
 @dataclass
 class CVIndexStruct(IndexStruct):
     """Data structure for CV Index."""
 
-    metadata_index: DefaultDict[str, List[str]] = field(
-        default_factory=lambda: defaultdict(list))
-    node_metadata: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    # Property key -> {value: number of nodes with that value}, in insertion order
+    metadata_index: defaultdict[str, dict[str, int]] = field(
+        default_factory=lambda: defaultdict(dict))
+    node_metadata: dict[str, dict[str, str]] = field(default_factory=dict)
+    # Property key -> ids of the nodes that have it
+    key_postings: defaultdict[str, set[str]] = field(
+        default_factory=lambda: defaultdict(set))
+    # Parsed node_metadata['properties'] per node
+    node_properties: dict[str, dict[str, str]] = field(default_factory=dict)
 
     @classmethod
     def get_type(cls) -> IndexStructType:
         return IndexStructType.DICT
 
 
+def _record_timing(
+    timing: dict[str, float] | None, start: float, first_token_at: float | None
+) -> None:
+    """Store and log how long a synthesis took to its first token and in total."""
+    total_time = time.perf_counter() - start
+    time_to_first_token = (first_token_at or time.perf_counter()) - start
+    if timing is not None:
+        timing["time_to_first_token"] = time_to_first_token
+        timing["total_time"] = total_time
+    metrics = get_metrics()
+    metrics.observe("cv_time_to_first_token_seconds", time_to_first_token)
+    metrics.observe("cv_stage_seconds", total_time, stage="synthesis")
+    log.info(
+        f"CV synthesis: first token after {time_to_first_token:.2f}s, "
+        f"total {total_time:.2f}s")
+
+
 class CVSynthesizer(BaseSynthesizer):
-    def __init__(self, llm: LLM = None, **kwargs):
+    def __init__(
+        self, llm: LLM = None, context_builder: CVContextBuilder = None, **kwargs
+    ):
         # Pass the LLM explicitly to avoid default OpenAI LLM initialization
         super().__init__(llm=llm, **kwargs)
         self._llm = llm
+        self._context_builder = context_builder or CVContextBuilder()
         self._response_template = PromptTemplate(
             """You are an AI assistant specialized in CV evaluation and candidate assessment.
 
@@ -49,13 +120,19 @@ Only use the provided context without assumptions.
 Response:"""
         )
 
-    def _get_prompts(self) -> Dict[str, PromptTemplate]:
+    def _get_prompts(self) -> dict[str, PromptTemplate]:
         return {"response_template": self._response_template}
 
-    def _update_prompts(self, prompts: Dict[str, PromptTemplate]) -> None:
+    def _update_prompts(self, prompts: dict[str, PromptTemplate]) -> None:
         if "response_template" in prompts:
             self._response_template = prompts["response_template"]
 
+    def _format_prompt(self, query_str: str, text_chunks: Sequence[str]) -> str:
+        return self._response_template.format(
+            query_str=query_str,
+            context_str="\n".join(text_chunks)
+        )
+
     def get_response(
         self,
         query_str: str,
@@ -66,53 +143,120 @@ Response:"""
         if not text_chunks:
             return "No relevant information found in the CV to answer this query."
 
-        # Combine all text chunks into context
-        context_str = "\n\n".join(text_chunks)
-
         # If LLM is available, use it for synthesis
         if self._llm:
-            formatted_prompt = self._response_template.format(
-                query_str=query_str,
-                context_str=context_str
-            )
-            response = self._llm.complete(formatted_prompt)
+            formatted_prompt = self._format_prompt(query_str, text_chunks)
+            rate_limiter = get_llm_rate_limiter(self._llm)
+            estimated_tokens = estimate_request_tokens(formatted_prompt)
+            with rate_limiter.limit_sync(estimated_tokens):
+                response = self._llm.complete(formatted_prompt)
+            rate_limiter.record_usage(estimated_tokens, response)
+            get_metrics().record_tokens("cv_synthesis", response)
             return response.text
         else:
             # Fallback: return the context with basic formatting
+            context_str = "\n\n".join(text_chunks)
             return f"Based on the query '{query_str}', here is the relevant CV information:\n\n{context_str}"
 
+    def stream_response(
+        self,
+        query_str: str,
+        text_chunks: Sequence[str],
+        timing: dict[str, float] = None,
+    ) -> Generator[str, None, None]:
+        """Yield the response text as the LLM generates it.
+
+        Args:
+            query_str: Query to answer
+            text_chunks: Retrieved CV context
+            timing: Dict filled with time_to_first_token and total_time
+        """
+        start = time.perf_counter()
+        if not text_chunks or not self._llm:
+            yield self.get_response(query_str, text_chunks)
+            _record_timing(timing, start, start)
+            return
+
+        formatted_prompt = self._format_prompt(query_str, text_chunks)
+        rate_limiter = get_llm_rate_limiter(self._llm)
+        estimated_tokens = estimate_request_tokens(formatted_prompt)
+        first_token_at = None
+        response = None
+        with rate_limiter.limit_sync(estimated_tokens):
+            for response in self._llm.stream_complete(formatted_prompt):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield response.delta or ""
+
+        rate_limiter.record_usage(estimated_tokens, response)
+        get_metrics().record_tokens("cv_synthesis", response)
+        _record_timing(timing, start, first_token_at)
+
+    async def astream_response(
+        self,
+        query_str: str,
+        text_chunks: Sequence[str],
+        timing: dict[str, float] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Async version of stream_response."""
+        start = time.perf_counter()
+        if not text_chunks or not self._llm:
+            yield await self.aget_response(query_str, text_chunks)
+            _record_timing(timing, start, start)
+            return
+
+        formatted_prompt = self._format_prompt(query_str, text_chunks)
+        rate_limiter = get_llm_rate_limiter(self._llm)
+        estimated_tokens = estimate_request_tokens(formatted_prompt)
+        first_token_at = None
+        response = None
+        async with rate_limiter.limit(estimated_tokens):
+            async for response in await self._llm.astream_complete(formatted_prompt):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield response.delta or ""
+
+        rate_limiter.record_usage(estimated_tokens, response)
+        get_metrics().record_tokens("cv_synthesis", response)
+        _record_timing(timing, start, first_token_at)
+
+    def _get_text_chunks(self, nodes: list[NodeWithScore]) -> list[str]:
+        """Build the deduplicated, budgeted context lines for the nodes."""
+        with get_metrics().timer("cv_stage_seconds", stage="context"):
+            return self._context_builder.build(nodes)
+
     def synthesize(
         self,
         query: QueryBundle,
-        nodes: List[NodeWithScore],
+        nodes: list[NodeWithScore],
         additional_source_nodes: Sequence[NodeWithScore] = None,
         **response_kwargs: Any,
     ) -> Response:
         """Synthesize response from nodes."""
-        # Extract text chunks from nodes
-        text_chunks = []
-        for node_with_score in nodes:
-            node = node_with_score.node
-            # Use the proper method to get text content from TextNode
-            if hasattr(node, 'get_content'):
-                content = node.get_content()
-                if content:
-                    text_chunks.append(content)
-            elif hasattr(node, 'text'):
-                if node.text:
-                    text_chunks.append(node.text)
+        text_chunks = self._get_text_chunks(nodes)
+        timing: dict[str, float] = {}
+
+        if self._streaming:
+            return StreamingResponse(
+                response_gen=self.stream_response(query.query_str, text_chunks, timing),
+                source_nodes=nodes,
+                metadata={"timing": timing},
+            )
 
         # Use the existing get_response method
+        start = time.perf_counter()
         response_text = self.get_response(
             query_str=query.query_str,
             text_chunks=text_chunks,
             **response_kwargs
         )
+        _record_timing(timing, start, time.perf_counter())
 
         # Return Response object
         return Response(
             response=response_text,
             source_nodes=nodes,
+            metadata={"timing": timing},
         )
 
     async def aget_response(
@@ -125,28 +269,71 @@ Response:"""
         if not text_chunks:
             return "No relevant information found in the CV to answer this query."
 
-        # Combine all text chunks into context
-        context_str = "\n\n".join(text_chunks)
-
         # If LLM is available, use it for synthesis
         if self._llm:
-            formatted_prompt = self._response_template.format(
-                query_str=query_str,
-                context_str=context_str
-            )
-            response = await self._llm.acomplete(formatted_prompt)
+            formatted_prompt = self._format_prompt(query_str, text_chunks)
+            rate_limiter = get_llm_rate_limiter(self._llm)
+            estimated_tokens = estimate_request_tokens(formatted_prompt)
+            async with rate_limiter.limit(estimated_tokens):
+                response = await self._llm.acomplete(formatted_prompt)
+            rate_limiter.record_usage(estimated_tokens, response)
+            get_metrics().record_tokens("cv_synthesis", response)
             return response.text
         else:
             # Fallback: return the context with basic formatting
+            context_str = "\n\n".join(text_chunks)
             return f"Based on the query '{query_str}', here is the relevant CV information:\n\n{context_str}"
 
+    async def asynthesize(
+        self,
+        query: QueryBundle,
+        nodes: list[NodeWithScore],
+        additional_source_nodes: Sequence[NodeWithScore] = None,
+        **response_kwargs: Any,
+    ) -> Response:
+        """Async version of synthesize."""
+        text_chunks = self._get_text_chunks(nodes)
+        timing: dict[str, float] = {}
+
+        if self._streaming:
+            return AsyncStreamingResponse(
+                response_gen=self.astream_response(query.query_str, text_chunks, timing),
+                source_nodes=nodes,
+                metadata={"timing": timing},
+            )
+
+        start = time.perf_counter()
+        response_text = await self.aget_response(
+            query_str=query.query_str,
+            text_chunks=text_chunks,
+            **response_kwargs
+        )
+        _record_timing(timing, start, time.perf_counter())
+
+        return Response(
+            response=response_text,
+            source_nodes=nodes,
+            metadata={"timing": timing},
+        )
+
 
 class CVRetriever(BaseRetriever):
-    def __init__(self, index: 'CVIndex', llm: LLM = None):
+    def __init__(
+        self,
+        index: 'CVIndex',
+        llm: LLM = None,
+        keyword_selection: str = None,
+        min_confidence: float = None,
+    ):
         self._index = index
         self._llm = llm
+        # "local", "llm", or "auto" (local, falling back to the LLM when unsure)
+        self._keyword_selection = keyword_selection or settings.cv_keyword_selection
+        self._min_confidence = (
+            settings.cv_keyword_min_confidence if min_confidence is None else min_confidence
+        )
 
-    def _get_keyword_selection_prompt(self, query: str, keywords: List[str]) -> str:
+    def _get_keyword_selection_prompt(self, query: str, keywords: list[str]) -> str:
         """Generate prompt for LLM to select relevant keywords."""
         keywords_str = ", ".join(keywords)
         prompt = f"""Given the following query: "{query}"
@@ -160,21 +347,70 @@ Example response format: ["keyword1", "keyword2", "keyword3"]
 Relevant keywords:"""
         return prompt
 
-    def _retrieve(self, query_str: str) -> List[NodeWithScore]:
-        """Retrieve nodes based on keyword matching using LLM."""
+    def _select_keywords_locally(self, query_str: str) -> list[str] | None:
+        """Select relevant keywords locally, or None if the LLM should be asked."""
+        if self._keyword_selection != "llm":
+            selection = self._index.keyword_selector.select(query_str)
+            if (
+                self._keyword_selection == "local"
+                or not self._llm
+                or selection.confidence >= self._min_confidence
+            ):
+                log.debug(
+                    f"Local keyword selection ({selection.confidence:.2f}): "
+                    f"{selection.keywords}")
+                get_metrics().increment("cv_keyword_selections_total", method="local")
+                return selection.keywords
+
+            log.debug(
+                f"Low local keyword confidence ({selection.confidence:.2f}), "
+                "asking the LLM")
+
+        return None
+
+    def _select_keywords(self, query_str: str, all_keywords: list[str]) -> list[str]:
+        """Select relevant keywords locally, asking the LLM only when needed."""
+        keywords = self._select_keywords_locally(query_str)
+        if keywords is not None:
+            return keywords
+
         if not self._llm:
             return []
 
-        # Get all unique keywords from the metadata index
-        all_keywords = list(self._index._index_struct.metadata_index.keys())
+        prompt = self._get_keyword_selection_prompt(query_str, all_keywords)
+        rate_limiter = get_llm_rate_limiter(self._llm)
+        estimated_tokens = estimate_request_tokens(prompt)
+        with rate_limiter.limit_sync(estimated_tokens):
+            llm_response = self._llm.complete(prompt)
+        rate_limiter.record_usage(estimated_tokens, llm_response)
+        self._record_llm_selection(llm_response)
+        return self._parse_llm_keywords(llm_response, all_keywords)
+
+    async def _aselect_keywords(self, query_str: str, all_keywords: list[str]) -> list[str]:
+        """Async version of _select_keywords."""
+        keywords = self._select_keywords_locally(query_str)
+        if keywords is not None:
+            return keywords
 
-        if not all_keywords:
+        if not self._llm:
             return []
 
-        # Use LLM to select relevant keywords
         prompt = self._get_keyword_selection_prompt(query_str, all_keywords)
-        llm_response = self._llm.complete(prompt)
-
+        rate_limiter = get_llm_rate_limiter(self._llm)
+        estimated_tokens = estimate_request_tokens(prompt)
+        async with rate_limiter.limit(estimated_tokens):
+            llm_response = await self._llm.acomplete(prompt)
+        rate_limiter.record_usage(estimated_tokens, llm_response)
+        self._record_llm_selection(llm_response)
+        return self._parse_llm_keywords(llm_response, all_keywords)
+
+    def _record_llm_selection(self, llm_response: Any) -> None:
+        metrics = get_metrics()
+        metrics.increment("cv_keyword_selections_total", method="llm")
+        metrics.record_tokens("cv_keyword_selection", llm_response)
+
+    def _parse_llm_keywords(self, llm_response: Any, all_keywords: list[str]) -> list[str]:
+        """Parse the keywords selected by the LLM."""
         try:
             # Parse the LLM response as JSON
             selected_keywords = json.loads(llm_response.text.strip())
@@ -185,81 +421,158 @@ Relevant keywords:"""
             selected_keywords = [
                 kw for kw in all_keywords if kw.lower() in llm_response.text.lower()]
 
-        # Find all nodes that have the selected keywords
+        return selected_keywords
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        """Retrieve nodes based on keyword matching."""
+        # Get all unique keywords from the metadata index
+        all_keywords = list(self._index._index_struct.metadata_index.keys())
+
+        if not all_keywords:
+            return []
+
+        with get_metrics().timer("cv_stage_seconds", stage="retrieval"):
+            selected_keywords = self._select_keywords(query_bundle.query_str, all_keywords)
+            return self._build_nodes(selected_keywords)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        """Async version of _retrieve."""
+        all_keywords = list(self._index._index_struct.metadata_index.keys())
+
+        if not all_keywords:
+            return []
+
+        with get_metrics().timer("cv_stage_seconds", stage="retrieval"):
+            selected_keywords = await self._aselect_keywords(
+                query_bundle.query_str, all_keywords)
+            return self._build_nodes(selected_keywords)
+
+    def _build_nodes(self, selected_keywords: list[str]) -> list[NodeWithScore]:
+        """Build text nodes for every node that has a selected keyword.
+
+        Nodes are scored by their most relevant key, and the keys (most
+        relevant first) are kept in the node metadata for the context builder.
+        """
+        ranked_keywords = list(dict.fromkeys(
+            kw for kw in selected_keywords if isinstance(kw, str)))
+        selected_keywords = set(ranked_keywords)
+
+        # Find all nodes that have the selected keywords from the postings
+        index_struct = self._index._index_struct
         relevant_nodes = []
-        relevant_node_ids = set()
-
-        # Since metadata_index only stores keyword->values mapping,
-        # we still need to check each node to see if it has any of the selected keywords
-        for node_id, node_metadata in self._index._index_struct.node_metadata.items():
-            if 'properties' in node_metadata:
-                try:
-                    properties_dict = json.loads(node_metadata['properties'])
-                    # Check if this node has any of the selected keywords as property keys
-                    if any(keyword in properties_dict for keyword in selected_keywords):
-                        relevant_node_ids.add(node_id)
-                except json.JSONDecodeError:
-                    continue
+        best_rank: dict[str, int] = {}
+        for rank, kw in enumerate(ranked_keywords):
+            for node_id in index_struct.key_postings.get(kw, ()):
+                best_rank.setdefault(node_id, rank)
 
         # Create Document nodes for all relevant node IDs
-        for node_id in relevant_node_ids:
-            node_metadata = self._index._index_struct.node_metadata[node_id]
-
-            # Transform metadata into readable text - ONLY for selected keywords
-            text_parts = []
-
-            # Add original content if available
-            if 'content' in node_metadata and node_metadata['content']:
-                text_parts.append(f"Content: {node_metadata['content']}")
-
-            # Add ONLY the selected keywords as properties
-            if 'properties' in node_metadata:
-                try:
-                    properties_dict = json.loads(node_metadata['properties'])
-                    relevant_properties = {
-                        k: v for k, v in properties_dict.items() if k in selected_keywords}
-
-                    if relevant_properties:
-                        text_parts.append("Properties:")
-                        for key, value in relevant_properties.items():
-                            text_parts.append(f"  {key}: {value}")
-                except json.JSONDecodeError:
-                    pass
-
-            # Add other metadata fields
-            for key, value in node_metadata.items():
-                if key not in ['content', 'properties'] and value:
-                    text_parts.append(f"{key}: {value}")
-
-            # Combine all text parts
-            formatted_text = "\n".join(text_parts)
+        for node_id in sorted(best_rank, key=lambda node_id: (best_rank[node_id], node_id)):
+            node_metadata = index_struct.node_metadata[node_id]
+
+            # Pass ONLY the selected keywords' properties, already parsed at insert
+            properties_dict = index_struct.node_properties.get(node_id, {})
+            relevant_properties = {
+                k: v for k, v in properties_dict.items() if k in selected_keywords}
 
+            # The context builder turns the metadata into context lines
             doc = TextNode(
-                text=formatted_text,
-                metadata=node_metadata,
+                text=node_metadata.get('content') or "",
+                metadata={
+                    **node_metadata,
+                    SELECTED_KEYWORDS_KEY: ranked_keywords,
+                    SELECTED_PROPERTIES_KEY: relevant_properties,
+                },
                 node_id=node_id
             )
-            relevant_nodes.append(NodeWithScore(node=doc, score=1.0))
+            relevant_nodes.append(
+                NodeWithScore(node=doc, score=1.0 / (1 + best_rank[node_id])))
 
         return relevant_nodes
 
 
+class CVQueryEngine(RetrieverQueryEngine):
+    """Query engine for a CVIndex that can answer many questions at once."""
+
+    async def aquery_many(
+        self, questions: Sequence[str], concurrency: int = None
+    ) -> list[Response]:
+        """Answer questions concurrently, returning responses in question order.
+
+        Args:
+            questions: Questions to ask about the CV
+            concurrency: Maximum questions in flight, defaults to
+                settings.cv_query_concurrency
+
+        Returns:
+            One response per question
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.cv_query_concurrency)
+
+        async def answer(question: str) -> Response:
+            async with semaphore:
+                return await self.aquery(question)
+
+        return await asyncio.gather(*(answer(question) for question in questions))
+
+    async def astream(self, question: str) -> AsyncGenerator[str, None]:
+        """Answer a question, yielding the response text as it is generated.
+
+        The engine needs a streaming synthesizer to yield token by token;
+        otherwise the whole response is yielded at once.
+        """
+        response = await self.aquery(question)
+        if isinstance(response, AsyncStreamingResponse):
+            async for token in response.async_response_gen():
+                yield token
+        elif isinstance(response, StreamingResponse):
+            for token in response.response_gen:
+                yield token
+        else:
+            yield str(response)
+
+
+def _parse_properties(node_metadata: dict[str, Any]) -> dict[str, Any]:
+    """Parse the properties JSON of a node, ignoring invalid values."""
+    if 'properties' not in node_metadata:
+        return {}
+    try:
+        properties_dict = json.loads(node_metadata['properties'])
+    except (json.JSONDecodeError, TypeError):
+        log.warning("Skipping node with invalid properties JSON")
+        return {}
+    return properties_dict if isinstance(properties_dict, dict) else {}
+
+
 class CVIndex(BaseIndex):
     index_struct_cls = CVIndexStruct
 
+    @property
+    def keyword_selector(self) -> KeywordSelector:
+        """Local keyword selector, rebuilt whenever the index changes."""
+        version = getattr(self, "_version", 0)
+        if getattr(self, "_keyword_selector_version", None) != version:
+            self._keyword_selector = KeywordSelector().fit(
+                self._index_struct.metadata_index)
+            self._keyword_selector_version = version
+        return self._keyword_selector
+
     def _add_node_to_index(self, node: Document) -> None:
         if hasattr(node, 'metadata') and node.metadata:
             node_id = node.id_ if hasattr(node, 'id_') else str(id(node))
+            # Re-adding a node replaces its previous postings
+            if node_id in self._index_struct.node_metadata:
+                self._delete_node(node_id)
+            self._version = getattr(self, "_version", 0) + 1
             self._index_struct.node_metadata[node_id] = node.metadata
 
             # Only index properties (validated JSON)
-            if 'properties' in node.metadata:
-                properties_dict = json.loads(node.metadata['properties'])
-                for prop_key, prop_value in properties_dict.items():
-                    str_value = str(prop_value)
-                    if str_value not in self._index_struct.metadata_index[prop_key]:
-                        self._index_struct.metadata_index[prop_key].append(
-                            str_value)
+            properties_dict = _parse_properties(node.metadata)
+            self._index_struct.node_properties[node_id] = properties_dict
+            for prop_key, prop_value in properties_dict.items():
+                self._index_struct.key_postings[prop_key].add(node_id)
+                values = self._index_struct.metadata_index[prop_key]
+                str_value = str(prop_value)
+                values[str_value] = values.get(str_value, 0) + 1
 
     def _build_index_from_nodes(self, nodes: Sequence[Document]) -> CVIndexStruct:
         index_struct = CVIndexStruct()
@@ -270,20 +583,29 @@ class CVIndex(BaseIndex):
 
     def _delete_node(self, node_id: str) -> None:
         if node_id in self._index_struct.node_metadata:
-            # Get the metadata for this node
-            node_metadata = self._index_struct.node_metadata[node_id]
-
-            # Remove properties from the metadata index
-            if 'properties' in node_metadata:
-                properties_dict = json.loads(node_metadata['properties'])
-                for prop_key, prop_value in properties_dict.items():
-                    str_value = str(prop_value)
-                    if prop_key in self._index_struct.metadata_index and str_value in self._index_struct.metadata_index[prop_key]:
-                        self._index_struct.metadata_index[prop_key].remove(
-                            str_value)
-                        # Clean up empty lists
-                        if not self._index_struct.metadata_index[prop_key]:
-                            del self._index_struct.metadata_index[prop_key]
+            self._version = getattr(self, "_version", 0) + 1
+
+            # Get the parsed properties for this node
+            properties_dict = self._index_struct.node_properties.pop(node_id, {})
+
+            # Remove properties from the postings and the metadata index
+            for prop_key, prop_value in properties_dict.items():
+                postings = self._index_struct.key_postings.get(prop_key)
+                if postings is not None:
+                    postings.discard(node_id)
+                    if not postings:
+                        del self._index_struct.key_postings[prop_key]
+
+                # Only drop a value once no other node shares it
+                values = self._index_struct.metadata_index.get(prop_key)
+                str_value = str(prop_value)
+                if values is not None and str_value in values:
+                    values[str_value] -= 1
+                    if values[str_value] <= 0:
+                        del values[str_value]
+                    # Clean up empty keys
+                    if not values:
+                        del self._index_struct.metadata_index[prop_key]
 
             # Remove node metadata
             del self._index_struct.node_metadata[node_id]
@@ -291,13 +613,101 @@ class CVIndex(BaseIndex):
     def _insert(self, node: Document) -> None:
         self._add_node_to_index(node)
 
-    def as_retriever(self, llm: LLM = None) -> BaseRetriever:
-        return CVRetriever(self, llm)
+    def save(self, path: str | Path, fingerprint: str = "") -> None:
+        """Save the index struct to a gzipped JSON file.
+
+        Args:
+            path: Destination file
+            fingerprint: Fingerprint of the source the index was built from
+        """
+        index_struct = self._index_struct
+        data = {
+            "format_version": CV_INDEX_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "index_id": index_struct.index_id,
+            "node_metadata": index_struct.node_metadata,
+            "node_properties": index_struct.node_properties,
+            "metadata_index": index_struct.metadata_index,
+            "key_postings": {
+                key: sorted(node_ids)
+                for key, node_ids in index_struct.key_postings.items()
+            },
+        }
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        log.info(f"Saved CV index with {len(index_struct.node_metadata)} nodes to {path}")
+
+    @classmethod
+    def load(
+        cls, path: str | Path, fingerprint: str = None, **kwargs: Any
+    ) -> "CVIndex | None":
+        """Load an index saved with save().
+
+        Args:
+            path: File written by save()
+            fingerprint: Expected fingerprint; a mismatch returns None
+            **kwargs: Extra CVIndex constructor arguments
+
+        Returns:
+            The loaded index, or None if it is missing or stale
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning(f"Failed to load CV index {path}: {e}")
+            return None
+
+        if data.get("format_version") != CV_INDEX_FORMAT_VERSION:
+            log.info(f"Ignoring CV index {path} with an old format")
+            return None
+        if fingerprint is not None and data.get("fingerprint") != fingerprint:
+            log.info(f"Ignoring stale CV index {path}")
+            return None
+
+        index_struct = CVIndexStruct(
+            index_id=data["index_id"],
+            node_metadata=data["node_metadata"],
+            node_properties=data["node_properties"],
+        )
+        index_struct.metadata_index.update(data["metadata_index"])
+        for key, node_ids in data["key_postings"].items():
+            index_struct.key_postings[key] = set(node_ids)
+
+        log.info(f"Loaded CV index with {len(index_struct.node_metadata)} nodes from {path}")
+        return cls(index_struct=index_struct, **kwargs)
 
-    def as_query_engine(self, llm: LLM = None, **kwargs):
-        retriever = self.as_retriever(llm=llm)
-        synthesizer = CVSynthesizer(llm=llm)
-        return RetrieverQueryEngine(retriever=retriever, response_synthesizer=synthesizer)
+    def as_retriever(
+        self, llm: LLM = None, keyword_selection: str = None, **kwargs
+    ) -> BaseRetriever:
+        return CVRetriever(self, llm, keyword_selection=keyword_selection, **kwargs)
+
+    def as_query_engine(
+        self,
+        llm: LLM = None,
+        keyword_selection: str = None,
+        streaming: bool = False,
+        context_token_budget: int = None,
+        **kwargs,
+    ):
+        llm = llm or get_llm()
+        retriever = self.as_retriever(llm=llm, keyword_selection=keyword_selection)
+        # With streaming, (a)query returns a (Async)StreamingResponse
+        synthesizer = CVSynthesizer(
+            llm=llm,
+            context_builder=CVContextBuilder(token_budget=context_token_budget),
+            streaming=streaming,
+        )
+        return CVQueryEngine(retriever=retriever, response_synthesizer=synthesizer)
 
-    def ref_doc_info(self) -> Dict[str, Dict[str, Any]]:
+    def ref_doc_info(self) -> dict[str, dict[str, Any]]:
         return self._index_struct.node_metadata
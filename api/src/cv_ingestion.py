@@ -0,0 +1,166 @@
+"""Incremental ingestion of CV documents into a CVIndex."""
+
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from llama_index.core import Document
+from llama_index.core.node_parser import NodeParser
+from llama_index.core.schema import BaseNode, TransformComponent
+from llama_index.core.text_splitter import SentenceSplitter
+from llama_index.readers.file import PDFReader
+
+from cv_context import PROPERTIES_STATUS_KEY
+from cv_index import CVIndex, compute_cv_fingerprint
+from cv_properties_transformer import PropertiesExtractorTransformer
+from flows.job_extractor.simple_extract_properties import get_extract_properties_version
+from logger import get_logger
+from settings import settings
+
+log = get_logger(__name__)
+
+
+@dataclass
+class IngestionReport:
+    """What an incremental ingestion run did."""
+
+    reused: int = 0
+    extracted: int = 0
+    deleted: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.reused} chunks reused, {self.extracted} re-extracted, "
+            f"{self.deleted} deleted"
+        )
+
+
+def compute_chunk_hash(text: str, extraction_version: str = "") -> str:
+    """Hash a chunk's text together with the version of the extraction."""
+    payload = f"{extraction_version}\0{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_extracted(metadata: dict | None) -> bool:
+    """Whether stored chunk metadata holds an extraction worth reusing.
+
+    Chunks whose extraction fell back are marked as such and extracted again on
+    the next ingestion. A successful extraction that found no properties is
+    reused like any other.
+    """
+    return (
+        metadata is not None
+        and "properties" in metadata
+        and metadata.get(PROPERTIES_STATUS_KEY) == "extracted"
+    )
+
+
+async def aingest_incremental(
+    index: CVIndex,
+    documents: Sequence[Document],
+    splitter: NodeParser,
+    transformer: TransformComponent,
+    extraction_version: str = "",
+) -> IngestionReport:
+    """Bring an index up to date with the documents, re-extracting only changes.
+
+    Each chunk gets a content hash (stored as the 'chunk_hash' metadata field)
+    and a node id derived from it. Chunks whose hash is already in the index
+    keep their stored properties, new or changed chunks go through the
+    transformer, and chunks that no longer exist are deleted.
+
+    Args:
+        index: Index to update in place (may be empty)
+        documents: Current CV documents
+        splitter: Node parser used to chunk the documents
+        transformer: Transformation that adds 'properties' and
+            'properties_status' to nodes
+        extraction_version: Version of the property extraction; changing it
+            invalidates every stored chunk
+
+    Returns:
+        Counts of reused, re-extracted and deleted chunks
+    """
+    report = IngestionReport()
+    index_struct = index._index_struct
+
+    current: dict[str, BaseNode] = {}
+    for node in splitter.get_nodes_from_documents(documents):
+        chunk_hash = compute_chunk_hash(node.get_content(), extraction_version)
+        node.metadata["chunk_hash"] = chunk_hash
+        node.id_ = f"chunk-{chunk_hash[:32]}"
+        current[node.id_] = node
+
+    # Delete chunks that disappeared from the documents
+    for node_id in list(index_struct.node_metadata):
+        if node_id not in current:
+            index._delete_node(node_id)
+            report.deleted += 1
+
+    to_extract: list[BaseNode] = []
+    for node_id, node in current.items():
+        stored_metadata = index_struct.node_metadata.get(node_id)
+        if not is_extracted(stored_metadata):
+            to_extract.append(node)
+            continue
+
+        report.reused += 1
+        node.metadata["properties"] = stored_metadata["properties"]
+        node.metadata[PROPERTIES_STATUS_KEY] = stored_metadata[PROPERTIES_STATUS_KEY]
+        # Same text but e.g. a different page label: update without extracting
+        if node.metadata != stored_metadata:
+            index._insert(node)
+
+    if to_extract:
+        log.info(f"Extracting properties for {len(to_extract)} new or changed chunks")
+        for node in await transformer.acall(to_extract):
+            index._insert(node)
+        report.extracted = len(to_extract)
+
+    log.info(f"Incremental CV ingestion: {report}")
+    return report
+
+
+async def aload_cv_index(
+    pdf_path: Path, splitter: SentenceSplitter = None
+) -> CVIndex:
+    """Load the persisted index of a CV PDF, updating it if the PDF changed.
+
+    Args:
+        pdf_path: CV to index
+        splitter: Sentence splitter used to chunk the CV
+
+    Returns:
+        Up-to-date index of the CV
+    """
+    splitter = splitter or SentenceSplitter(chunk_size=512, chunk_overlap=64)
+
+    # Reuse the persisted index unless the PDF or the extraction changed. The
+    # model is part of the extraction version, so switching models re-extracts
+    # every chunk instead of reusing properties the old model produced.
+    extraction_version = f"{get_extract_properties_version()}/{settings.llm_model}"
+    fingerprint = compute_cv_fingerprint(
+        pdf_path.read_bytes(),
+        extraction_version,
+        f"{splitter.chunk_size}/{splitter.chunk_overlap}",
+    )
+    index_path = Path(settings.cv_index_dir) / f"{pdf_path.stem}.json.gz"
+    index = CVIndex.load(index_path, fingerprint=fingerprint)
+    if index is not None:
+        return index
+
+    documents = PDFReader().load_data(str(pdf_path))
+
+    # Start from the previous version of the index so only changed chunks are
+    # re-extracted
+    index = CVIndex.load(index_path) or CVIndex(nodes=[])
+    await aingest_incremental(
+        index,
+        documents,
+        splitter=splitter,
+        transformer=PropertiesExtractorTransformer(),
+        extraction_version=extraction_version,
+    )
+    index.save(index_path, fingerprint=fingerprint)
+    return index
@@ -0,0 +1,213 @@
+"""Local keyword selection over CV property keys.
+
+Scores every property key in a CVIndex metadata_index against a query with
+BM25. The key name and the values stored under it make up the key's document,
+and query terms are expanded with CV-specific synonyms. Selecting keys this
+way needs no network call; the caller decides whether the confidence is high
+enough or the LLM selector should be asked instead.
+"""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#]+")
+
+STOPWORDS = {
+    "a", "about", "an", "and", "any", "are", "as", "at", "be", "been", "by", "can",
+    "candidate", "candidates", "could", "cv", "do", "does", "for", "from", "going",
+    "good", "has", "have", "he", "her", "his", "how", "i", "if", "in", "is", "it",
+    "its", "more", "of", "on", "or", "our", "she", "than", "that", "the", "their",
+    "them", "there", "they", "this", "to", "very", "was", "we", "well", "what",
+    "when", "where", "which", "who", "will", "with", "would", "you", "your",
+}
+
+# Query word -> related property key words
+SYNONYMS: dict[str, list[str]] = {
+    "remote": ["location", "preferences", "relocation", "work_mode"],
+    "remotely": ["location", "preferences", "relocation", "work_mode"],
+    "onsite": ["location", "preferences", "relocation"],
+    "hybrid": ["location", "preferences"],
+    "relocate": ["location", "relocation", "preferences"],
+    "relocation": ["location", "preferences"],
+    "country": ["location"],
+    "city": ["location"],
+    "live": ["location"],
+    "latam": ["location", "preferences"],
+    "name": ["full_name", "contact"],
+    "email": ["contact"],
+    "phone": ["contact"],
+    "salary": ["compensation", "preferences"],
+    "compensation": ["salary", "preferences"],
+    "pay": ["compensation", "salary"],
+    "startup": ["experience", "companies", "work_experience"],
+    "company": ["experience", "work_experience"],
+    "work": ["experience", "work_experience"],
+    "job": ["experience", "job_title"],
+    "role": ["job_title", "experience"],
+    "engineer": ["job_title", "experience", "skills"],
+    "senior": ["experience", "job_title"],
+    "year": ["experience"],
+    "know": ["skills", "tools", "technologies"],
+    "tool": ["skills", "technologies"],
+    "tech": ["skills", "technologies", "tools"],
+    "stack": ["skills", "technologies"],
+    "language": ["languages", "skills"],
+    "speak": ["languages"],
+    "english": ["languages"],
+    "degree": ["education"],
+    "university": ["education"],
+    "study": ["education"],
+    "certified": ["certifications"],
+    "project": ["projects", "portfolio"],
+    "github": ["portfolio", "github"],
+    "team": ["experience", "leadership"],
+    "lead": ["leadership", "experience"],
+}
+
+STEM_SUFFIXES = ("ations", "ation", "ingly", "ing", "edly", "ed", "ly")
+
+
+def stem(token: str) -> str:
+    """Very light suffix stemmer, good enough to match plurals and adverbs."""
+    if len(token) <= 4:
+        return token
+    for suffix in STEM_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[: -len(suffix)]
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _stem_term(term: str) -> str:
+    # Whole key names like "work_mode" are matched as-is
+    return term if "_" in term else stem(term)
+
+
+STEMMED_SYNONYMS: dict[str, list[str]] = {}
+for _word, _related in SYNONYMS.items():
+    STEMMED_SYNONYMS.setdefault(stem(_word), []).extend(
+        _stem_term(term) for term in _related
+    )
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split and stem a text, dropping stopwords."""
+    return [
+        stem(token)
+        for token in TOKEN_PATTERN.findall(text.lower().replace("_", " "))
+        if token not in STOPWORDS
+    ]
+
+
+@dataclass
+class KeywordSelection:
+    """Keys picked for a query and how confident the selector is."""
+
+    keywords: list[str]
+    confidence: float
+
+
+class KeywordSelector:
+    """BM25 keyword selector over a CVIndex metadata_index."""
+
+    def __init__(
+        self,
+        key_weight: int = 3,
+        relative_threshold: float = 0.3,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.key_weight = key_weight
+        self.relative_threshold = relative_threshold
+        self.k1 = k1
+        self.b = b
+        self._doc_terms: dict[str, Counter] = {}
+        self._doc_lengths: dict[str, int] = {}
+        self._doc_freq: Counter = Counter()
+        self._avg_length = 0.0
+
+    def fit(self, metadata_index: dict[str, dict[str, int]]) -> "KeywordSelector":
+        """Build the BM25 statistics for every property key."""
+        self._doc_terms = {}
+        self._doc_freq = Counter()
+        for key, values in metadata_index.items():
+            terms = Counter()
+            for token in tokenize(key):
+                terms[token] += self.key_weight
+            # The key itself also matches as a whole (e.g. "work_mode")
+            terms[key.lower()] += self.key_weight
+            for value in values:
+                terms.update(tokenize(value))
+            self._doc_terms[key] = terms
+            self._doc_freq.update(terms.keys())
+
+        self._doc_lengths = {
+            key: sum(terms.values()) for key, terms in self._doc_terms.items()
+        }
+        total_length = sum(self._doc_lengths.values())
+        self._avg_length = total_length / len(self._doc_terms) if self._doc_terms else 0.0
+        return self
+
+    def _idf(self, term: str) -> float:
+        doc_count = len(self._doc_terms)
+        freq = self._doc_freq.get(term, 0)
+        return math.log(1 + (doc_count - freq + 0.5) / (freq + 0.5))
+
+    def _score(self, key: str, terms: dict[str, float]) -> float:
+        doc_terms = self._doc_terms[key]
+        length_norm = 1 - self.b + self.b * self._doc_lengths[key] / (self._avg_length or 1)
+        score = 0.0
+        for term, weight in terms.items():
+            tf = doc_terms.get(term, 0)
+            if tf:
+                score += (
+                    weight
+                    * self._idf(term)
+                    * tf * (self.k1 + 1)
+                    / (tf + self.k1 * length_norm)
+                )
+        return score
+
+    def select(self, query: str) -> KeywordSelection:
+        """Select the property keys relevant to a query."""
+        query_tokens = tokenize(query)
+        if not query_tokens or not self._doc_terms:
+            return KeywordSelection(keywords=[], confidence=0.0)
+
+        # Synonyms count for half of an exact term match
+        terms: dict[str, float] = {}
+        matched_tokens = 0
+        for token in query_tokens:
+            expansions = [
+                term for term in STEMMED_SYNONYMS.get(token, []) if term != token
+            ]
+            terms[token] = max(terms.get(token, 0.0), 1.0)
+            for term in expansions:
+                terms[term] = max(terms.get(term, 0.0), 0.5)
+            if any(self._doc_freq.get(term) for term in [token, *expansions]):
+                matched_tokens += 1
+
+        scores = {key: self._score(key, terms) for key in self._doc_terms}
+        best_score = max(scores.values())
+        if best_score <= 0:
+            return KeywordSelection(keywords=[], confidence=0.0)
+
+        keywords = sorted(
+            (
+                key
+                for key, score in scores.items()
+                if score >= best_score * self.relative_threshold
+            ),
+            key=lambda key: scores[key],
+            reverse=True,
+        )
+        return KeywordSelection(
+            keywords=keywords, confidence=matched_tokens / len(query_tokens)
+        )
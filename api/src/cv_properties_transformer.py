@@ -1,14 +1,92 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from llama_index.core.bridge.pydantic import Field
 from llama_index.core.schema import Node, TransformComponent
-from flows.job_extractor.simple_extract_properties import create_extract_properties_workflow
+
+from cv_context import PROPERTIES_STATUS_KEY
+from flows.job_extractor.simple_batched_properties_extractor import (
+    BatchedPropertiesExtractor,
+)
+from flows.job_extractor.simple_extract_properties import (
+    create_extract_properties_workflow,
+)
+from flows.simple_extractor import ExtractionResult
+from logger import get_logger
+from settings import settings
+from utils.llm_clients import aclose_llm_clients
+
+log = get_logger(__name__)
+
+
+def _set_properties(node: Node, extraction: ExtractionResult) -> None:
+    """Store the extracted properties and whether they are the fallback."""
+    node.metadata["properties"] = extraction.result
+    node.metadata[PROPERTIES_STATUS_KEY] = (
+        "fallback" if extraction.fallback else "extracted"
+    )
 
 
 class PropertiesExtractorTransformer(TransformComponent):
+    """Extract CV properties for every node, several chunks at a time."""
+
+    max_concurrency: int = Field(
+        default_factory=lambda: settings.cv_extraction_concurrency,
+        description="Maximum chunks extracted at once",
+    )
+    batch_token_budget: int = Field(
+        default_factory=lambda: settings.cv_extraction_batch_tokens,
+        description="Token budget of chunks packed into one request (0 disables batching)",
+    )
+
     def __call__(self, nodes, **kwargs):
-        return self.acall(nodes, **kwargs)
+        """Sync entry point, safe to run from pipeline worker threads."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._acall_in_new_loop(nodes, **kwargs))
+
+        # This thread already runs an event loop, so use a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(
+                asyncio.run, self._acall_in_new_loop(nodes, **kwargs)).result()
+
+    async def _acall_in_new_loop(self, nodes, **kwargs):
+        try:
+            return await self.acall(nodes, **kwargs)
+        finally:
+            await aclose_llm_clients(shared=False)
 
     async def acall(self, nodes, **kwargs):
+        if self.batch_token_budget > 0:
+            return await self._acall_batched(nodes)
+
+        workflow = create_extract_properties_workflow()
+        fallback_result = ExtractionResult(
+            json.dumps(workflow.fallback_result), fallback=True
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def extract(node: Node) -> ExtractionResult:
+            async with semaphore:
+                try:
+                    return await workflow.run_extraction(node.text)
+                except Exception as e:
+                    # One failed chunk falls back instead of failing the batch
+                    log.error(f"Failed to extract properties for node {node.id_}: {e}")
+                    return fallback_result
+
+        results = await asyncio.gather(*(extract(node) for node in nodes))
+        for node, result in zip(nodes, results, strict=True):
+            _set_properties(node, result)
+        return nodes
+
+    async def _acall_batched(self, nodes):
+        extractor = BatchedPropertiesExtractor(
+            token_budget=self.batch_token_budget, max_concurrency=self.max_concurrency
+        )
+        results = await extractor.run({node.id_: node.text for node in nodes})
         for node in nodes:
-            workflow = create_extract_properties_workflow()
-            result = await workflow.run(job_description=node.text)
-            node.metadata["properties"] = result
+            _set_properties(node, results[node.id_])
         return nodes
@@ -0,0 +1,140 @@
+"""Batch job extraction entry point."""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+import llama_index.core
+from dotenv import load_dotenv
+
+from job_scheduler import JOB_WORKFLOWS, JobScheduler
+from logger import get_logger
+from settings import settings
+from utils.cache import migrate_json_cache
+from utils.json_repair import get_repair_stats
+from utils.llm_clients import aclose_llm_clients
+from utils.metrics import get_metrics
+from utils.retry import format_retry_stats
+
+log = get_logger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run the job extractors over a directory of job postings."
+    )
+    parser.add_argument(
+        "--jobs-dir",
+        type=Path,
+        default=Path("data/jobs"),
+        help="Directory containing *.txt job postings",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.scheduler_max_workers,
+        help="Maximum (job, workflow) pairs processed at once",
+    )
+    parser.add_argument(
+        "--workers-per-model",
+        type=int,
+        default=settings.scheduler_max_workers_per_model,
+        help="Maximum concurrent pairs sent to the same model",
+    )
+    parser.add_argument(
+        "--workflows",
+        nargs="+",
+        choices=list(JOB_WORKFLOWS),
+        default=list(JOB_WORKFLOWS),
+        help="Workflows to run on each job",
+    )
+    parser.add_argument(
+        "--fused",
+        action="store_true",
+        help="Extract roles, tools/tech and constraints with one request per job",
+    )
+    parser.add_argument(
+        "--strip-boilerplate",
+        action=argparse.BooleanOptionalAction,
+        default=settings.scheduler_strip_boilerplate,
+        help="Strip sentences repeated across the job postings before extraction",
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Import legacy data/extracted/*.json results as the jobs' latest results first",
+    )
+    return parser.parse_args()
+
+
+def print_metrics_summary() -> None:
+    """Print the pipeline metrics of the run with the derived rates."""
+    memory = get_metrics().memory
+    lookups = memory.counter_total("cache_lookups_total")
+    results = memory.counter_total("extraction_results_total")
+    rates = []
+    if lookups:
+        hits = memory.counter_total("cache_lookups_total", result="hit")
+        rates.append(f"cache hit ratio {hits / lookups:.1%} ({hits:g}/{lookups:g})")
+    if results:
+        fallbacks = memory.counter_total("extraction_results_total", outcome="fallback")
+        rates.append(f"fallback rate {fallbacks / results:.1%} ({fallbacks:g}/{results:g})")
+
+    table = memory.summary_table()
+    if table:
+        print(f"\nPipeline metrics:\n{table}")
+    if rates:
+        print("\n" + ", ".join(rates))
+
+
+async def main():
+    """Main entry point."""
+    load_dotenv()
+    args = parse_args()
+
+    llama_index.core.set_global_handler("arize_phoenix")
+
+    if args.migrate:
+        migrate_json_cache(jobs_dir=str(args.jobs_dir))
+
+    job_files = sorted(args.jobs_dir.glob("*.txt"))
+    log.info(f"Found {len(job_files)} job files in {args.jobs_dir}")
+
+    scheduler = JobScheduler(
+        workflows={name: JOB_WORKFLOWS[name] for name in args.workflows},
+        max_workers=args.workers,
+        max_workers_per_model=args.workers_per_model,
+        fused=args.fused,
+        strip_boilerplate=args.strip_boilerplate,
+    )
+
+    metrics = get_metrics()
+    try:
+        progress = await scheduler.run(job_files)
+    finally:
+        await aclose_llm_clients()
+        metrics.shutdown()
+
+    print(f"\nExtraction finished: {progress.summary()}")
+    if progress.tokens_saved:
+        print("\nBoilerplate tokens saved per request:")
+        for job_name, tokens in sorted(progress.tokens_saved.items()):
+            print(f"  {job_name}: ~{tokens}")
+        print(f"  total: ~{sum(progress.tokens_saved.values())}")
+    retry_stats = format_retry_stats()
+    if retry_stats:
+        print(f"\nRetries by extractor:\n{retry_stats}")
+
+    repair_stats = get_repair_stats()
+    if repair_stats.saved or repair_stats.failed:
+        kinds = ", ".join(
+            f"{kind} {count}" for kind, count in repair_stats.by_kind.most_common())
+        print(
+            f"\nJSON repair saved {repair_stats.saved} re-asks ({kinds}), "
+            f"{repair_stats.failed} outputs still needed one")
+
+    print_metrics_summary()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,231 @@
+import asyncio
+import json
+from typing import Any
+
+from pydantic import RootModel
+
+from flows.job_extractor.simple_extract_properties import (
+    create_extract_properties_workflow,
+    get_extract_properties_system_prompt,
+    validate_extract_properties_output,
+)
+from flows.simple_extractor import ExtractionResult, SimpleExtractorWorkflow
+from logger import get_logger
+from settings import settings
+from utils.cache import get_cached_results, save_cached_result
+from utils.json_repair import repairable
+from utils.rate_limiter import estimate_tokens
+from utils.validation import ValidationError, invalid_output, parse_json_output
+
+log = get_logger(__name__)
+
+
+# Framing around the single-chunk system prompt, so batched results saved
+# under the single-chunk cache key come from the same instructions
+BATCHED_EXTRACT_PROPERTIES_SYSTEM_PROMPT = """
+{prompt}
+
+You are given several CV chunks, each wrapped in <chunk id="..."> and </chunk>. Extract the properties of every chunk separately, as above.
+
+Output one JSON object with each chunk's properties under its chunk id, in this exact format:
+
+{{"chunk id": {{"key": "string"}}}}
+"""
+
+BATCHED_EXTRACT_PROPERTIES_PROMPT = """
+{chunks}
+"""
+
+BATCHED_CHUNK_TEMPLATE = '<chunk id="{chunk_id}">{text}</chunk>'
+
+# Expected shape of the batched extraction: {"chunk id": {"key": "value"}}
+BatchedPropertiesOutput = RootModel[dict[str, dict[str, str]]]
+
+
+def get_batched_extract_properties_system_prompt() -> str:
+    return BATCHED_EXTRACT_PROPERTIES_SYSTEM_PROMPT.format(
+        prompt=get_extract_properties_system_prompt().strip()
+    )
+
+
+def get_batched_extract_properties_prompt(chunks: str) -> str:
+    return BATCHED_EXTRACT_PROPERTIES_PROMPT.format(chunks=chunks)
+
+
+def format_batched_chunks(chunks: dict[str, str]) -> str:
+    """Wrap each chunk in an id-tagged block."""
+    return "\n".join(
+        BATCHED_CHUNK_TEMPLATE.format(chunk_id=chunk_id, text=text)
+        for chunk_id, text in chunks.items()
+    )
+
+
+@repairable
+def validate_batched_output(output: str) -> dict[str, Any]:
+    """Parse the batched LLM output; each chunk is validated separately."""
+    parsed = parse_json_output(output)
+    if not isinstance(parsed, dict):
+        raise invalid_output("Output is not a dictionary")
+    return parsed
+
+
+def create_batched_extract_properties_workflow() -> SimpleExtractorWorkflow:
+    """Factory function to create an extractor for several CV chunks at once."""
+    return SimpleExtractorWorkflow(
+        system_prompt_func=get_batched_extract_properties_system_prompt,
+        user_prompt_func=get_batched_extract_properties_prompt,
+        validator_func=validate_batched_output,
+        fallback_result={},
+        result_key="batched_properties",
+        use_cache=False,
+        output_schema=BatchedPropertiesOutput.model_json_schema(),
+    )
+
+
+class BatchedPropertiesExtractor:
+    """Extract CV properties for several chunks per LLM request.
+
+    Chunks are packed into requests up to a token budget, so the system prompt
+    and request latency are paid once per batch instead of once per chunk.
+    Each chunk's output is checked with validate_extract_properties_output and
+    saved under the single-chunk extractor's cache key. Chunks that fail are
+    retried once in two smaller batches, then one by one with the
+    single-chunk workflow, so a batch costs at most 3 + N requests.
+    """
+
+    def __init__(
+        self,
+        token_budget: int | None = None,
+        max_concurrency: int | None = None,
+    ):
+        self.token_budget = (
+            settings.cv_extraction_batch_tokens if token_budget is None else token_budget
+        )
+        self.max_concurrency = max_concurrency or settings.cv_extraction_concurrency
+
+    def _pack(self, chunk_ids: list[str], chunks: dict[str, str]) -> list[list[str]]:
+        """Group chunk ids into batches that fit the token budget."""
+        batches: list[list[str]] = []
+        batch: list[str] = []
+        batch_tokens = 0
+        for chunk_id in chunk_ids:
+            tokens = estimate_tokens(chunks[chunk_id])
+            if batch and batch_tokens + tokens > self.token_budget:
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(chunk_id)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    async def _extract_chunk(
+        self,
+        chunk_id: str,
+        chunks: dict[str, str],
+        single_workflow: SimpleExtractorWorkflow,
+        cache_keys: dict[str, str],
+    ) -> dict[str, ExtractionResult]:
+        try:
+            result = await single_workflow.run_extraction(
+                chunks[chunk_id], cache_key=cache_keys[chunk_id]
+            )
+        except Exception as e:
+            # One failed chunk falls back instead of failing the batch
+            log.error(f"Failed to extract properties for chunk {chunk_id}: {e}")
+            result = ExtractionResult(
+                json.dumps(single_workflow.fallback_result), fallback=True
+            )
+        return {chunk_id: result}
+
+    async def _extract_batch(
+        self,
+        batch: list[str],
+        chunks: dict[str, str],
+        single_workflow: SimpleExtractorWorkflow,
+        cache_keys: dict[str, str],
+        split: bool = True,
+    ) -> dict[str, ExtractionResult]:
+        if len(batch) == 1:
+            return await self._extract_chunk(batch[0], chunks, single_workflow, cache_keys)
+
+        # Short positional ids keep the markers cheap; map them back afterwards
+        local_ids = {str(position): chunk_id for position, chunk_id in enumerate(batch, 1)}
+        workflow = create_batched_extract_properties_workflow()
+        try:
+            batched_output = json.loads(
+                await workflow.run(job_description=format_batched_chunks(
+                    {local_id: chunks[chunk_id] for local_id, chunk_id in local_ids.items()}
+                ))
+            )
+        except Exception as e:
+            log.error(f"Batched extraction of {len(batch)} chunks failed: {e}")
+            batched_output = {}
+
+        results = {}
+        failed = []
+        for local_id, chunk_id in local_ids.items():
+            section = batched_output.get(local_id)
+            try:
+                if not isinstance(section, dict):
+                    raise invalid_output(f"Chunk {local_id} is missing from the output")
+                validated_output = validate_extract_properties_output(json.dumps(section))
+            except ValidationError as e:
+                log.warning(f"Batched chunk {chunk_id} failed validation: {e}")
+                failed.append(chunk_id)
+                continue
+
+            result = json.dumps(validated_output)
+            save_cached_result(
+                cache_keys[chunk_id], result, llm_model=single_workflow.llm_model
+            )
+            results[chunk_id] = ExtractionResult(result)
+
+        if failed:
+            log.info(f"Re-requesting {len(failed)} of {len(batch)} batched chunks")
+            if split:
+                # Split once; chunks failing again are requested one by one
+                middle = (len(failed) + 1) // 2
+                halves = [half for half in (failed[:middle], failed[middle:]) if half]
+                retries = (
+                    self._extract_batch(half, chunks, single_workflow, cache_keys, split=False)
+                    for half in halves
+                )
+            else:
+                retries = (
+                    self._extract_chunk(chunk_id, chunks, single_workflow, cache_keys)
+                    for chunk_id in failed
+                )
+            for retried_results in await asyncio.gather(*retries):
+                results.update(retried_results)
+
+        return results
+
+    async def run(self, chunks: dict[str, str]) -> dict[str, ExtractionResult]:
+        """Extract every chunk and return its properties JSON by chunk id."""
+        single_workflow = create_extract_properties_workflow()
+        cache_keys = {
+            chunk_id: single_workflow.cache_key(text) for chunk_id, text in chunks.items()
+        }
+
+        cached = get_cached_results(cache_keys.values())
+        results = {
+            chunk_id: ExtractionResult(cached[cache_key])
+            for chunk_id, cache_key in cache_keys.items()
+            if cache_key in cached
+        }
+        missing = [chunk_id for chunk_id in chunks if chunk_id not in results]
+        if not missing:
+            return results
+
+        batches = self._pack(missing, chunks)
+        log.info(f"Extracting {len(missing)} chunks in {len(batches)} batched requests")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def extract(batch: list[str]) -> dict[str, ExtractionResult]:
+            async with semaphore:
+                return await self._extract_batch(batch, chunks, single_workflow, cache_keys)
+
+        for batch_results in await asyncio.gather(*(extract(batch) for batch in batches)):
+            results.update(batch_results)
+        return results
@@ -1,17 +1,11 @@
+import hashlib
 import json
-from typing import Any
 
-from flows.simple_extractor import SimpleExtractorWorkflow
-
-
-class ValidationError(Exception):
-    """Custom validation error with separate Python and LLM messages."""
-
-    def __init__(self, python_message: str, llm_guidance: str):
-        self.python_message = python_message
-        self.llm_guidance = llm_guidance
-        super().__init__(python_message)
+from pydantic import RootModel
 
+from flows.simple_extractor import SimpleExtractorWorkflow
+from utils.json_repair import note_repair, repairable
+from utils.validation import ValidationError
 
 EXTRACT_PROPERTIES_SYSTEM_PROMPT = """
 You are a partial CV content extractor with the goal to create exact key value pairs.
@@ -32,6 +26,24 @@ EXTRACT_PROPERTIES_PROMPT = """
 """
 
 
+# Bump when the validator changes so cached results are re-extracted
+EXTRACT_PROPERTIES_VALIDATOR_VERSION = "2"
+
+
+# Expected shape of the properties extraction: {"key": "value"}
+ExtractPropertiesOutput = RootModel[dict[str, str]]
+
+
+def get_extract_properties_version() -> str:
+    """Identify the prompts and validator used for property extraction."""
+    payload = "\0".join([
+        EXTRACT_PROPERTIES_SYSTEM_PROMPT,
+        EXTRACT_PROPERTIES_PROMPT,
+        EXTRACT_PROPERTIES_VALIDATOR_VERSION,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
 def get_extract_properties_system_prompt() -> str:
     return EXTRACT_PROPERTIES_SYSTEM_PROMPT
 
@@ -41,6 +53,7 @@ def get_extract_properties_prompt(chunk: str, validation_errors: str = "") -> st
     return EXTRACT_PROPERTIES_PROMPT.format(chunk=chunk, validation_errors=errors_section)
 
 
+@repairable
 def validate_extract_properties_output(output: str) -> dict[str, str]:
     """Validate and parse the LLM output for extract properties."""
     errors = []
@@ -68,7 +81,13 @@ def validate_extract_properties_output(output: str) -> dict[str, str]:
 
                     continue
 
-                if isinstance(value, (dict, list)):
+                # A list of plain values still summarizes the field
+                if isinstance(value, list) and not any(
+                        isinstance(item, dict | list) for item in value):
+                    note_repair("list_to_string")
+                    value = ", ".join(str(item) for item in value)
+
+                if isinstance(value, dict | list):
                     errors.append(
                         f"Value for key '{key}' is a complex object. Only simple string values are allowed, no nested objects or arrays.")
 
@@ -96,5 +115,7 @@ def create_extract_properties_workflow():
         user_prompt_func=get_extract_properties_prompt,
         validator_func=validate_extract_properties_output,
         fallback_result={},
+        validator_version=EXTRACT_PROPERTIES_VALIDATOR_VERSION,
+        output_schema=ExtractPropertiesOutput.model_json_schema(),
         result_key="properties"
     )
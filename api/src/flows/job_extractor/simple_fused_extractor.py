@@ -0,0 +1,228 @@
+import asyncio
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+from pydantic import BaseModel
+
+from flows.job_extractor.simple_heavy_constraints_extractor import (
+    HeavyConstraintsOutput,
+    create_heavy_constraints_extractor,
+    get_heavy_constraints_extraction_system_prompt,
+)
+from flows.job_extractor.simple_roles_extractor import (
+    RolesOutput,
+    create_roles_extractor,
+    get_roles_extraction_system_prompt,
+)
+from flows.job_extractor.simple_tools_tech_extractor import (
+    ToolsTechOutput,
+    create_tools_tech_extractor,
+    get_tools_tech_extraction_system_prompt,
+)
+from flows.simple_extractor import ExtractionResult, SimpleExtractorWorkflow
+from logger import get_logger
+from settings import settings
+from utils.cache import get_cached_results, save_cached_result
+from utils.json_repair import repairable
+from utils.validation import ValidationError, invalid_output, parse_json_output
+
+log = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class FusedSection:
+    """One extractor folded into the fused request."""
+
+    factory: Callable[[], SimpleExtractorWorkflow]
+    system_prompt_func: Callable[[], str]
+    output_model: type[BaseModel]
+    fields: tuple[str, ...]
+
+
+FUSED_SECTIONS: dict[str, FusedSection] = {
+    "RolesExtractorWorkflow": FusedSection(
+        factory=create_roles_extractor,
+        system_prompt_func=get_roles_extraction_system_prompt,
+        output_model=RolesOutput,
+        fields=("main_role", "related_roles"),
+    ),
+    "ToolsTechExtractorWorkflow": FusedSection(
+        factory=create_tools_tech_extractor,
+        system_prompt_func=get_tools_tech_extraction_system_prompt,
+        output_model=ToolsTechOutput,
+        fields=("tools", "tech"),
+    ),
+    "HeavyConstraintsExtractorWorkflow": FusedSection(
+        factory=create_heavy_constraints_extractor,
+        system_prompt_func=get_heavy_constraints_extraction_system_prompt,
+        output_model=HeavyConstraintsOutput,
+        fields=("heavy_constraints",),
+    ),
+}
+
+FUSED_EXTRACTOR_SYSTEM_PROMPT = """
+Complete each of the following tasks on the same job description.
+
+{tasks}
+
+Return only one valid JSON object with the fields of every task: {fields}
+"""
+
+FUSED_EXTRACTOR_TASK = """Task {number}:
+{prompt}"""
+
+FUSED_EXTRACTOR_PROMPT = """
+{job_description}
+"""
+
+
+def get_fused_extraction_system_prompt(section_names: list[str]) -> str:
+    """Join the system prompts of the fused extractors.
+
+    Each task is the extractor's own system prompt, so results saved under
+    the extractor's cache key come from the same instructions.
+    """
+    sections = [FUSED_SECTIONS[name] for name in section_names]
+    tasks = [
+        FUSED_EXTRACTOR_TASK.format(number=number, prompt=section.system_prompt_func().strip())
+        for number, section in enumerate(sections, 1)
+    ]
+    return FUSED_EXTRACTOR_SYSTEM_PROMPT.format(
+        tasks="\n\n".join(tasks),
+        fields=", ".join(field for section in sections for field in section.fields),
+    )
+
+
+def get_fused_output_schema(section_names: list[str]) -> dict[str, Any]:
+    """JSON schema of the fused output, merged from each section's schema."""
+    properties: dict[str, Any] = {}
+    required: list[str] = []
+    for name in section_names:
+        schema = FUSED_SECTIONS[name].output_model.model_json_schema()
+        properties.update(schema["properties"])
+        required.extend(schema.get("required", []))
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def get_fused_extraction_prompt(job_description: str) -> str:
+    return FUSED_EXTRACTOR_PROMPT.format(job_description=job_description)
+
+
+@repairable
+def validate_fused_output(output: str) -> dict[str, Any]:
+    """Parse the fused LLM output; each section is validated separately."""
+    parsed = parse_json_output(output)
+    if not isinstance(parsed, dict):
+        raise invalid_output("Output is not a dictionary")
+    return parsed
+
+
+def create_fused_extractor(
+    section_names: list[str], llm_model: str | None = None
+) -> SimpleExtractorWorkflow:
+    """Factory function to create a single-call extractor for several sections."""
+    return SimpleExtractorWorkflow(
+        system_prompt_func=partial(get_fused_extraction_system_prompt, section_names),
+        user_prompt_func=get_fused_extraction_prompt,
+        validator_func=validate_fused_output,
+        fallback_result={},
+        result_key="fused",
+        llm_model=llm_model,
+        use_cache=False,
+        output_schema=get_fused_output_schema(section_names),
+    )
+
+
+class FusedJobExtractor:
+    """Extract roles, tools/tech and heavy constraints with one LLM request.
+
+    Each section of the fused response is checked with its own extractor's
+    validator and saved under that extractor's cache key, so results are
+    interchangeable with the separate workflows. Sections that fail validation
+    are re-requested through their own workflow.
+    """
+
+    def __init__(
+        self, section_names: list[str] | None = None, llm_model: str | None = None
+    ):
+        self.section_names = section_names or list(FUSED_SECTIONS)
+        # Model of the fused request; re-requested sections use their own
+        self.llm_model = llm_model or settings.llm_model
+
+    async def run(
+        self, job_description: str, cache_keys: dict[str, str] | None = None
+    ) -> dict[str, str]:
+        """Extract every section and return the result JSON by workflow name.
+
+        Args:
+            job_description: Job description sent to the LLM
+            cache_keys: Cache key of each section, computed from the job
+                description by default
+        """
+        results = await self.run_extractions(job_description, cache_keys)
+        return {name: extraction.result for name, extraction in results.items()}
+
+    async def run_extractions(
+        self, job_description: str, cache_keys: dict[str, str] | None = None
+    ) -> dict[str, ExtractionResult]:
+        """Like run(), but also report which sections returned their fallback."""
+        workflows = {
+            name: FUSED_SECTIONS[name].factory() for name in self.section_names
+        }
+        # Callers passing keys have counted their own lookups
+        count_lookups = not cache_keys
+        cache_keys = {
+            name: (cache_keys or {}).get(name) or workflow.cache_key(job_description)
+            for name, workflow in workflows.items()
+        }
+
+        cached = get_cached_results(cache_keys.values(), count=count_lookups)
+        results = {
+            name: ExtractionResult(cached[cache_key])
+            for name, cache_key in cache_keys.items()
+            if cache_key in cached
+        }
+        missing = [name for name in self.section_names if name not in results]
+        if not missing:
+            return results
+
+        fused_workflow = create_fused_extractor(missing, llm_model=self.llm_model)
+        fused_output = json.loads(
+            await fused_workflow.run(job_description=job_description)
+        )
+
+        failed = []
+        for name in missing:
+            workflow = workflows[name]
+            section = {
+                field: fused_output[field]
+                for field in FUSED_SECTIONS[name].fields
+                if field in fused_output
+            }
+            try:
+                validated_output = workflow.validator_func(json.dumps(section))
+            except ValidationError as e:
+                log.warning(f"Fused section {name} failed validation: {e}")
+                failed.append(name)
+                continue
+
+            result = json.dumps(validated_output)
+            save_cached_result(cache_keys[name], result, llm_model=workflow.llm_model)
+            results[name] = ExtractionResult(result)
+
+        if failed:
+            log.info(f"Re-requesting {len(failed)} failed sections: {failed}")
+            retried = await asyncio.gather(
+                *(
+                    workflows[name].run_extraction(
+                        job_description, cache_key=cache_keys[name]
+                    )
+                    for name in failed
+                )
+            )
+            results.update(zip(failed, retried, strict=True))
+
+        return results
@@ -1,7 +1,10 @@
-import json
 from typing import Any
 
+from pydantic import BaseModel
+
 from flows.simple_extractor import SimpleExtractorWorkflow
+from utils.json_repair import repairable
+from utils.validation import invalid_output, parse_json_output
 
 
 HEAVY_CONSTRAINTS_EXTRACTOR_SYSTEM_PROMPT = """
@@ -28,6 +31,16 @@ HEAVY_CONSTRAINTS_EXTRACTOR_PROMPT = """
 """
 
 
+# Bump when the validator changes so cached results are re-extracted
+HEAVY_CONSTRAINTS_VALIDATOR_VERSION = "2"
+
+
+class HeavyConstraintsOutput(BaseModel):
+    """Expected shape of the heavy constraints extraction."""
+
+    heavy_constraints: list[str]
+
+
 def get_heavy_constraints_extraction_system_prompt() -> str:
     return HEAVY_CONSTRAINTS_EXTRACTOR_SYSTEM_PROMPT
 
@@ -36,35 +49,30 @@ def get_heavy_constraints_extraction_prompt(job_description: str) -> str:
     return HEAVY_CONSTRAINTS_EXTRACTOR_PROMPT.format(job_description=job_description)
 
 
+@repairable
 def validate_heavy_constraints_output(output: str) -> dict[str, Any]:
     """Validate and parse the LLM output for heavy constraints extraction."""
-    try:
-        parsed = json.loads(output)
-        if not isinstance(parsed, dict):
-            raise ValueError("Output is not a dictionary")
-
-        if "heavy_constraints" not in parsed:
-            raise ValueError("Missing required fields: heavy_constraints")
+    parsed = parse_json_output(output)
+    if not isinstance(parsed, dict):
+        raise invalid_output("Output is not a dictionary")
 
-        if not isinstance(parsed["heavy_constraints"], list):
-            raise ValueError("heavy_constraints must be a list")
+    if "heavy_constraints" not in parsed:
+        raise invalid_output("Missing required fields: heavy_constraints")
 
-        # Remove duplicates from heavy_constraints while preserving order
-        seen = set()
-        unique_heavy_constraints = []
-        for heavy_constraint in parsed["heavy_constraints"]:
-            if isinstance(heavy_constraint, str) and heavy_constraint not in seen:
-                seen.add(heavy_constraint)
-                unique_heavy_constraints.append(heavy_constraint)
+    if not isinstance(parsed["heavy_constraints"], list):
+        raise invalid_output("heavy_constraints must be a list")
 
-        parsed["heavy_constraints"] = unique_heavy_constraints
+    # Remove duplicates from heavy_constraints while preserving order
+    seen = set()
+    unique_heavy_constraints = []
+    for heavy_constraint in parsed["heavy_constraints"]:
+        if isinstance(heavy_constraint, str) and heavy_constraint not in seen:
+            seen.add(heavy_constraint)
+            unique_heavy_constraints.append(heavy_constraint)
 
-        return parsed
+    parsed["heavy_constraints"] = unique_heavy_constraints
 
-    except json.JSONDecodeError:
-        raise ValueError("Invalid JSON format")
-    except Exception as e:
-        raise ValueError(f"Validation error: {str(e)}")
+    return parsed
 
 
 def create_heavy_constraints_extractor():
@@ -74,5 +82,7 @@ def create_heavy_constraints_extractor():
         user_prompt_func=get_heavy_constraints_extraction_prompt,
         validator_func=validate_heavy_constraints_output,
         fallback_result={"heavy_constraints": []},
+        validator_version=HEAVY_CONSTRAINTS_VALIDATOR_VERSION,
+        output_schema=HeavyConstraintsOutput.model_json_schema(),
         result_key="heavy_constraints"
     )
\ No newline at end of file
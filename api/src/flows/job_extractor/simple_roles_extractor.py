@@ -1,7 +1,10 @@
-import json
 from typing import Any
 
+from pydantic import BaseModel
+
 from flows.simple_extractor import SimpleExtractorWorkflow
+from utils.json_repair import repairable
+from utils.validation import invalid_output, parse_json_output
 
 
 ROLES_EXTRACTOR_SYSTEM_PROMPT = """
@@ -23,6 +26,17 @@ ROLES_EXTRACTOR_PROMPT = """
 """
 
 
+# Bump when the validator changes so cached results are re-extracted
+ROLES_VALIDATOR_VERSION = "2"
+
+
+class RolesOutput(BaseModel):
+    """Expected shape of the roles extraction."""
+
+    main_role: str
+    related_roles: list[str]
+
+
 def get_roles_extraction_system_prompt() -> str:
     return ROLES_EXTRACTOR_SYSTEM_PROMPT
 
@@ -31,37 +45,32 @@ def get_roles_extraction_prompt(job_description: str) -> str:
     return ROLES_EXTRACTOR_PROMPT.format(job_description=job_description)
 
 
+@repairable
 def validate_roles_output(output: str) -> dict[str, Any]:
     """Validate and parse the LLM output for roles extraction."""
-    try:
-        parsed = json.loads(output)
-        if not isinstance(parsed, dict):
-            raise ValueError("Output is not a dictionary")
-
-        if "main_role" not in parsed or "related_roles" not in parsed:
-            raise ValueError("Missing required fields: main_role or related_roles")
+    parsed = parse_json_output(output)
+    if not isinstance(parsed, dict):
+        raise invalid_output("Output is not a dictionary")
 
-        if not isinstance(parsed["main_role"], str):
-            raise ValueError("main_role must be a string")
+    if "main_role" not in parsed or "related_roles" not in parsed:
+        raise invalid_output("Missing required fields: main_role or related_roles")
 
-        if not isinstance(parsed["related_roles"], list):
-            raise ValueError("related_roles must be a list")
+    if not isinstance(parsed["main_role"], str):
+        raise invalid_output("main_role must be a string")
 
-        # Remove duplicates from related_roles while preserving order
-        seen = set()
-        unique_roles = []
-        for role in parsed["related_roles"]:
-            if isinstance(role, str) and role not in seen:
-                seen.add(role)
-                unique_roles.append(role)
+    if not isinstance(parsed["related_roles"], list):
+        raise invalid_output("related_roles must be a list")
 
-        parsed["related_roles"] = unique_roles
-        return parsed
+    # Remove duplicates from related_roles while preserving order
+    seen = set()
+    unique_roles = []
+    for role in parsed["related_roles"]:
+        if isinstance(role, str) and role not in seen:
+            seen.add(role)
+            unique_roles.append(role)
 
-    except json.JSONDecodeError:
-        raise ValueError("Invalid JSON format")
-    except Exception as e:
-        raise ValueError(f"Validation error: {str(e)}")
+    parsed["related_roles"] = unique_roles
+    return parsed
 
 
 def create_roles_extractor():
@@ -71,5 +80,7 @@ def create_roles_extractor():
         user_prompt_func=get_roles_extraction_prompt,
         validator_func=validate_roles_output,
         fallback_result={"main_role": "Unknown", "related_roles": []},
+        validator_version=ROLES_VALIDATOR_VERSION,
+        output_schema=RolesOutput.model_json_schema(),
         result_key="roles"
     )
\ No newline at end of file
@@ -1,7 +1,10 @@
-import json
 from typing import Any
 
+from pydantic import BaseModel
+
 from flows.simple_extractor import SimpleExtractorWorkflow
+from utils.json_repair import repairable
+from utils.validation import invalid_output, parse_json_output
 
 
 TOOLS_TECH_EXTRACTOR_SYSTEM_PROMPT = """
@@ -23,6 +26,17 @@ TOOLS_TECH_EXTRACTOR_PROMPT = """
 """
 
 
+# Bump when the validator changes so cached results are re-extracted
+TOOLS_TECH_VALIDATOR_VERSION = "2"
+
+
+class ToolsTechOutput(BaseModel):
+    """Expected shape of the tools and tech extraction."""
+
+    tools: list[str]
+    tech: list[str]
+
+
 def get_tools_tech_extraction_system_prompt() -> str:
     return TOOLS_TECH_EXTRACTOR_SYSTEM_PROMPT
 
@@ -31,47 +45,42 @@ def get_tools_tech_extraction_prompt(job_description: str) -> str:
     return TOOLS_TECH_EXTRACTOR_PROMPT.format(job_description=job_description)
 
 
+@repairable
 def validate_tools_tech_output(output: str) -> dict[str, Any]:
     """Validate and parse the LLM output for tools and tech extraction."""
-    try:
-        parsed = json.loads(output)
-        if not isinstance(parsed, dict):
-            raise ValueError("Output is not a dictionary")
-
-        if "tools" not in parsed or "tech" not in parsed:
-            raise ValueError("Missing required fields: tools or tech")
+    parsed = parse_json_output(output)
+    if not isinstance(parsed, dict):
+        raise invalid_output("Output is not a dictionary")
 
-        if not isinstance(parsed["tools"], list):
-            raise ValueError("tools must be a list")
+    if "tools" not in parsed or "tech" not in parsed:
+        raise invalid_output("Missing required fields: tools or tech")
 
-        if not isinstance(parsed["tech"], list):
-            raise ValueError("tech must be a list")
+    if not isinstance(parsed["tools"], list):
+        raise invalid_output("tools must be a list")
 
-        # Remove duplicates from tools while preserving order
-        seen = set()
-        unique_tools = []
-        for tool in parsed["tools"]:
-            if isinstance(tool, str) and tool not in seen:
-                seen.add(tool)
-                unique_tools.append(tool)
+    if not isinstance(parsed["tech"], list):
+        raise invalid_output("tech must be a list")
 
-        parsed["tools"] = unique_tools
+    # Remove duplicates from tools while preserving order
+    seen = set()
+    unique_tools = []
+    for tool in parsed["tools"]:
+        if isinstance(tool, str) and tool not in seen:
+            seen.add(tool)
+            unique_tools.append(tool)
 
-        # Remove duplicates from tech while preserving order
-        seen = set()
-        unique_tech = []
-        for tech in parsed["tech"]:
-            if isinstance(tech, str) and tech not in seen:
-                seen.add(tech)
-                unique_tech.append(tech)
+    parsed["tools"] = unique_tools
 
-        parsed["tech"] = unique_tech
-        return parsed
+    # Remove duplicates from tech while preserving order
+    seen = set()
+    unique_tech = []
+    for tech in parsed["tech"]:
+        if isinstance(tech, str) and tech not in seen:
+            seen.add(tech)
+            unique_tech.append(tech)
 
-    except json.JSONDecodeError:
-        raise ValueError("Invalid JSON format")
-    except Exception as e:
-        raise ValueError(f"Validation error: {str(e)}")
+    parsed["tech"] = unique_tech
+    return parsed
 
 
 def create_tools_tech_extractor():
@@ -81,5 +90,7 @@ def create_tools_tech_extractor():
         user_prompt_func=get_tools_tech_extraction_prompt,
         validator_func=validate_tools_tech_output,
         fallback_result={"tools": [], "tech": []},
+        validator_version=TOOLS_TECH_VALIDATOR_VERSION,
+        output_schema=ToolsTechOutput.model_json_schema(),
         result_key="tools_tech"
     )
\ No newline at end of file
@@ -1,24 +1,62 @@
-import json
-from typing import Callable, Any, Optional
+import asyncio
 import inspect
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
 
-from llama_index.core.llms import ChatMessage
+import openai
+from llama_index.core.llms import LLM, ChatMessage
 from llama_index.core.workflow import (
+    Context,
+    Event,
     StartEvent,
     StopEvent,
     Workflow,
     step,
-    Event,
 )
-from llama_index.llms.groq import Groq
 
 from logger import get_logger
 from settings import settings
-from utils.retry import async_retry
-from utils.text_cleaner import normalize_text, remove_all_emojis
+from utils.cache import compute_extraction_key, get_cached_result, save_cached_result
+from utils.llm_clients import get_llm
+from utils.metrics import get_metrics
+from utils.rate_limiter import estimate_request_tokens, get_rate_limiter
+from utils.retry import run_with_retries
+from utils.single_flight import SingleFlight
+from utils.text_cleaner import clean_text
+from utils.validation import invalid_output
 
 log = get_logger(__name__)
 
+# Shared by every extractor so concurrent identical extractions make one call
+_in_flight = SingleFlight(name="extraction")
+
+# Context store key telling run_extraction whether the run fell back
+FALLBACK_STATE_KEY = "fallback"
+
+# Models whose provider rejected response_format; every extractor of the
+# process sends them plain requests
+_structured_output_unsupported: set[str] = set()
+
+
+def _rejects_response_format(error: openai.BadRequestError) -> bool:
+    """Whether a 400 means the model doesn't support response_format at all.
+
+    Groq also answers 400 json_validate_failed when one JSON-mode generation
+    is invalid; that is a bad output, not an unsupported feature.
+    """
+    if error.code == "json_validate_failed":
+        return False
+    return error.param == "response_format" or "response_format" in str(error.message)
+
+
+@dataclass(frozen=True)
+class ExtractionResult:
+    """Result JSON of an extraction and whether it is the fallback result."""
+
+    result: str
+    fallback: bool = False
+
 
 class SimpleExtractorEvent(Event):
     result: str
@@ -32,23 +70,86 @@ class SimpleExtractorWorkflow(Workflow):
         validator_func: Callable[[str], dict],
         fallback_result: dict,
         result_key: str,
-        llm_model: str = "openai/gpt-oss-120b"
+        llm_model: str | None = None,
+        llm: LLM | None = None,
+        request_timeout: float = 60,
+        workflow_timeout: float | None = None,
+        validator_version: str = "1",
+        use_cache: bool = True,
+        output_schema: dict | None = None,
+        structured_output: str | None = None,
     ):
-        super().__init__()
+        # Each LLM request is bounded by request_timeout, so the workflow itself
+        # doesn't need the default 10s timeout that retries would exceed.
+        super().__init__(timeout=workflow_timeout)
         self.system_prompt_func = system_prompt_func
         self.user_prompt_func = user_prompt_func
         self.validator_func = validator_func
         self.fallback_result = fallback_result
         self.result_key = result_key
-        self.llm = Groq(model=llm_model, api_key=settings.groq_api_key)
+        self.llm_model = llm_model or settings.llm_model
+        self.request_timeout = request_timeout
+        # Retries are handled by run_with_retries, not by the client
+        self.llm = llm or get_llm(self.llm_model, max_retries=0)
+        self.validator_version = validator_version
+        self.use_cache = use_cache
+        # JSON schema of the validated output, sent when structured output is on
+        self.output_schema = output_schema
+        self.structured_output = structured_output or settings.llm_structured_output
 
     def _clean_job_description(self, job_description: str) -> str:
         """Clean job description by removing emojis and normalizing text."""
-        cleaned = remove_all_emojis(job_description)
-        cleaned = normalize_text(cleaned)
-        return cleaned
+        return clean_text(job_description)
+
+    def _cache_key(self, cleaned_description: str) -> str:
+        return compute_extraction_key(
+            text=cleaned_description,
+            system_prompt=self.system_prompt_func(),
+            user_prompt=self.user_prompt_func(""),
+            validator_version=self.validator_version,
+            llm_model=self.llm_model,
+        )
+
+    def cache_key(self, job_description: str) -> str:
+        """Content-addressed cache key for extracting this job description.
+
+        Args:
+            job_description: Raw job description
+        """
+        return self._cache_key(self._clean_job_description(job_description))
+
+    @property
+    def _structured_output_mode(self) -> str:
+        """Structured output mode, off for models known to reject it."""
+        if self.llm_model in _structured_output_unsupported:
+            return "off"
+        return self.structured_output
+
+    def _response_format(self) -> dict | None:
+        """Provider response_format for the structured output mode."""
+        mode = self._structured_output_mode
+        if mode == "json_schema" and self.output_schema:
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": self.result_key, "schema": self.output_schema},
+            }
+        if mode in ("json_object", "json_schema"):
+            return {"type": "json_object"}
+        return None
+
+    async def _achat(self, system_prompt: str, user_prompt: str, chat_kwargs: dict):
+        return await asyncio.wait_for(
+            self.llm.achat(
+                messages=[
+                    ChatMessage(role="system", content=system_prompt),
+                    ChatMessage(role="user", content=user_prompt),
+                ],
+                temperature=0,
+                **chat_kwargs,
+            ),
+            timeout=self.request_timeout,
+        )
 
-    @async_retry(max_retries=3, exceptions=Exception)
     async def _extract_data(self, job_description: str, validation_errors: str = "") -> dict:
         """Extract data using provided prompts and validator."""
         # Check if user_prompt_func accepts validation_errors parameter
@@ -58,54 +159,147 @@ class SimpleExtractorWorkflow(Workflow):
                 job_description, f"Follow these instructions:\n{validation_errors}")
         else:
             user_prompt = self.user_prompt_func(job_description)
+            if validation_errors:
+                user_prompt += f"\n\nFollow these instructions:\n{validation_errors}"
 
-        response = self.llm.chat(
-            messages=[
-                ChatMessage(
-                    role="system", content=self.system_prompt_func()
-                ),
-                ChatMessage(
-                    role="user", content=user_prompt
-                ),
-            ],
-            timeout=60,
-            temperature=0,
-        )
+        system_prompt = self.system_prompt_func()
+        metrics = get_metrics()
+
+        chat_kwargs = {}
+        response_format = self._response_format()
+        if response_format:
+            chat_kwargs["response_format"] = response_format
+
+        # Wait for rate limit budget before starting the request timeout
+        rate_limiter = get_rate_limiter(self.llm_model)
+        estimated_tokens = estimate_request_tokens(system_prompt, user_prompt)
+
+        # Use the async chat API so concurrent extractors don't block the event
+        # loop. wait_for cancels the in-flight request when the timeout expires,
+        # and the limiter then refunds its tokens.
+        async with rate_limiter.limit(estimated_tokens) as waited:
+            metrics.observe(
+                "extraction_stage_seconds", waited,
+                extractor=self.result_key, stage="rate_limit_wait")
+            with metrics.timer(
+                "extraction_stage_seconds", extractor=self.result_key, stage="llm"
+            ):
+                try:
+                    response = await self._achat(system_prompt, user_prompt, chat_kwargs)
+                except openai.BadRequestError as e:
+                    if not chat_kwargs:
+                        raise
+                    if not _rejects_response_format(e):
+                        if e.code == "json_validate_failed":
+                            # One invalid generation: re-ask like any bad output
+                            raise invalid_output(
+                                "The output was not valid JSON for the requested schema"
+                            ) from e
+                        raise
+                    # The provider doesn't support response_format for this
+                    # model; validation still checks the plain output
+                    log.warning(
+                        f"{self.llm_model} rejected {self.structured_output} structured "
+                        f"output, turning it off for this model: {e}")
+                    _structured_output_unsupported.add(self.llm_model)
+                    response = await self._achat(system_prompt, user_prompt, {})
+        rate_limiter.record_usage(estimated_tokens, response)
+        metrics.record_tokens(self.result_key, response)
 
         log.debug(f"Raw LLM response: {response}")
 
-        # Validate and parse the output
-        validated_output = self.validator_func(str(response.message.content))
+        # Validate and parse the output; with structured output this is a
+        # safety net that should rarely fail
+        with metrics.timer(
+            "extraction_stage_seconds", extractor=self.result_key, stage="validation"
+        ):
+            validated_output = self.validator_func(str(response.message.content))
         log.info(
             f"Successfully extracted and validated data: {validated_output}")
         return validated_output
 
+    async def run_extraction(
+        self, job_description: str, cache_key: str | None = None
+    ) -> ExtractionResult:
+        """Run the workflow and report whether it returned the fallback result.
+
+        A valid extraction can equal the fallback (e.g. no heavy constraints),
+        so callers that must tell them apart use this instead of run().
+        """
+        handler = self.run(job_description=job_description, cache_key=cache_key)
+        result = await handler
+        fallback = await handler.ctx.store.get(FALLBACK_STATE_KEY, default=False)
+        return ExtractionResult(result, fallback=fallback)
+
     @step
-    async def extract(self, ev: StartEvent) -> SimpleExtractorEvent:
+    async def extract(self, ctx: Context, ev: StartEvent) -> SimpleExtractorEvent:
         job_description = ev.job_description
 
         # Clean the job description
-        cleaned_description = self._clean_job_description(job_description)
+        metrics = get_metrics()
+        with metrics.timer("extraction_stage_seconds", extractor=self.result_key, stage="clean"):
+            cleaned_description = self._clean_job_description(job_description)
         log.debug(f"Cleaned job description: {cleaned_description[:50]}...")
 
-        validation_errors = ""
-        max_attempts = 3
+        # The content key covers the text, extractor prompts, validator and model.
+        # Callers that planned the extraction pass the key they have looked up
+        # already (or one of the original text), so the lookup isn't counted again.
+        content_key = self._cache_key(cleaned_description)
+        cache_key = (ev.get("cache_key") or content_key) if self.use_cache else None
+        if cache_key:
+            cached_result = get_cached_result(cache_key, count=not ev.get("cache_key"))
+            if cached_result is not None:
+                log.info(f"Cache hit for {self.result_key} ({cache_key[:12]})")
+                metrics.increment(
+                    "extraction_results_total", extractor=self.result_key, outcome="cached")
+                return SimpleExtractorEvent(result=cached_result)
+
+        # Only calls that would send the same request and save the result under
+        # the same key share a result
+        flight_key = (content_key, cache_key, id(self.llm), self._structured_output_mode)
+        extraction = await _in_flight.do(
+            flight_key, lambda: self._extract_uncached(cleaned_description, cache_key)
+        )
+        await ctx.store.set(FALLBACK_STATE_KEY, extraction.fallback)
+        return SimpleExtractorEvent(result=extraction.result)
 
-        for attempt in range(max_attempts):
-            try:
-                validated_output = await self._extract_data(cleaned_description, validation_errors)
+    async def _extract_uncached(
+        self, cleaned_description: str, cache_key: str | None
+    ) -> ExtractionResult:
+        """Extract with validation re-asks, returning the result JSON."""
+        metrics = get_metrics()
+        # A call for the same key may have finished since the caller's lookup
+        if cache_key:
+            cached_result = get_cached_result(cache_key, count=False)
+            if cached_result is not None:
+                metrics.increment(
+                    "extraction_results_total", extractor=self.result_key, outcome="cached")
+                return ExtractionResult(cached_result)
 
-                return SimpleExtractorEvent(result=json.dumps(validated_output))
-            except Exception as e:
-                if hasattr(e, 'llm_guidance') and attempt < max_attempts - 1:
-                    validation_errors = e.llm_guidance
-                    log.warning(
-                        f"Validation error on attempt {attempt + 1}: {e.python_message}")
-                    continue
-                else:
-                    log.error(
-                        f"Failed to extract data after {attempt + 1} attempts: {str(e)}")
-                    return SimpleExtractorEvent(result=json.dumps(self.fallback_result))
+        try:
+            # Transport errors back off, validation errors re-ask with guidance
+            with metrics.timer(
+                "extraction_stage_seconds", extractor=self.result_key, stage="extract"
+            ):
+                validated_output = await run_with_retries(
+                    lambda validation_errors: self._extract_data(
+                        cleaned_description, validation_errors),
+                    model=self.llm_model,
+                    name=self.result_key,
+                )
+        except Exception as e:
+            log.error(f"Failed to extract {self.result_key}: {str(e)}")
+            metrics.increment(
+                "extraction_results_total", extractor=self.result_key, outcome="fallback")
+            return ExtractionResult(json.dumps(self.fallback_result), fallback=True)
+
+        metrics.increment(
+            "extraction_results_total", extractor=self.result_key, outcome="extracted")
+
+        result = json.dumps(validated_output)
+        if cache_key:
+            save_cached_result(cache_key, result, llm_model=self.llm_model)
+        return ExtractionResult(result)
 
     @step
     async def return_data(self, ev: SimpleExtractorEvent) -> StopEvent:
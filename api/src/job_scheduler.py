@@ -0,0 +1,286 @@
+"""Concurrent scheduler for running extractor workflows over a job corpus."""
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from flows.job_extractor.simple_fused_extractor import (
+    FUSED_SECTIONS,
+    FusedJobExtractor,
+)
+from flows.job_extractor.simple_heavy_constraints_extractor import (
+    create_heavy_constraints_extractor,
+)
+from flows.job_extractor.simple_roles_extractor import create_roles_extractor
+from flows.job_extractor.simple_tools_tech_extractor import create_tools_tech_extractor
+from flows.simple_extractor import ExtractionResult, SimpleExtractorWorkflow
+from logger import get_logger
+from settings import settings
+from utils.boilerplate import BoilerplateIndex
+from utils.cache import (
+    get_cached_results,
+    save_extraction_result,
+    save_extraction_results,
+)
+
+log = get_logger(__name__)
+
+WorkflowFactory = Callable[[], SimpleExtractorWorkflow]
+
+JOB_WORKFLOWS: dict[str, WorkflowFactory] = {
+    "RolesExtractorWorkflow": create_roles_extractor,
+    "ToolsTechExtractorWorkflow": create_tools_tech_extractor,
+    "HeavyConstraintsExtractorWorkflow": create_heavy_constraints_extractor,
+}
+
+
+@dataclass
+class JobTask:
+    """A single (job file, workflow) pair to extract."""
+
+    job_file: Path
+    workflow_name: str
+    workflow: SimpleExtractorWorkflow
+    cache_key: str | None = None
+
+    @property
+    def pairs(self) -> list["JobTask"]:
+        return [self]
+
+
+@dataclass
+class FusedJobTask:
+    """All fusable pairs of one job file, extracted with a single request."""
+
+    job_file: Path
+    tasks: list[JobTask]
+
+    @property
+    def pairs(self) -> list[JobTask]:
+        return self.tasks
+
+
+@dataclass
+class JobProgress:
+    """Progress counters for a scheduler run."""
+
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    # Estimated prompt tokens removed by boilerplate stripping, per posting
+    tokens_saved: dict[str, int] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> int:
+        return self.completed + self.failed
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started_at
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        eta = remaining / rate if rate > 0 else 0.0
+        percent = 100 * self.done / self.total if self.total else 100.0
+        return (
+            f"{self.done}/{self.total} ({percent:.1f}%) | "
+            f"{self.failed} failed | {self.skipped} cached | "
+            f"{rate:.2f} pairs/s | ETA {eta:.0f}s"
+        )
+
+
+class JobScheduler:
+    """Run extractor workflows over many job files with bounded parallelism.
+
+    Every finished pair is saved to the content-addressed extraction cache by
+    the workflow, and pairs whose content is already cached are skipped, so an
+    interrupted run resumes where it stopped. Fallback results are not cached
+    and are retried on the next run. Results are also written to the
+    job_results table of the extraction store.
+
+    In fused mode the roles, tools/tech and heavy constraints pairs of a job
+    are extracted with one LLM request (see FusedJobExtractor).
+
+    With strip_boilerplate, sentences repeated across the job files (see
+    BoilerplateIndex) are removed from every posting before extraction.
+    Results are keyed on the stripped text that is actually sent, so a posting
+    is re-extracted when a corpus change strips it differently, and postings
+    with nothing stripped share the results of unstripped runs.
+    """
+
+    def __init__(
+        self,
+        workflows: dict[str, WorkflowFactory] | None = None,
+        max_workers: int | None = None,
+        max_workers_per_model: int | None = None,
+        on_progress: Callable[[JobProgress], None] | None = None,
+        fused: bool = False,
+        strip_boilerplate: bool | None = None,
+    ):
+        self.workflows = workflows or JOB_WORKFLOWS
+        self.max_workers = max_workers or settings.scheduler_max_workers
+        self.max_workers_per_model = (
+            max_workers_per_model or settings.scheduler_max_workers_per_model
+        )
+        self.on_progress = on_progress
+        self.fused = fused
+        self.strip_boilerplate = (
+            settings.scheduler_strip_boilerplate
+            if strip_boilerplate is None
+            else strip_boilerplate
+        )
+        self._job_contents: dict[Path, str] = {}
+        self._model_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def plan(
+        self, job_files: list[Path], progress: JobProgress
+    ) -> list[JobTask | FusedJobTask]:
+        """Build the list of pairs that still need to run."""
+        raw_contents = {job_file: job_file.read_text() for job_file in job_files}
+        if self.strip_boilerplate:
+            self._strip_boilerplate(raw_contents, progress)
+
+        pending = []
+        for job_file in job_files:
+            job_content = self._job_contents.get(job_file, raw_contents[job_file])
+            for workflow_name, workflow_factory in self.workflows.items():
+                workflow = workflow_factory()
+                cache_key = workflow.cache_key(job_content)
+                pending.append(JobTask(job_file, workflow_name, workflow, cache_key))
+
+        # One query for the whole corpus instead of a lookup per pair
+        cached_results = get_cached_results(task.cache_key for task in pending)
+
+        tasks = []
+        cached_rows = []
+        for task in pending:
+            if task.cache_key in cached_results:
+                cached_rows.append(
+                    (task.job_file, task.workflow_name, cached_results[task.cache_key])
+                )
+            else:
+                tasks.append(task)
+
+        save_extraction_results(cached_rows)
+        progress.skipped = len(cached_rows)
+        progress.total = len(tasks)
+        return self._fuse(tasks) if self.fused else tasks
+
+    def _strip_boilerplate(
+        self, raw_contents: dict[Path, str], progress: JobProgress
+    ) -> None:
+        """Learn the corpus boilerplate and keep the stripped postings."""
+        index = BoilerplateIndex.from_documents(raw_contents.values())
+        for job_file, raw_content in raw_contents.items():
+            stripped = index.strip(raw_content)
+            self._job_contents[job_file] = stripped.text
+            progress.tokens_saved[job_file.name] = stripped.tokens_saved
+            log.info(
+                f"Stripped {stripped.removed_sentences} boilerplate sentences from "
+                f"{job_file.name}, saving ~{stripped.tokens_saved} tokens per request"
+            )
+
+    def _read_job(self, job_file: Path) -> str:
+        if job_file in self._job_contents:
+            return self._job_contents[job_file]
+        return job_file.read_text()
+
+    def _fuse(self, tasks: list[JobTask]) -> list[JobTask | FusedJobTask]:
+        """Group the fusable pairs of each job file into a single task."""
+        fused_tasks: dict[Path, FusedJobTask] = {}
+        other_tasks: list[JobTask | FusedJobTask] = []
+        for task in tasks:
+            if task.workflow_name in FUSED_SECTIONS:
+                fused_tasks.setdefault(
+                    task.job_file, FusedJobTask(task.job_file, [])
+                ).tasks.append(task)
+            else:
+                other_tasks.append(task)
+        return [*fused_tasks.values(), *other_tasks]
+
+    def _get_model_semaphore(self, model: str) -> asyncio.Semaphore:
+        if model not in self._model_semaphores:
+            self._model_semaphores[model] = asyncio.Semaphore(
+                self.max_workers_per_model
+            )
+        return self._model_semaphores[model]
+
+    def _save_result(self, task: JobTask, extraction: ExtractionResult) -> bool:
+        if extraction.fallback:
+            log.warning(
+                f"Fallback result for {task.job_file.name} - {task.workflow_name}, "
+                "will retry on next run"
+            )
+            return False
+
+        save_extraction_result(task.job_file, task.workflow_name, extraction.result)
+        return True
+
+    async def _run_task(self, task: JobTask | FusedJobTask) -> list[bool]:
+        """Run a task and return whether each of its pairs succeeded."""
+        job_content = self._read_job(task.job_file)
+
+        if isinstance(task, FusedJobTask):
+            extractor = FusedJobExtractor([pair.workflow_name for pair in task.tasks])
+            async with self._get_model_semaphore(extractor.llm_model):
+                results = await extractor.run_extractions(
+                    job_content,
+                    cache_keys={pair.workflow_name: pair.cache_key for pair in task.tasks},
+                )
+            return [
+                self._save_result(pair, results[pair.workflow_name])
+                for pair in task.tasks
+            ]
+
+        async with self._get_model_semaphore(task.workflow.llm_model):
+            result = await task.workflow.run_extraction(
+                job_content, cache_key=task.cache_key
+            )
+        return [self._save_result(task, result)]
+
+    async def _worker(self, queue: asyncio.Queue, progress: JobProgress) -> None:
+        while True:
+            try:
+                task = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                outcomes = await self._run_task(task)
+            except Exception as e:
+                workflow_names = ", ".join(pair.workflow_name for pair in task.pairs)
+                log.error(
+                    f"Failed to process {task.job_file.name} - {workflow_names}: {e}"
+                )
+                outcomes = [False] * len(task.pairs)
+
+            progress.completed += sum(outcomes)
+            progress.failed += len(outcomes) - sum(outcomes)
+
+            log.info(f"Progress: {progress.summary()}")
+            if self.on_progress:
+                self.on_progress(progress)
+
+    async def run(self, job_files: list[Path]) -> JobProgress:
+        """Process every (job file, workflow) pair that isn't cached yet."""
+        progress = JobProgress()
+        tasks = self.plan(job_files, progress)
+
+        log.info(
+            f"Scheduling {progress.total} pairs as {len(tasks)} tasks for "
+            f"{len(job_files)} job files "
+            f"({progress.skipped} already cached) with {self.max_workers} workers, "
+            f"{self.max_workers_per_model} per model"
+        )
+
+        queue: asyncio.Queue[JobTask | FusedJobTask] = asyncio.Queue()
+        for task in tasks:
+            queue.put_nowait(task)
+
+        workers = min(self.max_workers, len(tasks))
+        await asyncio.gather(*(self._worker(queue, progress) for _ in range(workers)))
+
+        log.info(f"Finished: {progress.summary()}")
+        return progress
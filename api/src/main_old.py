@@ -10,7 +10,8 @@ from flows.job_extractor.simple_roles_extractor import create_roles_extractor
 from flows.job_extractor.simple_tools_tech_extractor import create_tools_tech_extractor
 from flows.job_extractor.simple_heavy_constraints_extractor import create_heavy_constraints_extractor
 from logger import get_logger
-from utils.cache import is_extraction_cached, get_cached_extraction, save_extraction_result
+from utils.llm_clients import aclose_llm_clients
+from utils.cache import get_cached_results, save_extraction_result
 
 log = get_logger(__name__)
 
@@ -48,30 +49,34 @@ async def main():
         workflows_to_run = []
         cached_results = {}
 
-        for workflow_name, workflow_factory in workflows:
-            if is_extraction_cached(job_file, workflow_name):
+        job_workflows = [(name, factory()) for name, factory in workflows]
+        cache_keys = {
+            name: workflow.cache_key(job_content) for name, workflow in job_workflows
+        }
+        found = get_cached_results(cache_keys.values())
+
+        for workflow_name, workflow in job_workflows:
+            if cache_keys[workflow_name] in found:
                 log.info(
                     f"Found cached result for {job_file.name} - {workflow_name}")
-                cached_results[workflow_name] = get_cached_extraction(
-                    job_file, workflow_name)
+                cached_results[workflow_name] = found[cache_keys[workflow_name]]
             else:
                 log.info(
                     f"No cache found for {job_file.name} - {workflow_name}, adding to execution queue")
-                workflows_to_run.append((workflow_name, workflow_factory))
+                workflows_to_run.append((workflow_name, workflow))
 
         # Run workflows in parallel if needed
         if workflows_to_run:
             log.info(
                 f"Running {len(workflows_to_run)} workflows in parallel for {job_file.name}")
 
-            async def run_workflow(workflow_name, workflow_factory):
-                w = workflow_factory()
-                result = await w.run(job_description=job_content)
+            async def run_workflow(workflow_name, workflow):
+                result = await workflow.run(job_description=job_content)
                 save_extraction_result(job_file, workflow_name, result)
                 return workflow_name, result
 
             # Execute workflows in parallel
-            tasks = [run_workflow(name, factory) for name, factory in workflows_to_run]
+            tasks = [run_workflow(name, workflow) for name, workflow in workflows_to_run]
             results = await asyncio.gather(*tasks)
 
             # Add new results to cached results
@@ -87,6 +92,8 @@ async def main():
 
     log.info("All job files processed")
 
+    await aclose_llm_clients()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
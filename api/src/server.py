@@ -0,0 +1,241 @@
+"""Long-running HTTP API for job extraction and CV questions.
+
+Everything that is slow to set up - llama_index and Phoenix, the CV indexes,
+the pooled LLM clients, the extractor workflows and the SQLite cache - is
+created once at startup and shared by every request.
+"""
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import llama_index.core
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from cv_index import CVQueryEngine
+from cv_ingestion import aload_cv_index
+from flows.job_extractor.simple_fused_extractor import FusedJobExtractor
+from flows.simple_extractor import SimpleExtractorWorkflow
+from job_scheduler import JOB_WORKFLOWS
+from logger import get_logger
+from settings import settings
+from utils.cache import get_store
+from utils.json_repair import get_repair_stats
+from utils.llm_clients import aclose_llm_clients, get_llm
+from utils.metrics import get_metrics
+from utils.retry import get_retry_stats
+
+log = get_logger(__name__)
+
+
+class JobExtractionRequest(BaseModel):
+    job_description: str = Field(min_length=1)
+    workflows: list[str] | None = Field(
+        default=None, description="Workflows to run, defaults to all of them"
+    )
+    fused: bool = Field(
+        default=False, description="Extract every section with one LLM request"
+    )
+
+
+class JobExtractionResponse(BaseModel):
+    results: dict[str, dict]
+
+
+class CVQueryRequest(BaseModel):
+    question: str = Field(min_length=1)
+
+
+class CVQueryResponse(BaseModel):
+    answer: str
+    timing: dict[str, float]
+
+
+@dataclass
+class ServiceMetrics:
+    """Request counters and latencies per route."""
+
+    started_at: float = field(default_factory=time.monotonic)
+    requests: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    total_seconds: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+
+    def record(self, route: str, seconds: float, failed: bool) -> None:
+        self.requests[route] += 1
+        self.total_seconds[route] += seconds
+        if failed:
+            self.errors[route] += 1
+
+        metrics = get_metrics()
+        metrics.observe("http_request_seconds", seconds, route=route)
+        metrics.increment(
+            "http_requests_total", route=route, outcome="error" if failed else "ok")
+
+    def snapshot(self) -> dict:
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "routes": {
+                route: {
+                    "requests": count,
+                    "errors": self.errors[route],
+                    "avg_seconds": round(self.total_seconds[route] / count, 3),
+                }
+                for route, count in self.requests.items()
+            },
+        }
+
+
+@dataclass
+class ServiceState:
+    """Warm state shared by every request."""
+
+    job_workflows: dict[str, SimpleExtractorWorkflow] = field(default_factory=dict)
+    query_engines: dict[str, CVQueryEngine] = field(default_factory=dict)
+    streaming_query_engines: dict[str, CVQueryEngine] = field(default_factory=dict)
+    metrics: ServiceMetrics = field(default_factory=ServiceMetrics)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    load_dotenv()
+    llama_index.core.set_global_handler("arize_phoenix")
+
+    state = ServiceState()
+    # Open the cache and the pooled LLM client up front
+    get_store()
+    llm = get_llm()
+
+    # Workflows keep no per-run state, so one instance serves every request
+    state.job_workflows = {name: factory() for name, factory in JOB_WORKFLOWS.items()}
+
+    for pdf_path in sorted(Path(settings.cv_dir).glob("*.pdf")):
+        index = await aload_cv_index(pdf_path)
+        state.query_engines[pdf_path.stem] = index.as_query_engine(llm=llm)
+        state.streaming_query_engines[pdf_path.stem] = index.as_query_engine(
+            llm=llm, streaming=True
+        )
+        log.info(f"Serving CV {pdf_path.stem}")
+
+    app.state.service = state
+    try:
+        yield
+    finally:
+        await aclose_llm_clients()
+        get_metrics().shutdown()
+
+
+app = FastAPI(title="Nightcrawler API", lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origin_regex=settings.server_cors_origin_regex,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+def get_state(request: Request) -> ServiceState:
+    return request.app.state.service
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    failed = True
+    try:
+        response = await call_next(request)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        get_state(request).metrics.record(path, time.perf_counter() - start, failed)
+
+
+def get_query_engine(
+    request: Request, cv_name: str, streaming: bool = False
+) -> CVQueryEngine:
+    state = get_state(request)
+    query_engines = state.streaming_query_engines if streaming else state.query_engines
+    query_engine = query_engines.get(cv_name)
+    if query_engine is None:
+        raise HTTPException(status_code=404, detail=f"Unknown CV: {cv_name}")
+    return query_engine
+
+
+@app.post("/jobs/extract", response_model=JobExtractionResponse)
+async def extract_job(body: JobExtractionRequest, request: Request):
+    state = get_state(request)
+    names = body.workflows or list(state.job_workflows)
+    unknown = [name for name in names if name not in state.job_workflows]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown workflows: {unknown}")
+
+    if body.fused:
+        results = await FusedJobExtractor(names).run(body.job_description)
+    else:
+        outputs = await asyncio.gather(
+            *(
+                state.job_workflows[name].run(job_description=body.job_description)
+                for name in names
+            )
+        )
+        results = dict(zip(names, outputs, strict=True))
+
+    return JobExtractionResponse(
+        results={name: json.loads(result) for name, result in results.items()}
+    )
+
+
+@app.post("/cv/{cv_name}/query", response_model=CVQueryResponse)
+async def query_cv(cv_name: str, body: CVQueryRequest, request: Request):
+    query_engine = get_query_engine(request, cv_name)
+    response = await query_engine.aquery(body.question)
+    return CVQueryResponse(
+        answer=str(response), timing=(response.metadata or {}).get("timing", {})
+    )
+
+
+@app.post("/cv/{cv_name}/query/stream")
+async def stream_cv_query(cv_name: str, body: CVQueryRequest, request: Request):
+    query_engine = get_query_engine(request, cv_name, streaming=True)
+    return StreamingResponse(query_engine.astream(body.question), media_type="text/plain")
+
+
+@app.get("/health")
+async def health(request: Request):
+    state = get_state(request)
+    return {
+        "status": "ok",
+        "cvs": sorted(state.query_engines),
+        "workflows": sorted(state.job_workflows),
+        "metrics": state.metrics.snapshot(),
+        "retries": {
+            name: {**asdict(stats), "reask_rate": round(stats.reask_rate, 4)}
+            for name, stats in get_retry_stats().items()
+        },
+        "json_repair": asdict(get_repair_stats()),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    text = get_metrics().render_prometheus()
+    if text is None:
+        raise HTTPException(
+            status_code=404, detail="Set METRICS_SINK=prometheus to expose metrics"
+        )
+    return text
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=settings.server_host, port=settings.server_port)
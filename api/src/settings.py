@@ -14,6 +14,148 @@ class Settings(BaseSettings):
 
     # LLM Configuration
     groq_api_key: str = Field(description="Groq API key for LLM")
+    llm_model: str = Field(
+        default="openai/gpt-oss-120b", description="Default LLM model"
+    )
+    llm_max_connections: int = Field(
+        default=20, description="Maximum open HTTP connections to the LLM provider"
+    )
+    llm_max_keepalive_connections: int = Field(
+        default=10, description="Maximum idle keep-alive connections kept in the pool"
+    )
+    llm_keepalive_expiry: float = Field(
+        default=30.0, description="Seconds an idle keep-alive connection is kept open"
+    )
+    llm_requests_per_minute: int = Field(
+        default=0, description="Requests per minute allowed per model (0 = no limit)"
+    )
+    llm_tokens_per_minute: int = Field(
+        default=0, description="Tokens per minute allowed per model (0 = no limit)"
+    )
+    llm_completion_tokens_estimate: int = Field(
+        default=512, description="Completion tokens assumed when budgeting a request"
+    )
+    llm_structured_output: str = Field(
+        default="off",
+        description="Structured output requested from the provider: off, json_object, or json_schema",
+    )
+    llm_max_transport_retries: int = Field(
+        default=3, description="Retries after timeouts, connection errors, 429 and 5xx"
+    )
+    llm_max_validation_retries: int = Field(
+        default=2, description="Re-asks after output that fails validation"
+    )
+    llm_max_retries: int = Field(
+        default=4, description="Total retries of any kind allowed per request"
+    )
+    llm_retry_budget_ratio: float = Field(
+        default=0.2,
+        description="Retries allowed per request made, shared by every request of the process",
+    )
+    llm_retry_budget_min: int = Field(
+        default=10, description="Retries always allowed on top of the budget ratio"
+    )
+    llm_retry_base_delay: float = Field(
+        default=1.0, description="Base of the exponential backoff in seconds"
+    )
+    llm_retry_max_delay: float = Field(
+        default=30.0,
+        description="Longest wait before a retry in seconds; a longer Retry-After fails the request",
+    )
+    llm_circuit_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive transport failures that open a model's circuit (0 = never)",
+    )
+    llm_circuit_reset_seconds: float = Field(
+        default=30.0, description="Seconds an open circuit rejects calls before a trial"
+    )
+
+    # Batch Scheduler Configuration
+    scheduler_max_workers: int = Field(
+        default=8, description="Maximum (job, workflow) pairs processed at once"
+    )
+    scheduler_max_workers_per_model: int = Field(
+        default=4, description="Maximum concurrent pairs sent to the same model"
+    )
+    scheduler_strip_boilerplate: bool = Field(
+        default=False,
+        description="Strip sentences repeated across the job corpus before extraction",
+    )
+    boilerplate_min_documents: int = Field(
+        default=3, description="Fewest postings a sentence must appear in to be boilerplate"
+    )
+    boilerplate_min_document_ratio: float = Field(
+        default=0.3,
+        description="Share of the postings a sentence must appear in to be boilerplate",
+    )
+    boilerplate_min_company_documents: int = Field(
+        default=2,
+        description="Postings of one company a sentence must appear in to be boilerplate",
+    )
+    boilerplate_min_words: int = Field(
+        default=4, description="Shorter sentences (e.g. headings) are never stripped"
+    )
+    boilerplate_max_strip_ratio: float = Field(
+        default=0.5,
+        description="Keep boilerplate if it would strip more of a posting",
+    )
+
+    # Cache Configuration
+    cache_db_path: str = Field(
+        default="data/cache/extractions.db",
+        description="SQLite database storing extraction results",
+    )
+
+    # CV Query Configuration
+    cv_keyword_selection: str = Field(
+        default="auto",
+        description="CV keyword selection: local, llm, or auto (local with LLM fallback)",
+    )
+    cv_keyword_min_confidence: float = Field(
+        default=0.5,
+        description="Minimum local selection confidence before falling back to the LLM",
+    )
+    cv_query_concurrency: int = Field(
+        default=8, description="Maximum CV questions answered concurrently"
+    )
+    cv_context_token_budget: int = Field(
+        default=1500,
+        description="Maximum estimated tokens of CV context per question (0 for no limit)",
+    )
+    cv_extraction_concurrency: int = Field(
+        default=8, description="Maximum CV chunks sent for property extraction at once"
+    )
+    cv_extraction_batch_tokens: int = Field(
+        default=0,
+        description="Token budget of CV chunks packed into one property extraction request (0 sends one chunk per request)",
+    )
+    cv_index_dir: str = Field(
+        default="data/indexes", description="Directory of persisted CV indexes"
+    )
+
+    # Server Configuration
+    server_host: str = Field(default="127.0.0.1", description="Address the API server binds to")
+    server_port: int = Field(default=8000, description="Port the API server listens on")
+    server_cors_origin_regex: str = Field(
+        default=r"chrome-extension://.*",
+        description="Origins allowed to call the API from a browser",
+    )
+    cv_dir: str = Field(
+        default="data/cv", description="Directory of CV PDFs loaded by the server"
+    )
+
+    # Metrics Configuration
+    metrics_sink: str = Field(
+        default="memory",
+        description="Where metrics go: memory, prometheus (served at /metrics) or otlp",
+    )
+    metrics_otlp_endpoint: str = Field(
+        default="",
+        description="OTLP/HTTP metrics endpoint, defaults to the exporter's own",
+    )
+    metrics_export_interval: float = Field(
+        default=15.0, description="Seconds between OTLP metric exports"
+    )
 
     # Logging Configuration
     log_level: str = Field(default="INFO", description="Logging level")
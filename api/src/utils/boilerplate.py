@@ -0,0 +1,217 @@
+"""Corpus-aware removal of boilerplate from job postings.
+
+LinkedIn postings repeat a lot of text that says nothing about the job: page
+chrome, EEO statements, benefits lists and the company blurb every posting of
+a company carries. That text is billed in every extractor prompt. The index
+learns it from the corpus: each cleaned sentence is hashed, and sentences
+that appear in a large share of the postings, or in several postings of the
+same company, are dropped before extraction.
+"""
+
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from logger import get_logger
+from settings import settings
+from utils.rate_limiter import estimate_tokens
+from utils.text_cleaner import clean_text
+
+log = get_logger(__name__)
+
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?]) ")
+# LinkedIn page lines naming the hiring company
+COMPANY_PATTERNS = [
+    re.compile(r"^Save .+ at (.+)$", re.MULTILINE),
+    re.compile(r"^(.+?)(?: company)? logo$", re.MULTILINE),
+]
+
+
+def detect_company(text: str) -> str | None:
+    """Get the hiring company from a raw LinkedIn posting, if it names one."""
+    for pattern in COMPANY_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split a raw posting into cleaned sentences.
+
+    Lines are split separately since postings put headings, list items and
+    page chrome on their own lines. Joining the sentences with a space gives
+    clean_text(text).
+    """
+    sentences = []
+    for line in text.splitlines():
+        cleaned = clean_text(line)
+        if cleaned:
+            sentences.extend(SENTENCE_BOUNDARY_PATTERN.split(cleaned))
+    return sentences
+
+
+def _fingerprint(sentence: str) -> bytes:
+    return hashlib.blake2b(sentence.casefold().encode(), digest_size=8).digest()
+
+
+@dataclass
+class StrippedPosting:
+    """A cleaned posting without its boilerplate."""
+
+    text: str
+    removed_sentences: int
+    tokens_saved: int
+
+
+class BoilerplateIndex:
+    """Sentence fingerprints repeated across a corpus of job postings.
+
+    A sentence is boilerplate if it appears in min_document_ratio of the
+    postings of the corpus (and in at least min_documents of them), or in
+    min_company_documents postings of the same company. Requirements that
+    many postings share, like a language, stay below the ratio in a mixed
+    corpus. Sentences shorter than min_words are never stripped, so headings
+    that give the posting its structure are kept. Identical postings are only
+    counted once.
+    """
+
+    def __init__(
+        self,
+        min_documents: int | None = None,
+        min_document_ratio: float | None = None,
+        min_company_documents: int | None = None,
+        min_words: int | None = None,
+        max_strip_ratio: float | None = None,
+    ):
+        self.min_documents = (
+            settings.boilerplate_min_documents if min_documents is None else min_documents
+        )
+        self.min_document_ratio = (
+            settings.boilerplate_min_document_ratio
+            if min_document_ratio is None
+            else min_document_ratio
+        )
+        self.min_company_documents = (
+            settings.boilerplate_min_company_documents
+            if min_company_documents is None
+            else min_company_documents
+        )
+        self.min_words = settings.boilerplate_min_words if min_words is None else min_words
+        self.max_strip_ratio = (
+            settings.boilerplate_max_strip_ratio
+            if max_strip_ratio is None
+            else max_strip_ratio
+        )
+
+        self.document_frequency: Counter[bytes] = Counter()
+        # Per-company boilerplate index: company -> sentence fingerprint counts
+        self.company_frequency: dict[str, Counter[bytes]] = defaultdict(Counter)
+        self.company_documents: Counter[str] = Counter()
+        self._seen: set[bytes] = set()
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[str], **kwargs) -> "BoilerplateIndex":
+        """Learn the boilerplate of a corpus of raw postings."""
+        index = cls(**kwargs)
+        for text in documents:
+            index.add(text)
+        log.info(
+            f"Learned boilerplate from {len(index._seen)} postings of "
+            f"{len(index.company_documents)} companies"
+        )
+        return index
+
+    def add(self, text: str, company: str | None = None) -> None:
+        """Count the sentences of a raw posting.
+
+        Args:
+            text: Raw posting
+            company: Hiring company, detected from the posting by default
+        """
+        sentences = split_sentences(text)
+        digest = _fingerprint(" ".join(sentences))
+        if digest in self._seen:
+            return
+        self._seen.add(digest)
+
+        fingerprints = {
+            _fingerprint(sentence)
+            for sentence in sentences
+            if len(sentence.split()) >= self.min_words
+        }
+        self.document_frequency.update(fingerprints)
+
+        company = company or detect_company(text)
+        if company:
+            self.company_frequency[company].update(fingerprints)
+            self.company_documents[company] += 1
+
+    @property
+    def corpus_threshold(self) -> int:
+        """Postings a sentence must appear in to be corpus boilerplate."""
+        return max(
+            self.min_documents, math.ceil(self.min_document_ratio * len(self._seen))
+        )
+
+    def company_boilerplate(self, company: str) -> int:
+        """Number of sentences learned as boilerplate for a company."""
+        return sum(
+            1
+            for count in self.company_frequency.get(company, Counter()).values()
+            if count >= self.min_company_documents
+        )
+
+    def strip(self, text: str, company: str | None = None) -> StrippedPosting:
+        """Clean a raw posting and drop its boilerplate sentences.
+
+        Company boilerplate is kept when it would remove more than
+        max_strip_ratio of the posting, which happens when a company posts
+        the same job twice. If corpus boilerplate alone is still more than
+        that, the posting is only cleaned.
+
+        Args:
+            text: Raw posting
+            company: Hiring company, detected from the posting by default
+
+        Returns:
+            The cleaned posting without boilerplate
+        """
+        sentences = split_sentences(text)
+        company_counts = self.company_frequency.get(company or detect_company(text))
+        corpus_threshold = self.corpus_threshold
+
+        corpus_boilerplate = []
+        company_boilerplate = []
+        for sentence in sentences:
+            fingerprint = _fingerprint(sentence)
+            if self.document_frequency[fingerprint] >= corpus_threshold:
+                corpus_boilerplate.append(True)
+                company_boilerplate.append(True)
+            else:
+                corpus_boilerplate.append(False)
+                company_boilerplate.append(
+                    company_counts is not None
+                    and company_counts[fingerprint] >= self.min_company_documents
+                )
+
+        cleaned = " ".join(sentences)
+        min_length = (1 - self.max_strip_ratio) * len(cleaned)
+        kept = sentences
+        for boilerplate in (company_boilerplate, corpus_boilerplate):
+            candidate = [
+                s for s, drop in zip(sentences, boilerplate, strict=True) if not drop
+            ]
+            if len(" ".join(candidate)) >= min_length:
+                kept = candidate
+                break
+
+        stripped = " ".join(kept)
+        return StrippedPosting(
+            text=stripped,
+            removed_sentences=len(sentences) - len(kept),
+            tokens_saved=estimate_tokens(cleaned) - estimate_tokens(stripped),
+        )
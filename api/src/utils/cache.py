@@ -1,57 +1,272 @@
-"""Cache utility for extraction results."""
+"""Cache utility for extraction results.
 
+Results are stored in a SQLite database in WAL mode:
+
+- extractions: content-addressed results, keyed by compute_extraction_key()
+- job_results: the latest result of each workflow for each job file
+
+Every write is its own transaction, and each thread gets its own connection,
+so the store can be shared by many coroutines, threads and processes.
+"""
+
+import hashlib
 import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
 from pathlib import Path
-from typing import Any, Optional, Dict
+from typing import Any
 
 from logger import get_logger
+from settings import settings
+from utils.metrics import get_metrics
 
 log = get_logger(__name__)
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    cache_key TEXT PRIMARY KEY,
+    llm_model TEXT NOT NULL DEFAULT '',
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
 
-def get_cache_file_path(job_file: Path, cache_dir: str = "data/extracted") -> Path:
-    """Get the JSON cache file path for a job file."""
-    cache_directory = Path(cache_dir)
-    cache_directory.mkdir(parents=True, exist_ok=True)
-    return cache_directory / f"{job_file.stem}.json"
+CREATE TABLE IF NOT EXISTS job_results (
+    job_name TEXT NOT NULL,
+    workflow_name TEXT NOT NULL,
+    result TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_name, workflow_name)
+);
+"""
 
 
-def load_extraction_cache(job_file: Path) -> Dict:
-    """Load extraction results from JSON cache file."""
-    cache_file = get_cache_file_path(job_file)
-    
-    if cache_file.exists():
-        try:
-            with open(cache_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            log.warning(f"Failed to load cache file {cache_file}: {e}")
-    
-    return {}
+class ExtractionStore:
+    """SQLite-backed store for extraction results."""
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, cache_key: str) -> str | None:
+        row = self._connect().execute(
+            "SELECT result FROM extractions WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, cache_keys: Iterable[str]) -> dict[str, str]:
+        """Look up many cache keys with a single query."""
+        rows = self._connect().execute(
+            "SELECT cache_key, result FROM extractions "
+            "WHERE cache_key IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(cache_keys)),),
+        ).fetchall()
+        return dict(rows)
+
+    def put(self, cache_key: str, result: str, llm_model: str = "") -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions "
+                "(cache_key, llm_model, result, created_at) VALUES (?, ?, ?, ?)",
+                (cache_key, llm_model, result, time.time()),
+            )
+
+    def get_job_results(self, job_name: str) -> dict[str, str]:
+        rows = self._connect().execute(
+            "SELECT workflow_name, result FROM job_results WHERE job_name = ?",
+            (job_name,),
+        ).fetchall()
+        return dict(rows)
+
+    def put_job_results(self, rows: Iterable[tuple[str, str, str]]) -> None:
+        """Save (job_name, workflow_name, result) rows in one transaction."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_results "
+                "(job_name, workflow_name, result, updated_at) VALUES (?, ?, ?, ?)",
+                [(job, workflow, result, now) for job, workflow, result in rows],
+            )
+
+
+_store: ExtractionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ExtractionStore:
+    """Get the process-wide extraction store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ExtractionStore(settings.cache_db_path)
+        return _store
+
+
+def _serialize(result: Any) -> str:
+    return result if isinstance(result, str) else json.dumps(result)
+
+
+def load_extraction_cache(job_file: Path) -> dict:
+    """Load all workflow results for a job file."""
+    return get_store().get_job_results(job_file.stem)
 
 
 def save_extraction_result(job_file: Path, workflow_name: str, result: Any):
-    """Save extraction result to JSON cache file."""
-    cache_file = get_cache_file_path(job_file)
-    cache_data = load_extraction_cache(job_file)
-    
-    cache_data[workflow_name] = result
-    
+    """Save a workflow result for a job file."""
+    save_extraction_results([(job_file, workflow_name, result)])
+    log.info(f"Saved {workflow_name} result for {job_file.name}")
+
+
+def save_extraction_results(results: Iterable[tuple[Path, str, Any]]):
+    """Save many (job file, workflow name, result) entries atomically."""
     try:
-        with open(cache_file, 'w') as f:
-            json.dump(cache_data, f, indent=2)
-        log.info(f"Saved {workflow_name} result for {job_file.name}")
-    except Exception as e:
-        log.error(f"Failed to save cache file {cache_file}: {e}")
+        with get_metrics().timer("cache_operation_seconds", operation="put_job_results"):
+            get_store().put_job_results(
+                (job_file.stem, workflow_name, _serialize(result))
+                for job_file, workflow_name, result in results
+            )
+    except sqlite3.Error as e:
+        log.error(f"Failed to save extraction results: {e}")
 
 
 def is_extraction_cached(job_file: Path, workflow_name: str) -> bool:
     """Check if extraction result already exists."""
-    cache_data = load_extraction_cache(job_file)
-    return workflow_name in cache_data
+    return workflow_name in load_extraction_cache(job_file)
 
 
-def get_cached_extraction(job_file: Path, workflow_name: str) -> Optional[Any]:
+def get_cached_extraction(job_file: Path, workflow_name: str) -> Any | None:
     """Get cached extraction result."""
-    cache_data = load_extraction_cache(job_file)
-    return cache_data.get(workflow_name)
\ No newline at end of file
+    return load_extraction_cache(job_file).get(workflow_name)
+
+
+def compute_extraction_key(
+    text: str,
+    system_prompt: str,
+    user_prompt: str,
+    validator_version: str,
+    llm_model: str,
+) -> str:
+    """Compute a content-addressed cache key for an extraction.
+
+    Args:
+        text: Cleaned input text
+        system_prompt: System prompt sent to the LLM
+        user_prompt: User prompt template (rendered without input text)
+        validator_version: Version of the validator that produced the result
+        llm_model: Model used for the extraction
+
+    Returns:
+        Hex SHA-256 digest identifying the extraction
+    """
+    parts = [text, system_prompt, user_prompt, validator_version, llm_model]
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_result(cache_key: str, count: bool = True) -> Any | None:
+    """Get a cached extraction result by content key.
+
+    Args:
+        cache_key: Content key of the extraction
+        count: Whether to count the lookup in cache_lookups_total; off for
+            re-checks of a key the caller already looked up
+    """
+    metrics = get_metrics()
+    try:
+        with metrics.timer("cache_operation_seconds", operation="get"):
+            result = get_store().get(cache_key)
+    except sqlite3.Error as e:
+        log.warning(f"Failed to read cache entry {cache_key[:12]}: {e}")
+        if count:
+            metrics.increment("cache_lookups_total", result="error")
+        return None
+    if count:
+        metrics.increment(
+            "cache_lookups_total", result="miss" if result is None else "hit")
+    return result
+
+
+def get_cached_results(cache_keys: Iterable[str], count: bool = True) -> dict[str, Any]:
+    """Get cached extraction results for many content keys in one query.
+
+    Args:
+        cache_keys: Content keys of the extractions
+        count: Whether to count the lookups in cache_lookups_total
+    """
+    cache_keys = list(cache_keys)
+    metrics = get_metrics()
+    try:
+        with metrics.timer("cache_operation_seconds", operation="get_many"):
+            results = get_store().get_many(cache_keys)
+    except sqlite3.Error as e:
+        log.warning(f"Failed to read cache entries: {e}")
+        if count:
+            metrics.increment("cache_lookups_total", len(cache_keys), result="error")
+        return {}
+    if count:
+        hits = sum(1 for cache_key in cache_keys if cache_key in results)
+        metrics.increment("cache_lookups_total", hits, result="hit")
+        metrics.increment("cache_lookups_total", len(cache_keys) - hits, result="miss")
+    return results
+
+
+def save_cached_result(cache_key: str, result: Any, llm_model: str = ""):
+    """Save an extraction result under its content key."""
+    try:
+        with get_metrics().timer("cache_operation_seconds", operation="put"):
+            get_store().put(cache_key, _serialize(result), llm_model)
+        log.debug(f"Saved cache entry {cache_key[:12]}")
+    except sqlite3.Error as e:
+        log.error(f"Failed to save cache entry {cache_key[:12]}: {e}")
+
+
+def migrate_json_cache(
+    extracted_dir: str = "data/extracted",
+    jobs_dir: str = "data/jobs",
+) -> int:
+    """Import the legacy data/extracted/*.json files into the store.
+
+    Results are imported as each job's latest results only. They came from
+    older validators, so they aren't added to the content cache and the jobs
+    are re-extracted on the next run.
+
+    Args:
+        extracted_dir: Directory of legacy per-job JSON cache files
+        jobs_dir: Directory of the job postings the cache files belong to
+
+    Returns:
+        Number of migrated (job, workflow) results
+    """
+    migrated = 0
+    for cache_file in sorted(Path(extracted_dir).glob("*.json")):
+        try:
+            with open(cache_file) as f:
+                cache_data = json.load(f)
+        except Exception as e:
+            log.warning(f"Skipping unreadable cache file {cache_file}: {e}")
+            continue
+
+        job_file = Path(jobs_dir) / f"{cache_file.stem}.txt"
+        save_extraction_results(
+            (job_file, workflow_name, result)
+            for workflow_name, result in cache_data.items()
+        )
+        migrated += len(cache_data)
+
+    log.info(f"Migrated {migrated} results from {extracted_dir}")
+    return migrated
@@ -0,0 +1,233 @@
+"""Deterministic repair of malformed JSON returned by the LLM.
+
+Most invalid outputs are mechanical slips: a code fence or a sentence around
+the object, trailing commas, single quotes, Python literals or raw newlines
+in strings. Fixing those locally is much cheaper than asking the LLM again,
+so every validator is wrapped with @repairable: when it rejects an output,
+the repaired output is validated once more before the error is allowed to
+trigger a re-ask. Truncated output is never repaired, since closing it would
+cache a partial result as a real one.
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any
+
+from utils.metrics import get_metrics
+from utils.validation import ValidationError
+
+FENCE_PATTERN = re.compile(r"```[A-Za-z]*\s*(.*?)(?:```|$)", re.DOTALL)
+WORD_PATTERN = re.compile(r"[A-Za-z_]+")
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+CLOSING_BRACKETS = {"{": "}", "[": "]"}
+
+
+@dataclass
+class RepairStats:
+    """How often repairs turned a rejected output into a valid one."""
+
+    # Outputs that passed validation only thanks to a repair, i.e. re-asks saved
+    saved: int = 0
+    # Rejected outputs that repairs couldn't fix
+    failed: int = 0
+    by_kind: Counter = field(default_factory=Counter)
+
+
+_lock = threading.Lock()
+_stats = RepairStats()
+_repairs: ContextVar[list[str] | None] = ContextVar("json_repairs", default=None)
+
+
+def get_repair_stats() -> RepairStats:
+    """Repair counters since the process started."""
+    with _lock:
+        return RepairStats(_stats.saved, _stats.failed, Counter(_stats.by_kind))
+
+
+def note_repair(kind: str) -> None:
+    """Record a repair made inside a validator (e.g. coercing a value's type)."""
+    repairs = _repairs.get()
+    if repairs is not None:
+        repairs.append(kind)
+
+
+def _strip_fences(text: str) -> tuple[str, bool]:
+    match = FENCE_PATTERN.search(text)
+    if match is None:
+        return text, False
+    return match.group(1), True
+
+
+def _extract_span(text: str) -> tuple[str, bool]:
+    """Cut the text to the first JSON value.
+
+    Returns:
+        The span and whether text around it was dropped
+
+    Raises:
+        ValueError: If the value is truncated
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        return text, False
+    start = min(starts)
+
+    stack = []
+    quote = None
+    index = start
+    while index < len(text):
+        char = text[index]
+        if quote:
+            if char == "\\":
+                index += 1
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in CLOSING_BRACKETS:
+            stack.append(CLOSING_BRACKETS[char])
+        elif char in "}]" and stack:
+            stack.pop()
+            if not stack:
+                span = text[start:index + 1]
+                return span, span != text.strip()
+        index += 1
+
+    raise ValueError("Truncated JSON output")
+
+
+def _normalize_tokens(text: str) -> tuple[str, list[str]]:
+    """Rewrite single-quoted strings, Python literals and trailing commas."""
+    repairs = []
+    out = []
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+
+        if char in "\"'":
+            quote = char
+            if quote == "'":
+                repairs.append("single_quotes")
+            buffer = []
+            index += 1
+            while index < length and text[index] != quote:
+                current = text[index]
+                if current == "\\" and index + 1 < length:
+                    escaped = text[index + 1]
+                    # \' is not a JSON escape
+                    buffer.append("'" if escaped == "'" else current + escaped)
+                    index += 2
+                    continue
+                if current == '"':
+                    buffer.append('\\"')
+                elif current == "\n":
+                    repairs.append("raw_newline")
+                    buffer.append("\\n")
+                elif current == "\t":
+                    buffer.append("\\t")
+                else:
+                    buffer.append(current)
+                index += 1
+            out.append('"' + "".join(buffer) + '"')
+            index += 1
+            continue
+
+        if char == ",":
+            lookahead = index + 1
+            while lookahead < length and text[lookahead].isspace():
+                lookahead += 1
+            if lookahead < length and text[lookahead] in "}]":
+                repairs.append("trailing_comma")
+                index += 1
+                continue
+
+        if char.isalpha() or char == "_":
+            word = WORD_PATTERN.match(text, index).group()
+            if word in PYTHON_LITERALS:
+                repairs.append("python_literal")
+            out.append(PYTHON_LITERALS.get(word, word))
+            index += len(word)
+            continue
+
+        out.append(char)
+        index += 1
+    return "".join(out), repairs
+
+
+def repair_json(output: str) -> tuple[Any, list[str]]:
+    """Parse malformed JSON output after fixing common mechanical errors.
+
+    Args:
+        output: Raw LLM output
+
+    Returns:
+        The parsed value and the kinds of repairs applied
+
+    Raises:
+        ValueError: If the output can't be repaired
+    """
+    repairs = []
+    text, had_fence = _strip_fences(output.strip())
+    if had_fence:
+        repairs.append("code_fence")
+
+    text, had_surrounding_text = _extract_span(text.strip())
+    if had_surrounding_text:
+        repairs.append("surrounding_text")
+
+    try:
+        return json.loads(text), repairs
+    except json.JSONDecodeError:
+        pass
+
+    text, token_repairs = _normalize_tokens(text)
+    try:
+        return json.loads(text), repairs + token_repairs
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON: {e}") from e
+
+
+def repairable[T](validator: Callable[[str], T]) -> Callable[[str], T]:
+    """Run a validator again on the repaired output before it fails.
+
+    Outputs that only validate after a repair are counted as saved re-asks.
+    """
+
+    @wraps(validator)
+    def wrapper(output: str) -> T:
+        token = _repairs.set([])
+        try:
+            try:
+                result = validator(output)
+            except ValidationError as error:
+                try:
+                    repaired, kinds = repair_json(output)
+                    _repairs.get().extend(kinds)
+                    result = validator(json.dumps(repaired))
+                except (ValueError, ValidationError):
+                    with _lock:
+                        _stats.failed += 1
+                    get_metrics().increment("json_repairs_total", outcome="failed")
+                    raise error from None
+
+            repairs = _repairs.get()
+            if repairs:
+                with _lock:
+                    _stats.saved += 1
+                    _stats.by_kind.update(set(repairs))
+                metrics = get_metrics()
+                metrics.increment("json_repairs_total", outcome="saved")
+                for kind in set(repairs):
+                    metrics.increment("json_repair_kinds_total", kind=kind)
+            return result
+        finally:
+            _repairs.reset(token)
+
+    return wrapper
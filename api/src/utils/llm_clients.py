@@ -0,0 +1,136 @@
+"""Process-wide registry of pooled LLM clients."""
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from llama_index.llms.groq import Groq
+
+from logger import get_logger
+from settings import settings
+
+log = get_logger(__name__)
+
+
+@dataclass
+class _ClientPool:
+    """Async connection pool and the clients using it, for one event loop."""
+
+    async_http_client: httpx.AsyncClient
+    llms: dict[tuple, Groq] = field(default_factory=dict)
+
+
+_lock = threading.Lock()
+_http_client: httpx.Client | None = None
+# httpx async clients can't be shared across event loops, so each loop (and
+# code running outside any loop) gets its own pool
+_loop_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ClientPool]" = (
+    weakref.WeakKeyDictionary()
+)
+_default_pool: _ClientPool | None = None
+
+
+def _get_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+    )
+
+
+def _get_running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _get_http_client() -> httpx.Client:
+    """Create the shared sync keep-alive connection pool on first use."""
+    global _http_client
+
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_get_limits())
+    return _http_client
+
+
+def _get_pool() -> _ClientPool:
+    """Get the client pool of the running event loop."""
+    global _default_pool
+
+    loop = _get_running_loop()
+    if loop is None:
+        if _default_pool is None:
+            _default_pool = _ClientPool(httpx.AsyncClient(limits=_get_limits()))
+        return _default_pool
+
+    pool = _loop_pools.get(loop)
+    if pool is None:
+        pool = _ClientPool(httpx.AsyncClient(limits=_get_limits()))
+        _loop_pools[loop] = pool
+    return pool
+
+
+def get_llm(model: str | None = None, **kwargs: Any) -> Groq:
+    """Get the shared LLM client for a model and settings.
+
+    Clients are created once per (model, api key, kwargs) and event loop, and
+    all of them share pooled HTTP connections.
+
+    Args:
+        model: Model name, defaults to settings.llm_model
+        **kwargs: Extra Groq constructor arguments (e.g. temperature)
+
+    Returns:
+        Shared Groq client
+    """
+    model = model or settings.llm_model
+    key = (model, settings.groq_api_key, tuple(sorted(kwargs.items())))
+
+    with _lock:
+        pool = _get_pool()
+        llm = pool.llms.get(key)
+        if llm is None:
+            llm = Groq(
+                model=model,
+                api_key=settings.groq_api_key,
+                http_client=_get_http_client(),
+                async_http_client=pool.async_http_client,
+                **kwargs,
+            )
+            pool.llms[key] = llm
+            log.debug(f"Created shared LLM client for {model}")
+        return llm
+
+
+async def aclose_llm_clients(shared: bool = True) -> None:
+    """Close pooled connections and forget the registered clients.
+
+    Args:
+        shared: Also close the sync pool and the pool used outside event loops;
+            pass False to only close the running loop's pool
+    """
+    global _http_client, _default_pool
+
+    loop = _get_running_loop()
+    pools = []
+    with _lock:
+        if loop is not None and loop in _loop_pools:
+            pools.append(_loop_pools.pop(loop))
+
+        http_client = None
+        if shared:
+            if _default_pool is not None:
+                pools.append(_default_pool)
+            http_client = _http_client
+            _default_pool = None
+            _http_client = None
+
+    for pool in pools:
+        await pool.async_http_client.aclose()
+    if http_client is not None:
+        http_client.close()
+    log.debug("Closed shared LLM clients")
@@ -0,0 +1,339 @@
+"""Counters and latency histograms for the extraction and CV pipelines.
+
+Instrumented code records through get_metrics(), which fans out to the sinks
+chosen by the metrics_sink setting:
+
+- memory: keeps every series in process, for the summary table printed at
+  the end of a batch run
+- prometheus: the same, plus the Prometheus text format served by /metrics
+- otlp: also pushes to an OpenTelemetry collector; needs the optional
+  opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http packages
+
+Metric names follow the Prometheus conventions (_total counters, _seconds
+histograms) and labels are plain strings.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from logger import get_logger
+from settings import settings
+from utils.rate_limiter import get_token_counts
+
+log = get_logger(__name__)
+
+Labels = tuple[tuple[str, str], ...]
+
+# Upper bounds in seconds, from cache lookups to slow LLM requests
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+# Recent observations kept per series for the summary percentiles
+MAX_SAMPLES = 10_000
+
+
+def _labels(labels: dict[str, str] | None) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+class MetricsSink(ABC):
+    """Receives every counter increment and histogram observation."""
+
+    @abstractmethod
+    def increment(self, name: str, value: float, labels: Labels) -> None:
+        pass
+
+    @abstractmethod
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        pass
+
+    def shutdown(self) -> None:  # noqa: B027 - optional, most sinks buffer nothing
+        """Flush anything buffered; called once at exit."""
+
+
+@dataclass
+class Histogram:
+    """Bucketed observations of one series."""
+
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    bucket_counts: list[int] = field(init=False)
+    count: int = 0
+    sum: float = 0.0
+    max: float = 0.0
+    samples: deque = field(default_factory=lambda: deque(maxlen=MAX_SAMPLES))
+
+    def __post_init__(self):
+        self.bucket_counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float:
+        """Quantile of the recent observations."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class InMemorySink(MetricsSink):
+    """Keeps counters and histograms in process."""
+
+    def __init__(self):
+        self.counters: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self.histograms: dict[str, dict[Labels, Histogram]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            series = self.counters[name]
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            series = self.histograms[name]
+            if labels not in series:
+                series[labels] = Histogram()
+            series[labels].observe(value)
+
+    def counter_total(self, metric: str, /, **labels: str) -> float:
+        """Sum of a counter over the series matching the given labels."""
+        wanted = set(_labels(labels))
+        with self._lock:
+            return sum(
+                value
+                for series_labels, value in self.counters.get(metric, {}).items()
+                if wanted <= set(series_labels)
+            )
+
+    def summary_table(self) -> str:
+        """Histograms and counters as aligned text tables."""
+        with self._lock:
+            histogram_rows = [
+                (
+                    name,
+                    _format_labels(labels),
+                    str(histogram.count),
+                    f"{histogram.sum / histogram.count * 1000:.1f}",
+                    f"{histogram.quantile(0.5) * 1000:.1f}",
+                    f"{histogram.quantile(0.95) * 1000:.1f}",
+                    f"{histogram.max * 1000:.1f}",
+                    f"{histogram.sum:.2f}",
+                )
+                for name, series in sorted(self.histograms.items())
+                for labels, histogram in sorted(series.items())
+                if histogram.count
+            ]
+            counter_rows = [
+                (name, _format_labels(labels), f"{value:g}")
+                for name, series in sorted(self.counters.items())
+                for labels, value in sorted(series.items())
+            ]
+
+        tables = []
+        if histogram_rows:
+            tables.append(_format_table(
+                ("histogram", "labels", "count", "avg ms", "p50 ms", "p95 ms",
+                 "max ms", "total s"),
+                histogram_rows,
+            ))
+        if counter_rows:
+            tables.append(_format_table(("counter", "labels", "value"), counter_rows))
+        return "\n\n".join(tables)
+
+
+class PrometheusSink(InMemorySink):
+    """In-memory sink that can render the Prometheus text exposition format."""
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_prometheus_labels(labels)} {value:g}")
+
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(
+                        histogram.buckets, histogram.bucket_counts, strict=True
+                    ):
+                        cumulative += count
+                        bucket_labels = labels + (("le", f"{bound:g}"),)
+                        lines.append(
+                            f"{name}_bucket{_prometheus_labels(bucket_labels)} {cumulative}")
+                    inf_labels = labels + (("le", "+Inf"),)
+                    lines.append(
+                        f"{name}_bucket{_prometheus_labels(inf_labels)} {histogram.count}")
+                    lines.append(f"{name}_sum{_prometheus_labels(labels)} {histogram.sum:g}")
+                    lines.append(
+                        f"{name}_count{_prometheus_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class OTLPSink(MetricsSink):
+    """Pushes metrics to an OpenTelemetry collector over OTLP/HTTP."""
+
+    def __init__(self, endpoint: str | None = None, export_interval: float | None = None):
+        # Optional dependency, only needed when this sink is configured
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+            OTLPMetricExporter,
+        )
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+
+        endpoint = endpoint or settings.metrics_otlp_endpoint
+        export_interval = export_interval or settings.metrics_export_interval
+        exporter = OTLPMetricExporter(endpoint=endpoint) if endpoint else OTLPMetricExporter()
+        reader = PeriodicExportingMetricReader(
+            exporter, export_interval_millis=export_interval * 1000
+        )
+        self._provider = MeterProvider(metric_readers=[reader])
+        self._meter = self._provider.get_meter("nightcrawler")
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            if name not in self._counters:
+                self._counters[name] = self._meter.create_counter(name)
+            counter = self._counters[name]
+        counter.add(value, attributes=dict(labels))
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = self._meter.create_histogram(name, unit="s")
+            histogram = self._histograms[name]
+        histogram.record(value, attributes=dict(labels))
+
+    def shutdown(self) -> None:
+        self._provider.shutdown()
+
+
+class Metrics:
+    """Records to every sink; the first in-memory sink backs the summary."""
+
+    def __init__(self, sinks: list[MetricsSink]):
+        self.sinks = sinks
+        self.memory = next(
+            (sink for sink in sinks if isinstance(sink, InMemorySink)), InMemorySink()
+        )
+        if self.memory not in sinks:
+            self.sinks = [self.memory, *sinks]
+
+    # The metric name is positional-only so any label name, even "name", works
+    def increment(self, metric: str, value: float = 1, /, **labels: str) -> None:
+        series_labels = _labels(labels)
+        for sink in self.sinks:
+            sink.increment(metric, value, series_labels)
+
+    def observe(self, metric: str, value: float, /, **labels: str) -> None:
+        series_labels = _labels(labels)
+        for sink in self.sinks:
+            sink.observe(metric, value, series_labels)
+
+    @contextmanager
+    def timer(self, metric: str, /, **labels: str) -> Iterator[None]:
+        """Observe how long the block takes, including when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(metric, time.perf_counter() - start, **labels)
+
+    def record_tokens(self, component: str, response: Any) -> None:
+        """Count the prompt and completion tokens reported for an LLM response."""
+        prompt_tokens, completion_tokens = get_token_counts(response)
+        if prompt_tokens is not None:
+            self.increment("llm_tokens_total", prompt_tokens, component=component, kind="prompt")
+        if completion_tokens is not None:
+            self.increment(
+                "llm_tokens_total", completion_tokens, component=component, kind="completion")
+
+    def render_prometheus(self) -> str | None:
+        """Prometheus text format, if a Prometheus sink is configured."""
+        for sink in self.sinks:
+            if isinstance(sink, PrometheusSink):
+                return sink.render()
+        return None
+
+    def summary_table(self) -> str:
+        return self.memory.summary_table()
+
+    def shutdown(self) -> None:
+        for sink in self.sinks:
+            sink.shutdown()
+
+
+_lock = threading.Lock()
+_metrics: Metrics | None = None
+
+
+def _create_sinks(kind: str) -> list[MetricsSink]:
+    if kind == "prometheus":
+        return [PrometheusSink()]
+    if kind == "otlp":
+        try:
+            return [InMemorySink(), OTLPSink()]
+        except ImportError as e:
+            log.warning(f"OTLP metrics need the opentelemetry packages ({e}), "
+                        "keeping metrics in memory only")
+    elif kind != "memory":
+        log.warning(f"Unknown metrics sink {kind!r}, keeping metrics in memory")
+    return [InMemorySink()]
+
+
+def get_metrics() -> Metrics:
+    """Get the process-wide metrics registry."""
+    global _metrics
+    with _lock:
+        if _metrics is None:
+            _metrics = Metrics(_create_sinks(settings.metrics_sink))
+        return _metrics
+
+
+def _format_labels(labels: Labels) -> str:
+    return ",".join(f"{key}={value}" for key, value in labels)
+
+
+def _prometheus_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_table(headers: tuple[str, ...], rows: list[tuple[str, ...]]) -> str:
+    widths = [
+        max(len(header), *(len(row[index]) for row in rows))
+        for index, header in enumerate(headers)
+    ]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(headers, widths, strict=True)),
+        "  ".join("-" * width for width in widths),
+    ]
+    lines += [
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths, strict=True))
+        for row in rows
+    ]
+    return "\n".join(line.rstrip() for line in lines)
@@ -0,0 +1,203 @@
+"""Client-side rate limiting for LLM requests."""
+
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any
+
+from logger import get_logger
+from settings import settings
+
+log = get_logger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of a text (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def estimate_request_tokens(*prompts: str) -> int:
+    """Estimate prompt plus completion tokens for a request."""
+    return (
+        sum(estimate_tokens(prompt) for prompt in prompts)
+        + settings.llm_completion_tokens_estimate
+    )
+
+
+def get_token_usage(response: Any) -> int | None:
+    """Get the total tokens reported by the provider for an LLM response."""
+    additional_kwargs = getattr(response, "additional_kwargs", None) or {}
+    if "total_tokens" in additional_kwargs:
+        return int(additional_kwargs["total_tokens"])
+
+    usage = getattr(getattr(response, "raw", None), "usage", None)
+    total_tokens = getattr(usage, "total_tokens", None)
+    return int(total_tokens) if total_tokens is not None else None
+
+
+def get_token_counts(response: Any) -> tuple[int | None, int | None]:
+    """Get the prompt and completion tokens reported for an LLM response."""
+    additional_kwargs = getattr(response, "additional_kwargs", None) or {}
+    usage = getattr(getattr(response, "raw", None), "usage", None)
+    counts = []
+    for key in ("prompt_tokens", "completion_tokens"):
+        count = additional_kwargs.get(key, getattr(usage, key, None))
+        counts.append(int(count) if count is not None else None)
+    return counts[0], counts[1]
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations.
+
+    reserve() takes the tokens right away, even if that leaves the bucket in
+    debt, and returns how long the caller must wait before using them. Callers
+    are therefore served in the order they reserved.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(
+            self.capacity, self._tokens + elapsed * self.refill_per_second
+        )
+        self._updated_at = now
+
+    def reserve(self, amount: float) -> float:
+        """Reserve tokens and return the seconds to wait before using them."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.refill_per_second
+
+    def adjust(self, amount: float) -> None:
+        """Give back (positive) or take (negative) tokens after the fact."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter for one model.
+
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self._requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60)
+            if requests_per_minute > 0
+            else None
+        )
+        self._tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+            if tokens_per_minute > 0
+            else None
+        )
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self._requests:
+            wait = max(wait, self._requests.reserve(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.reserve(tokens))
+        return wait
+
+    def refund(self, tokens: int, request: bool = False) -> None:
+        """Give back a reservation that wasn't used.
+
+        Args:
+            tokens: Reserved tokens to give back
+            request: Also give back the request, if it was never sent
+        """
+        if self._tokens:
+            self._tokens.adjust(tokens)
+        if request and self._requests:
+            self._requests.adjust(1)
+
+    async def acquire(self, tokens: int) -> float:
+        """Wait until a request of the estimated size fits the budgets.
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            log.debug(f"Rate limited, waiting {wait:.2f}s for {tokens} tokens")
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund(tokens, request=True)
+                raise
+        return wait
+
+    def acquire_sync(self, tokens: int) -> float:
+        """Blocking version of acquire for sync callers."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            log.debug(f"Rate limited, waiting {wait:.2f}s for {tokens} tokens")
+            time.sleep(wait)
+        return wait
+
+    @asynccontextmanager
+    async def limit(self, tokens: int) -> AsyncIterator[float]:
+        """Acquire budget for a request, refunding its tokens if it is cancelled
+        or times out before the provider answers.
+
+        Yields:
+            Seconds spent waiting for the budget
+        """
+        waited = await self.acquire(tokens)
+        try:
+            yield waited
+        except (asyncio.CancelledError, TimeoutError):
+            self.refund(tokens)
+            raise
+
+    @contextmanager
+    def limit_sync(self, tokens: int) -> Iterator[float]:
+        """Blocking version of limit for sync callers."""
+        waited = self.acquire_sync(tokens)
+        try:
+            yield waited
+        except TimeoutError:
+            self.refund(tokens)
+            raise
+
+    def record_usage(self, estimated_tokens: int, response: Any) -> None:
+        """Correct the token budget with the usage the provider reported."""
+        actual_tokens = get_token_usage(response)
+        if self._tokens and actual_tokens is not None:
+            self._tokens.adjust(estimated_tokens - actual_tokens)
+
+
+_lock = threading.Lock()
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(model: str | None = None) -> RateLimiter:
+    """Get the process-wide rate limiter for a model."""
+    model = model or settings.llm_model
+    with _lock:
+        if model not in _limiters:
+            _limiters[model] = RateLimiter(
+                requests_per_minute=settings.llm_requests_per_minute,
+                tokens_per_minute=settings.llm_tokens_per_minute,
+            )
+        return _limiters[model]
+
+
+def get_llm_rate_limiter(llm: Any) -> RateLimiter:
+    """Get the rate limiter for the model an LLM client talks to."""
+    return get_rate_limiter(getattr(llm, "model", None))
@@ -1,91 +1,371 @@
+"""Retry policy for LLM requests.
+
+Failures fall in two groups that are retried differently:
+
+- Transport errors (timeouts, connection errors, 429 and 5xx responses) are
+  retried after an exponential backoff with full jitter, or after the
+  provider's Retry-After if that is longer. A Retry-After beyond the maximum
+  delay isn't waited out: the request fails instead of retrying early into
+  another 429. They count towards the model's circuit breaker.
+- Validation errors (the provider answered, but the output is unusable) are
+  re-asked right away, passing the validator's guidance to the next request.
+
+Both count towards a per-request limit, so a single bad input can't fan out
+into many requests, and towards a retry budget shared by the whole run, so
+retries stay a fraction of the traffic when everything is failing. When a
+model keeps failing at the transport level its circuit opens and calls fail
+fast until a trial request succeeds again.
+"""
+
 import asyncio
-from collections.abc import Callable
-from functools import wraps
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
 from typing import Any
 
+import httpx
+import openai
+
 from logger import get_logger
+from settings import settings
+from utils.metrics import get_metrics
+from utils.validation import ValidationError
 
 log = get_logger(__name__)
 
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
 
-def async_retry(
-    max_retries: int = 3,
-    exceptions: type[Exception] | tuple = Exception,
-    delay: float = 0,
-    backoff: float = 1,
-):
-    """
-    Async retry decorator with exponential backoff.
-    
-    Args:
-        max_retries: Maximum number of retry attempts
-        exceptions: Exception type(s) to catch and retry on
-        delay: Initial delay between retries in seconds
-        backoff: Multiplier for delay after each retry
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit is open."""
+
+    def __init__(self, model: str, retry_in: float):
+        self.model = model
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {model}, retry in {retry_in:.1f}s")
+
+
+def _get_status_code(error: BaseException) -> int | None:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Whether an error is a provider or network failure worth retrying."""
+    if isinstance(
+        error,
+        TimeoutError | ConnectionError | httpx.TransportError | openai.APIConnectionError,
+    ):
+        return True
+    return _get_status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Seconds the provider asked us to wait, from the Retry-After headers."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        # HTTP date form
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how long to wait before retrying."""
+
+    max_transport_retries: int = field(
+        default_factory=lambda: settings.llm_max_transport_retries)
+    max_validation_retries: int = field(
+        default_factory=lambda: settings.llm_max_validation_retries)
+    # Total retries of any kind allowed for one request
+    max_retries: int = field(default_factory=lambda: settings.llm_max_retries)
+    base_delay: float = field(default_factory=lambda: settings.llm_retry_base_delay)
+    max_delay: float = field(default_factory=lambda: settings.llm_retry_max_delay)
+
+    def backoff(self, retry: int, error: BaseException) -> float:
+        """Seconds to wait before a transport retry (1-based).
+
+        The provider's Retry-After is returned in full, even past max_delay;
+        callers give up rather than wait that long.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class RetryBudget:
+    """Retries shared by every request of a run.
+
+    Allows min_retries plus ratio retries per request started, so a degraded
+    provider sees at most (1 + ratio) times the normal traffic instead of
+    every request retrying up to its own limit.
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(*args, **kwargs) -> Any:
-            current_delay = delay
-
-            for attempt in range(max_retries):
-                try:
-                    return await func(*args, **kwargs)
-                except exceptions as e:
-                    if attempt == max_retries - 1:
-                        log.error(f"All {max_retries} attempts failed for {func.__name__}: {str(e)}")
-                        raise
-
-                    log.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}")
-
-                    if current_delay > 0:
-                        await asyncio.sleep(current_delay)
-                        current_delay *= backoff
-
-            # This should never be reached
-            raise RuntimeError(f"Unexpected error in retry decorator for {func.__name__}")
-
-        return wrapper
-    return decorator
-
-
-def sync_retry(
-    max_retries: int = 3,
-    exceptions: type[Exception] | tuple = Exception,
-    delay: float = 0,
-    backoff: float = 1,
-):
+
+    def __init__(self, ratio: float, min_retries: int):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget, if any is left."""
+        with self._lock:
+            if self.retries >= self.min_retries + self.ratio * self.requests:
+                return False
+            self.retries += 1
+            return True
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one model.
+
+    After failure_threshold transport failures in a row the circuit opens and
+    calls are rejected for reset_timeout seconds. Then a single trial call is
+    let through: success closes the circuit, failure opens it again.
     """
-    Sync retry decorator with exponential backoff.
-    
+
+    def __init__(self, model: str, failure_threshold: int, reset_timeout: float):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the model shouldn't be called right now.
+
+        Returns:
+            Whether this call is the trial of a circuit that was open
+        """
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if retry_in > 0 or self._trial_in_flight:
+                raise CircuitOpenError(self.model, max(retry_in, 0.0))
+            self._trial_in_flight = True
+            return True
+
+    def cancel_trial(self) -> None:
+        """Let another trial call through after one ended without an answer."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                log.info(f"Circuit closed for {self.model}")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            was_trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if was_trial or (
+                self._opened_at is None
+                and 0 < self.failure_threshold <= self._failures
+            ):
+                self._opened_at = time.monotonic()
+                log.warning(
+                    f"Circuit open for {self.model} after {self._failures} failures, "
+                    f"pausing {self.reset_timeout:.0f}s")
+
+
+@dataclass
+class RetryStats:
+    """Retry counters for one kind of request (e.g. one extractor)."""
+
+    runs: int = 0
+    # Runs that needed at least one validation re-ask
+    reasked_runs: int = 0
+    validation_retries: int = 0
+    transport_retries: int = 0
+    failures: int = 0
+
+    @property
+    def reask_rate(self) -> float:
+        return self.reasked_runs / self.runs if self.runs else 0.0
+
+
+_lock = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+_stats: dict[str, RetryStats] = {}
+_budget: RetryBudget | None = None
+
+
+def get_retry_stats() -> dict[str, RetryStats]:
+    """Retry counters by request name since the process started."""
+    with _lock:
+        return dict(_stats)
+
+
+def format_retry_stats() -> str:
+    """One line per request name with its re-ask rate and retry counts."""
+    return "\n".join(
+        f"{name}: {stats.reask_rate:.1%} re-asked ({stats.reasked_runs}/{stats.runs}), "
+        f"{stats.validation_retries} validation retries, "
+        f"{stats.transport_retries} transport retries, {stats.failures} failed"
+        for name, stats in sorted(get_retry_stats().items())
+    )
+
+
+def get_circuit_breaker(model: str | None = None) -> CircuitBreaker:
+    """Get the process-wide circuit breaker for a model."""
+    model = model or settings.llm_model
+    with _lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker(
+                model,
+                failure_threshold=settings.llm_circuit_failure_threshold,
+                reset_timeout=settings.llm_circuit_reset_seconds,
+            )
+        return _breakers[model]
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get the retry budget shared by every request of the process."""
+    global _budget
+    with _lock:
+        if _budget is None:
+            _budget = RetryBudget(
+                ratio=settings.llm_retry_budget_ratio,
+                min_retries=settings.llm_retry_budget_min,
+            )
+        return _budget
+
+
+async def run_with_retries[T](
+    attempt: Callable[[str], Awaitable[T]],
+    model: str | None = None,
+    policy: RetryPolicy | None = None,
+    name: str = "request",
+    budget: RetryBudget | None = None,
+) -> T:
+    """Run an LLM request under the retry policy and the model's circuit breaker.
+
     Args:
-        max_retries: Maximum number of retry attempts
-        exceptions: Exception type(s) to catch and retry on
-        delay: Initial delay between retries in seconds
-        backoff: Multiplier for delay after each retry
+        attempt: Makes one request and validates it; receives the guidance of
+            the previous validation error ("" on the first attempt)
+        model: Model the request goes to, for the circuit breaker
+        policy: Retry policy, defaults to the settings
+        name: Label used in log messages
+        budget: Retry budget of the run, defaults to the process-wide one
+
+    Returns:
+        The first successful attempt's result
+
+    Raises:
+        The last error once it isn't retryable or the retries are used up,
+        or CircuitOpenError if the model's circuit is open
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
-            import time
-            current_delay = delay
-
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    if attempt == max_retries - 1:
-                        log.error(f"All {max_retries} attempts failed for {func.__name__}: {str(e)}")
-                        raise
-
-                    log.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {str(e)}")
-
-                    if current_delay > 0:
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-
-            # This should never be reached
-            raise RuntimeError(f"Unexpected error in retry decorator for {func.__name__}")
-
-        return wrapper
-    return decorator
+    policy = policy or RetryPolicy()
+    breaker = get_circuit_breaker(model)
+    budget = budget or get_retry_budget()
+    budget.record_request()
+    with _lock:
+        stats = _stats.setdefault(name, RetryStats())
+        stats.runs += 1
+    guidance = ""
+    retries: dict[str, int] = {"transport": 0, "validation": 0}
+
+    while True:
+        is_trial = breaker.before_call()
+        try:
+            result = await attempt(guidance)
+        except ValidationError as e:
+            # Neither a transport failure nor a usable answer: leave the
+            # circuit as it is, and let a new trial through if this was one
+            if is_trial:
+                breaker.cancel_trial()
+            reason, limit, delay = "validation", policy.max_validation_retries, 0.0
+            guidance = e.llm_guidance
+            error: Any = e
+        except asyncio.CancelledError:
+            if is_trial:
+                breaker.cancel_trial()
+            raise
+        except Exception as e:
+            if not is_transport_error(e):
+                if is_trial:
+                    breaker.cancel_trial()
+                raise
+            breaker.record_failure()
+            reason, limit = "transport", policy.max_transport_retries
+            delay = policy.backoff(retries["transport"] + 1, e)
+            error = e
+        else:
+            breaker.record_success()
+            return result
+
+        retries[reason] += 1
+        if (
+            retries[reason] > limit
+            or sum(retries.values()) > policy.max_retries
+            # Retrying before the provider's Retry-After would only get another 429
+            or delay > policy.max_delay
+            or not budget.try_spend()
+        ):
+            with _lock:
+                stats.failures += 1
+            get_metrics().increment("llm_retry_exhausted_total", name=name, reason=reason)
+            log.error(
+                f"Giving up on {name} after {sum(retries.values())} failed attempts: "
+                f"{type(error).__name__}: {error}")
+            raise error
+
+        with _lock:
+            if reason == "validation":
+                stats.validation_retries += 1
+                if retries[reason] == 1:
+                    stats.reasked_runs += 1
+            else:
+                stats.transport_retries += 1
+        get_metrics().increment("llm_retries_total", name=name, reason=reason)
+
+        log.warning(
+            f"{reason.capitalize()} error on {name}, retry {retries[reason]}/{limit}"
+            + (f" in {delay:.2f}s" if delay else "")
+            + f": {type(error).__name__}: {error}")
+        if delay:
+            await asyncio.sleep(delay)
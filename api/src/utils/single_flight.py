@@ -0,0 +1,53 @@
+"""Coalescing of concurrent identical async calls."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+from logger import get_logger
+from utils.metrics import get_metrics
+
+log = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Run one call per key at a time and share its result with every caller.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is in flight await the same task. A cancelled caller doesn't
+    cancel the shared call. Calls are tracked per event loop.
+    """
+
+    def __init__(self, name: str = "call"):
+        self.name = name
+        self._calls: dict[tuple[asyncio.AbstractEventLoop, Hashable], asyncio.Task] = {}
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Await func(), or the call already in flight for the same key.
+
+        Args:
+            key: Identifies identical work
+            func: Starts the work; only called if nothing is in flight for key
+
+        Returns:
+            Result of the shared call
+        """
+        call_key = (asyncio.get_running_loop(), key)
+        task = self._calls.get(call_key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+        else:
+            self.coalesced += 1
+            get_metrics().increment("single_flight_coalesced_total", name=self.name)
+            log.debug(f"Joining in-flight call for {key}")
+        return await asyncio.shield(task)
@@ -1,6 +1,30 @@
 import re
+from collections.abc import Iterable
+from functools import lru_cache
 
 import emoji
+from emoji.unicode_codes import EMOJI_DATA
+
+# Runs collapsed by normalize_text; "..." is already normalized
+REPEATED_PUNCTUATION_PATTERN = re.compile(r"!{2,}|\?{2,}|\.{4,}")
+# replace_emoji drops variation selectors even when they follow no emoji
+VARIATION_SELECTORS = frozenset("\ufe0e\ufe0f")
+
+
+@lru_cache(maxsize=1)
+def _emoji_chars() -> frozenset[str]:
+    """Non-ASCII characters that replace_emoji could remove.
+
+    Every emoji contains at least one of them, so text without any is left
+    unchanged by the emoji pass and can skip it.
+    """
+    chars = {char for emj in EMOJI_DATA for char in emj if not char.isascii()}
+    return frozenset(chars) | VARIATION_SELECTORS
+
+
+def _collapse_punctuation(match: re.Match) -> str:
+    run = match.group()
+    return "..." if run[0] == "." else run[0]
 
 
 def remove_all_emojis(text: str) -> str:
@@ -54,3 +78,66 @@ def normalize_text(text: str) -> str:
     text = re.sub(r'[.]{3,}', '...', text)
 
     return text
+
+
+def clean_text(text: str) -> str:
+    """
+    Remove emojis and normalize text in a single pass.
+
+    Produces exactly normalize_text(remove_all_emojis(text)), but only runs
+    the emoji scan on words that can contain emojis (never on pure ASCII
+    text) and collapses whitespace and punctuation runs without compiling
+    patterns per call.
+
+    Args:
+        text: Input text to clean
+
+    Returns:
+        Cleaned text
+    """
+    if not text:
+        return text
+
+    # Same as re.sub(r'\s+', ' ', text).strip(): str.split() and \s agree on
+    # what is whitespace
+    words = text.split()
+
+    emoji_chars = _emoji_chars()
+    if not text.isascii() and not emoji_chars.isdisjoint(text):
+        # Emoji sequences never span whitespace, so only the words containing
+        # emoji characters need the (slow) emoji scan
+        words = [
+            emoji.replace_emoji(word, replace='')
+            if not emoji_chars.isdisjoint(word) else word
+            for word in words
+        ]
+        words = [word for word in words if word]
+
+    text = " ".join(words)
+
+    if "!!" in text or "??" in text or "...." in text:
+        text = REPEATED_PUNCTUATION_PATTERN.sub(_collapse_punctuation, text)
+
+    return text
+
+
+def clean_texts(texts: Iterable[str]) -> list[str]:
+    """
+    Clean a batch of texts, e.g. a whole corpus of job descriptions.
+
+    Identical texts are only cleaned once.
+
+    Args:
+        texts: Input texts to clean
+
+    Returns:
+        Cleaned texts, in input order
+    """
+    cleaned: dict[str, str] = {}
+    results = []
+    for text in texts:
+        result = cleaned.get(text)
+        if result is None:
+            result = cleaned[text] = clean_text(text)
+        results.append(result)
+    return results
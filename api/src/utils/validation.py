@@ -0,0 +1,35 @@
+"""Validation errors shared by the LLM output validators."""
+
+import json
+from typing import Any
+
+
+class ValidationError(Exception):
+    """Custom validation error with separate Python and LLM messages."""
+
+    def __init__(self, python_message: str, llm_guidance: str):
+        self.python_message = python_message
+        self.llm_guidance = llm_guidance
+        super().__init__(python_message)
+
+
+def invalid_output(*errors: str) -> ValidationError:
+    """Build a ValidationError whose guidance lists the errors for the LLM."""
+    python_message = f"Validation failed: {'; '.join(errors)}"
+    llm_guidance = "\n".join(f"- {error}" for error in errors)
+    return ValidationError(python_message, llm_guidance)
+
+
+def parse_json_output(output: str) -> Any:
+    """Parse LLM output as JSON, tolerating a surrounding ```json code block."""
+    cleaned_output = output.strip()
+    if cleaned_output.startswith("```json"):
+        cleaned_output = cleaned_output[7:]
+    if cleaned_output.endswith("```"):
+        cleaned_output = cleaned_output[:-3]
+
+    try:
+        return json.loads(cleaned_output.strip())
+    except json.JSONDecodeError:
+        raise invalid_output(
+            "Your output must be valid JSON. Do not wrap JSON in code blocks.") from None
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+
+# Settings are read on import, so configure them before any module loads
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault(
+    "CACHE_DB_PATH", str(Path(tempfile.mkdtemp(prefix="nightcrawler-")) / "cache.db")
+)
+
+from llama_index.core.llms import ChatMessage, ChatResponse  # noqa: E402
+
+from flows.job_extractor.simple_roles_extractor import (  # noqa: E402
+    get_roles_extraction_prompt,
+    get_roles_extraction_system_prompt,
+    validate_roles_output,
+)
+from flows.simple_extractor import SimpleExtractorWorkflow  # noqa: E402
+
+
+class StubLLM:
+    """Stand-in for an LLM client that records every chat request.
+
+    Answers with the given outputs in turn (repeating the last one), or with
+    respond(messages, **kwargs) when given, which may also raise to simulate
+    provider errors.
+    """
+
+    def __init__(
+        self,
+        *outputs: str,
+        respond: Callable[..., str] | None = None,
+        delay: float = 0.0,
+    ):
+        self.outputs = list(outputs)
+        self.respond = respond
+        self.delay = delay
+        self.requests: list[tuple[list[ChatMessage], dict]] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.requests)
+
+    async def achat(self, messages, **kwargs):
+        self.requests.append((messages, kwargs))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.respond is not None:
+            content = self.respond(messages, **kwargs)
+        else:
+            content = self.outputs[min(self.calls, len(self.outputs)) - 1]
+        return ChatResponse(message=ChatMessage(role="assistant", content=content))
+
+
+def create_workflow(llm: StubLLM, **kwargs) -> SimpleExtractorWorkflow:
+    """A roles extractor talking to the stub; kwargs override its arguments."""
+    arguments = {
+        "system_prompt_func": get_roles_extraction_system_prompt,
+        "user_prompt_func": get_roles_extraction_prompt,
+        "validator_func": validate_roles_output,
+        "fallback_result": {"main_role": "Unknown", "related_roles": []},
+        "result_key": "roles",
+        "use_cache": False,
+        **kwargs,
+    }
+    return SimpleExtractorWorkflow(llm=llm, **arguments)
+
+
+async def run(workflow: SimpleExtractorWorkflow, job_description: str, **kwargs) -> str:
+    # Workflows start their steps on the running loop, so run() needs one
+    return await workflow.run(job_description=job_description, **kwargs)
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import re
+
+from conftest import StubLLM
+
+import flows.simple_extractor
+from flows.job_extractor.simple_batched_properties_extractor import (
+    BatchedPropertiesExtractor,
+    get_batched_extract_properties_system_prompt,
+)
+from flows.job_extractor.simple_extract_properties import (
+    create_extract_properties_workflow,
+    get_extract_properties_system_prompt,
+)
+
+CHUNK_PATTERN = re.compile(r'<chunk id="(\d+)">(.*?)</chunk>', re.DOTALL)
+
+
+def chunk_extracting_llm(batch_sizes: list[int], single_chunks: list[str]) -> StubLLM:
+    """Answers batched requests for "good" chunks only, and single-chunk
+    requests for every chunk but the "broken" ones."""
+
+    def respond(messages, **kwargs):
+        user_prompt = messages[-1].content
+        chunks = CHUNK_PATTERN.findall(user_prompt)
+        if chunks:
+            batch_sizes.append(len(chunks))
+            return json.dumps({
+                chunk_id: {"summary": text}
+                for chunk_id, text in chunks
+                if text.startswith("good")
+            })
+        text = next(line for line in user_prompt.splitlines() if "batched" in line)
+        single_chunks.append(text.strip())
+        return "no properties" if "broken" in text else json.dumps({"summary": text})
+
+    return StubLLM(respond=respond)
+
+
+def test_failed_chunks_are_split_then_extracted_one_by_one(monkeypatch):
+    batch_sizes, single_chunks = [], []
+    llm = chunk_extracting_llm(batch_sizes, single_chunks)
+    monkeypatch.setattr(flows.simple_extractor, "get_llm", lambda *args, **kwargs: llm)
+    chunks = {
+        "a": "good batched chunk a",
+        "b": "shy batched chunk b",
+        "c": "shy batched chunk c",
+        "d": "good batched chunk d",
+        "e": "broken batched chunk e",
+    }
+    single_workflow = create_extract_properties_workflow()
+    cache_keys = {
+        chunk_id: single_workflow.cache_key(text) for chunk_id, text in chunks.items()
+    }
+
+    results = asyncio.run(BatchedPropertiesExtractor()._extract_batch(
+        list(chunks), chunks, single_workflow, cache_keys
+    ))
+
+    # The three failed chunks are retried as halves of two and one, then the
+    # pair is requested one chunk at a time
+    assert batch_sizes == [5, 2]
+    assert set(single_chunks) == {chunks["b"], chunks["c"], chunks["e"]}
+    assert {chunk_id: result.fallback for chunk_id, result in results.items()} == {
+        "a": False, "b": False, "c": False, "d": False, "e": True,
+    }
+    assert json.loads(results["b"].result) == {"summary": chunks["b"]}
+    assert json.loads(results["e"].result) == {}
+
+
+def test_batched_prompt_embeds_the_single_chunk_prompt():
+    # Batched results are saved under the single-chunk cache key
+    assert get_extract_properties_system_prompt().strip() in (
+        get_batched_extract_properties_system_prompt()
+    )
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from job_scheduler import JobProgress, JobScheduler
+from utils.boilerplate import BoilerplateIndex
+
+CHROME = "Apply now and join thousands of people who already work here."
+LANGUAGE = "Fluent German is required for this role."
+
+
+def make_posting(number: int, *extra: str) -> str:
+    return "\n".join([
+        f"Acme {number} logo",
+        f"We are hiring engineer number {number} to build payment systems.",
+        f"You will own service {number} end to end with the platform team.",
+        *extra,
+        CHROME,
+    ])
+
+
+def test_shared_requirement_below_the_ratio_is_kept():
+    postings = [make_posting(number) for number in range(10)]
+    postings[:3] = [make_posting(number, LANGUAGE) for number in range(3)]
+    index = BoilerplateIndex.from_documents(
+        postings, min_documents=3, min_document_ratio=0.5, max_strip_ratio=0.9
+    )
+
+    stripped = index.strip(postings[0])
+    assert LANGUAGE in stripped.text
+    assert CHROME not in stripped.text
+
+
+def test_strip_ratio_caps_corpus_boilerplate():
+    postings = [make_posting(0)] * 2 + [make_posting(number) for number in range(1, 5)]
+    postings = [CHROME] + postings
+    index = BoilerplateIndex.from_documents(
+        postings, min_documents=1, min_document_ratio=0.0, max_strip_ratio=0.5
+    )
+
+    # The posting is nothing but boilerplate, so it is only cleaned
+    assert index.strip(CHROME).text == CHROME
+
+
+def test_explicit_zero_thresholds_are_kept():
+    index = BoilerplateIndex(min_documents=0, min_document_ratio=0.0, min_words=0)
+    assert (index.min_documents, index.min_document_ratio, index.min_words) == (0, 0, 0)
+
+
+def plan_keys(tmp_path: Path, strip_boilerplate: bool = True) -> dict[str, str]:
+    scheduler = JobScheduler(strip_boilerplate=strip_boilerplate)
+    return {
+        f"{task.job_file.name}/{task.workflow_name}": task.cache_key
+        for task in scheduler.plan(sorted(tmp_path.iterdir()), JobProgress())
+    }
+
+
+def test_cache_keys_follow_the_stripped_text(tmp_path: Path):
+    for number in range(4):
+        extra = [LANGUAGE] if number < 2 else []
+        (tmp_path / f"job-{number}.txt").write_text(make_posting(number, *extra))
+    keys = plan_keys(tmp_path)
+
+    # A third posting with the requirement makes it boilerplate
+    (tmp_path / "job-9.txt").write_text(make_posting(9, LANGUAGE))
+    new_keys = plan_keys(tmp_path)
+
+    for name in ("job-0.txt", "job-1.txt"):
+        changed = [key for key in keys if key.startswith(name)]
+        assert changed and all(new_keys[key] != keys[key] for key in changed)
+    for name in ("job-2.txt", "job-3.txt"):
+        unchanged = [key for key in keys if key.startswith(name)]
+        assert unchanged and all(new_keys[key] == keys[key] for key in unchanged)
+
+
+def test_postings_with_nothing_stripped_share_unstripped_keys(tmp_path: Path):
+    (tmp_path / "unique-0.txt").write_text(make_posting(0))
+    (tmp_path / "unique-1.txt").write_text("A posting that shares nothing at all.")
+
+    assert plan_keys(tmp_path) == plan_keys(tmp_path, strip_boilerplate=False)
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from conftest import StubLLM, create_workflow
+
+from utils.cache import (
+    ExtractionStore,
+    get_cached_result,
+    load_extraction_cache,
+    migrate_json_cache,
+)
+
+ROLES = {"main_role": "Backend Engineer", "related_roles": []}
+
+
+def test_get_many_returns_only_stored_keys(tmp_path: Path):
+    store = ExtractionStore(tmp_path / "cache.db")
+    store.put("first", '{"a": 1}')
+    store.put("second", '{"b": 2}')
+
+    assert store.get_many(["first", "second", "missing"]) == {
+        "first": '{"a": 1}',
+        "second": '{"b": 2}',
+    }
+    assert store.get_many([]) == {}
+
+
+def test_put_job_results_replaces_previous_results(tmp_path: Path):
+    store = ExtractionStore(tmp_path / "cache.db")
+    store.put_job_results([("job", "Roles", "old"), ("job", "Tools", "tools")])
+    store.put_job_results([("job", "Roles", "new"), ("other", "Roles", "other")])
+
+    assert store.get_job_results("job") == {"Roles": "new", "Tools": "tools"}
+    assert store.get_job_results("other") == {"Roles": "other"}
+
+
+def test_migrate_json_cache(tmp_path: Path):
+    extracted_dir = tmp_path / "extracted"
+    jobs_dir = tmp_path / "jobs"
+    extracted_dir.mkdir()
+    jobs_dir.mkdir()
+    (jobs_dir / "migrated-job.txt").write_text("Backend engineer, migrated")
+    (extracted_dir / "migrated-job.json").write_text(
+        json.dumps({"RolesExtractorWorkflow": json.dumps(ROLES), "Unknown": "{}"})
+    )
+    (extracted_dir / "broken.json").write_text("{not json")
+
+    migrated = migrate_json_cache(
+        extracted_dir=str(extracted_dir),
+        jobs_dir=str(jobs_dir),
+    )
+
+    assert migrated == 2
+    job_results = load_extraction_cache(jobs_dir / "migrated-job.txt")
+    assert set(job_results) == {"RolesExtractorWorkflow", "Unknown"}
+    assert json.loads(job_results["RolesExtractorWorkflow"]) == ROLES
+    # Legacy results came from older validators, so the job is re-extracted
+    workflow = create_workflow(StubLLM(json.dumps(ROLES)))
+    assert get_cached_result(
+        workflow.cache_key("Backend engineer, migrated"), count=False) is None
@@ -0,0 +1,96 @@
+import gzip
+import json
+from pathlib import Path
+
+from llama_index.core.schema import TextNode
+
+from cv_context import CVContextBuilder
+from cv_index import CVIndex
+
+
+def make_node(node_id: str, **properties: str) -> TextNode:
+    return TextNode(
+        id_=node_id, text=node_id, metadata={"properties": json.dumps(properties)}
+    )
+
+
+def test_key_postings_follow_inserts_and_deletes():
+    index = CVIndex(nodes=[
+        make_node("first", skills="Python", location="Berlin"),
+        make_node("second", skills="Go"),
+    ])
+    key_postings = index._index_struct.key_postings
+    assert key_postings == {"skills": {"first", "second"}, "location": {"first"}}
+
+    # Re-inserting a node replaces its postings
+    index._insert(make_node("first", languages="German"))
+    assert key_postings == {"skills": {"second"}, "languages": {"first"}}
+
+    index._delete_node("second")
+    assert key_postings == {"languages": {"first"}}
+
+
+def test_shared_values_are_counted_until_the_last_node_is_deleted():
+    index = CVIndex(nodes=[
+        make_node("first", skills="Python"),
+        make_node("second", skills="Python"),
+        make_node("third", skills="Go"),
+    ])
+    metadata_index = index._index_struct.metadata_index
+    assert metadata_index == {"skills": {"Python": 2, "Go": 1}}
+
+    index._delete_node("first")
+    assert metadata_index == {"skills": {"Python": 1, "Go": 1}}
+
+    index._delete_node("second")
+    assert metadata_index == {"skills": {"Go": 1}}
+
+    index._delete_node("third")
+    assert "skills" not in metadata_index
+
+
+def test_context_is_built_from_the_properties_parsed_at_insert():
+    index = CVIndex(nodes=[make_node("first", skills="Python", location="Berlin")])
+    # Retrieval must not parse the stored JSON again
+    index._index_struct.node_metadata["first"]["properties"] = "not json"
+
+    nodes = index.as_retriever(llm=None)._build_nodes(["skills"])
+    context = CVContextBuilder(token_budget=0).build(nodes)
+
+    assert context == ["skills: Python"]
+
+
+def test_saved_index_loads_back_while_the_fingerprint_matches(tmp_path: Path):
+    path = tmp_path / "cv.json.gz"
+    index = CVIndex(nodes=[
+        make_node("first", skills="Python", location="Berlin"),
+        make_node("second", skills="Python"),
+    ])
+    index.save(path, fingerprint="v1")
+
+    loaded = CVIndex.load(path, fingerprint="v1")
+
+    index_struct = loaded._index_struct
+    assert index_struct.metadata_index == {
+        "skills": {"Python": 2}, "location": {"Berlin": 1},
+    }
+    assert index_struct.key_postings == {
+        "skills": {"first", "second"}, "location": {"first"},
+    }
+    assert index_struct.node_properties == index._index_struct.node_properties
+    assert index_struct.node_properties["first"] == {
+        "skills": "Python", "location": "Berlin",
+    }
+    assert CVIndex.load(path, fingerprint="v2") is None
+
+
+def test_index_saved_in_an_old_format_is_ignored(tmp_path: Path):
+    path = tmp_path / "cv.json.gz"
+    CVIndex(nodes=[make_node("first", skills="Python")]).save(path)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    data["format_version"] = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f)
+
+    assert CVIndex.load(path) is None
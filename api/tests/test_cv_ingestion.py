@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from llama_index.core import Document
+from llama_index.core.text_splitter import SentenceSplitter
+
+from cv_context import PROPERTIES_STATUS_KEY
+from cv_index import CVIndex
+from cv_ingestion import aingest_incremental
+
+
+class FakeTransformer:
+    """Marks every node with the given properties and status."""
+
+    def __init__(self, properties: dict, status: str = "extracted"):
+        self.properties = properties
+        self.status = status
+        self.extracted = 0
+
+    async def acall(self, nodes, **kwargs):
+        self.extracted += len(nodes)
+        for node in nodes:
+            node.metadata["properties"] = json.dumps(self.properties)
+            node.metadata[PROPERTIES_STATUS_KEY] = self.status
+        return nodes
+
+
+def ingest(index: CVIndex, transformer: FakeTransformer):
+    documents = [Document(text="Hobbies: none worth mentioning.")]
+    return asyncio.run(aingest_incremental(
+        index, documents, splitter=SentenceSplitter(), transformer=transformer
+    ))
+
+
+def test_empty_extractions_are_reused():
+    index = CVIndex(nodes=[])
+    ingest(index, FakeTransformer({}))
+
+    transformer = FakeTransformer({})
+    report = ingest(index, transformer)
+
+    assert (report.reused, transformer.extracted) == (1, 0)
+
+
+def test_fallback_extractions_are_extracted_again():
+    index = CVIndex(nodes=[])
+    ingest(index, FakeTransformer({}, status="fallback"))
+
+    transformer = FakeTransformer({"hobbies": "none"})
+    report = ingest(index, transformer)
+
+    assert (report.reused, transformer.extracted) == (0, 1)
+    assert index._index_struct.key_postings.keys() == {"hobbies"}
@@ -0,0 +1,71 @@
+import json
+
+from llama_index.core.base.llms.types import CompletionResponse
+from llama_index.core.schema import TextNode
+
+from cv_index import SELECTED_PROPERTIES_KEY, CVIndex
+from cv_keyword_selector import KeywordSelector, stem
+
+METADATA_INDEX = {
+    "skills": {"Python, Django": 1},
+    "location": {"Berlin, Germany": 1},
+    "education": {"MSc Computer Science": 1},
+}
+
+
+class FakeLLM:
+    """Completes keyword selection prompts with the given keywords."""
+
+    def __init__(self, keywords: list[str]):
+        self.keywords = keywords
+        self.prompts = []
+
+    def complete(self, prompt: str, **kwargs) -> CompletionResponse:
+        self.prompts.append(prompt)
+        return CompletionResponse(text=json.dumps(self.keywords))
+
+
+def make_node(node_id: str, **properties: str) -> TextNode:
+    return TextNode(
+        id_=node_id, text=node_id, metadata={"properties": json.dumps(properties)}
+    )
+
+
+def selected_properties(nodes) -> list[dict[str, str]]:
+    return [node.node.metadata[SELECTED_PROPERTIES_KEY] for node in nodes]
+
+
+def test_stemmer_matches_plurals_and_adverbs():
+    assert stem("languages") == stem("language")
+    assert stem("remotely") == stem("remote")
+
+
+def test_query_naming_a_key_selects_it_with_full_confidence():
+    selection = KeywordSelector().fit(METADATA_INDEX).select("What skills do they have?")
+
+    assert selection.keywords[0] == "skills"
+    assert selection.confidence == 1.0
+
+
+def test_query_matching_only_a_synonym_selects_the_related_key():
+    selection = KeywordSelector().fit(METADATA_INDEX).select("Remotely?")
+
+    assert selection.keywords == ["location"]
+    assert selection.confidence == 1.0
+
+
+def test_low_confidence_query_falls_back_to_the_llm():
+    llm = FakeLLM(["education"])
+    index = CVIndex(nodes=[
+        make_node("skills", skills="Python"),
+        make_node("education", education="MSc Computer Science"),
+    ])
+    retriever = index.as_retriever(llm=llm, keyword_selection="auto")
+
+    confident = retriever.retrieve("Which skills are listed?")
+    assert llm.prompts == []
+    assert selected_properties(confident) == [{"skills": "Python"}]
+
+    unsure = retriever.retrieve("Favourite quantum chromodynamics paper?")
+    assert len(llm.prompts) == 1
+    assert selected_properties(unsure) == [{"education": "MSc Computer Science"}]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from llama_index.core.schema import TextNode
+
+import cv_properties_transformer
+from cv_context import PROPERTIES_STATUS_KEY
+from cv_properties_transformer import PropertiesExtractorTransformer
+from flows.simple_extractor import ExtractionResult
+
+
+class FakeWorkflow:
+    """Extracts each chunk's text as its summary, slowest chunk first, and
+    fails on "broken" chunks."""
+
+    fallback_result = {}
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def run_extraction(self, text: str) -> ExtractionResult:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later chunks finish first
+            await asyncio.sleep(0.01 / (1 + int(text.split()[-1])))
+            if "broken" in text:
+                raise RuntimeError("provider unavailable")
+            return ExtractionResult(json.dumps({"summary": text}))
+        finally:
+            self.in_flight -= 1
+
+
+def make_nodes(*texts: str) -> list[TextNode]:
+    return [TextNode(id_=f"node-{number}", text=text) for number, text in enumerate(texts)]
+
+
+def patch_workflow(monkeypatch) -> FakeWorkflow:
+    workflow = FakeWorkflow()
+    monkeypatch.setattr(
+        cv_properties_transformer, "create_extract_properties_workflow", lambda: workflow
+    )
+    return workflow
+
+
+def test_failed_chunk_falls_back_and_order_is_kept(monkeypatch):
+    workflow = patch_workflow(monkeypatch)
+    nodes = make_nodes("chunk 0", "chunk 1", "broken chunk 2", "chunk 3", "chunk 4")
+    transformer = PropertiesExtractorTransformer(max_concurrency=2, batch_token_budget=0)
+
+    result = asyncio.run(transformer.acall(nodes))
+
+    assert result == nodes
+    assert workflow.max_in_flight == 2
+    assert [json.loads(node.metadata["properties"]) for node in nodes] == [
+        {"summary": "chunk 0"}, {"summary": "chunk 1"}, {},
+        {"summary": "chunk 3"}, {"summary": "chunk 4"},
+    ]
+    assert [node.metadata[PROPERTIES_STATUS_KEY] for node in nodes] == [
+        "extracted", "extracted", "fallback", "extracted", "extracted",
+    ]
+
+
+def test_sync_call_works_outside_and_inside_a_running_loop(monkeypatch):
+    patch_workflow(monkeypatch)
+    transformer = PropertiesExtractorTransformer(max_concurrency=2, batch_token_budget=0)
+
+    outside = transformer(make_nodes("chunk 0"))
+
+    async def call_from_loop():
+        return transformer(make_nodes("chunk 1"))
+
+    inside = asyncio.run(call_from_loop())
+
+    assert json.loads(outside[0].metadata["properties"]) == {"summary": "chunk 0"}
+    assert json.loads(inside[0].metadata["properties"]) == {"summary": "chunk 1"}
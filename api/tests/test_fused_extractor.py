@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from conftest import StubLLM
+
+import flows.simple_extractor
+from flows.job_extractor.simple_fused_extractor import FUSED_SECTIONS, FusedJobExtractor
+from flows.job_extractor.simple_heavy_constraints_extractor import (
+    get_heavy_constraints_extraction_system_prompt,
+)
+from utils.cache import get_cached_result
+
+ROLES = {"main_role": "Backend Engineer", "related_roles": []}
+TOOLS_TECH = {"tools": ["Docker"], "tech": ["Python"]}
+HEAVY_CONSTRAINTS = {"heavy_constraints": ["Berlin office"]}
+
+
+def fused_llm(heavy_constraints_output: str) -> StubLLM:
+    """Answers the fused request with invalid heavy constraints, and
+    heavy constraints requests with the given output."""
+
+    def respond(messages, **kwargs):
+        system_prompt = messages[0].content
+        if system_prompt == get_heavy_constraints_extraction_system_prompt():
+            return heavy_constraints_output
+        return json.dumps({**ROLES, **TOOLS_TECH, "heavy_constraints": "Berlin office"})
+
+    return StubLLM(respond=respond)
+
+
+def system_prompts(llm: StubLLM) -> list[str]:
+    return [messages[0].content for messages, _ in llm.requests]
+
+
+def cached_results(job_description: str) -> dict[str, str | None]:
+    return {
+        name: get_cached_result(
+            section.factory().cache_key(job_description), count=False
+        )
+        for name, section in FUSED_SECTIONS.items()
+    }
+
+
+def test_only_failed_sections_are_re_requested(monkeypatch):
+    llm = fused_llm(json.dumps(HEAVY_CONSTRAINTS))
+    monkeypatch.setattr(flows.simple_extractor, "get_llm", lambda *args, **kwargs: llm)
+    job_description = "Backend role in the Berlin office, fused"
+
+    results = asyncio.run(FusedJobExtractor().run_extractions(job_description))
+
+    # One fused request for every section, then one for the invalid section
+    assert llm.calls == 2
+    assert system_prompts(llm)[1] == get_heavy_constraints_extraction_system_prompt()
+    assert not any(extraction.fallback for extraction in results.values())
+    # Each section is saved under its own extractor's cache key
+    cached = cached_results(job_description)
+    assert json.loads(cached["RolesExtractorWorkflow"]) == ROLES
+    assert json.loads(cached["ToolsTechExtractorWorkflow"]) == TOOLS_TECH
+    assert json.loads(cached["HeavyConstraintsExtractorWorkflow"]) == HEAVY_CONSTRAINTS
+
+    asyncio.run(FusedJobExtractor().run_extractions(job_description))
+    assert llm.calls == 2
+
+
+def test_sections_failing_again_return_their_fallback(monkeypatch):
+    llm = fused_llm("Must work from the Berlin office.")
+    monkeypatch.setattr(flows.simple_extractor, "get_llm", lambda *args, **kwargs: llm)
+    job_description = "Backend role in the Berlin office, fused and failing"
+
+    results = asyncio.run(FusedJobExtractor().run_extractions(job_description))
+
+    assert system_prompts(llm)[0] != get_heavy_constraints_extraction_system_prompt()
+    assert set(system_prompts(llm)[1:]) == {get_heavy_constraints_extraction_system_prompt()}
+    assert {name: extraction.fallback for name, extraction in results.items()} == {
+        "RolesExtractorWorkflow": False,
+        "ToolsTechExtractorWorkflow": False,
+        "HeavyConstraintsExtractorWorkflow": True,
+    }
+    cached = cached_results(job_description)
+    assert json.loads(cached["RolesExtractorWorkflow"]) == ROLES
+    assert cached["HeavyConstraintsExtractorWorkflow"] is None
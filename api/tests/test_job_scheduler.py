@@ -0,0 +1,61 @@
+import asyncio
+import json
+from pathlib import Path
+
+from conftest import StubLLM, create_workflow
+
+from flows.job_extractor.simple_heavy_constraints_extractor import (
+    get_heavy_constraints_extraction_prompt,
+    get_heavy_constraints_extraction_system_prompt,
+    validate_heavy_constraints_output,
+)
+from job_scheduler import JobScheduler
+from utils.cache import load_extraction_cache
+
+NO_CONSTRAINTS = {"heavy_constraints": []}
+
+
+def workflows_for(llm: StubLLM):
+    def create_heavy_constraints_workflow():
+        return create_workflow(
+            llm,
+            system_prompt_func=get_heavy_constraints_extraction_system_prompt,
+            user_prompt_func=get_heavy_constraints_extraction_prompt,
+            validator_func=validate_heavy_constraints_output,
+            fallback_result=NO_CONSTRAINTS,
+            result_key="heavy_constraints",
+            use_cache=True,
+        )
+
+    return {"HeavyConstraintsExtractorWorkflow": create_heavy_constraints_workflow}
+
+
+def write_jobs(tmp_path: Path, prefix: str) -> list[Path]:
+    job_files = []
+    for number in range(2):
+        job_file = tmp_path / f"{prefix}-{number}.txt"
+        job_file.write_text(f"{prefix} posting {number}: remote backend role.")
+        job_files.append(job_file)
+    return job_files
+
+
+def test_results_equal_to_the_fallback_are_saved(tmp_path: Path):
+    llm = StubLLM(json.dumps(NO_CONSTRAINTS))
+    job_files = write_jobs(tmp_path, "no-constraints")
+
+    progress = asyncio.run(JobScheduler(workflows=workflows_for(llm)).run(job_files))
+
+    assert (progress.completed, progress.failed) == (2, 0)
+    for job_file in job_files:
+        saved = load_extraction_cache(job_file)["HeavyConstraintsExtractorWorkflow"]
+        assert json.loads(saved) == NO_CONSTRAINTS
+
+
+def test_fallback_results_are_not_saved(tmp_path: Path):
+    llm = StubLLM("There are no heavy constraints.")
+    job_files = write_jobs(tmp_path, "unparseable")
+
+    progress = asyncio.run(JobScheduler(workflows=workflows_for(llm)).run(job_files))
+
+    assert (progress.completed, progress.failed) == (0, 2)
+    assert all(load_extraction_cache(job_file) == {} for job_file in job_files)
@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from flows.job_extractor.simple_extract_properties import (
+    validate_extract_properties_output,
+)
+from flows.job_extractor.simple_fused_extractor import validate_fused_output
+from flows.job_extractor.simple_heavy_constraints_extractor import (
+    validate_heavy_constraints_output,
+)
+from flows.job_extractor.simple_roles_extractor import validate_roles_output
+from flows.job_extractor.simple_tools_tech_extractor import (
+    validate_tools_tech_output,
+)
+from utils.json_repair import repair_json
+from utils.validation import ValidationError
+
+CORPUS = Path(__file__).resolve().parent.parent / "benchmarks" / "json_repair_corpus.jsonl"
+
+VALIDATORS = {
+    "roles": validate_roles_output,
+    "tools_tech": validate_tools_tech_output,
+    "heavy_constraints": validate_heavy_constraints_output,
+    "properties": validate_extract_properties_output,
+    "fused": validate_fused_output,
+}
+
+CASES = [json.loads(line) for line in CORPUS.read_text().splitlines() if line]
+
+
+@pytest.mark.parametrize(
+    "case",
+    CASES,
+    ids=[f"{case['validator']}-{number}" for number, case in enumerate(CASES, 1)],
+)
+def test_corpus(case):
+    validator = VALIDATORS[case["validator"]]
+    if case["expected"] is None:
+        with pytest.raises(ValidationError):
+            validator(case["output"])
+    else:
+        assert validator(case["output"]) == case["expected"]
+
+
+@pytest.mark.parametrize(
+    "output",
+    [
+        '{"main_role": "Backend Engineer", "related_roles": ["Python Dev',
+        '{"tools": [], "tech": ["Go"]',
+        '```json\n{"heavy_constraints": ["Relocation to',
+    ],
+)
+def test_truncated_output_is_rejected(output):
+    with pytest.raises(ValueError, match="Truncated"):
+        repair_json(output)
+
+
+def test_repair_reports_kinds():
+    parsed, kinds = repair_json("Sure:\n```json\n{'tools': ['Jira',], 'remote': True}\n```")
+    assert parsed == {"tools": ["Jira"], "remote": True}
+    assert set(kinds) == {
+        "code_fence", "single_quotes", "trailing_comma", "python_literal",
+    }
+
+
+def test_rejection_keeps_the_validator_error():
+    with pytest.raises(ValidationError) as info:
+        validate_roles_output("The job is for a software engineer.")
+    assert info.value.__cause__ is None
+    assert info.value.__suppress_context__
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+from conftest import StubLLM, create_workflow, run
+
+import utils.metrics
+from utils.metrics import Histogram, InMemorySink, MetricsSink, get_metrics
+
+ROLES = {"main_role": "Backend Engineer", "related_roles": ["Python Developer"]}
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    monkeypatch.setattr(utils.metrics, "_metrics", None)
+    return get_metrics()
+
+
+def test_invalid_output_is_reasked(metrics):
+    llm = StubLLM("The role is backend engineer.", json.dumps(ROLES))
+
+    result = asyncio.run(run(create_workflow(llm), "Backend role, retried"))
+
+    assert json.loads(result) == ROLES
+    assert llm.calls == 2
+    assert metrics.memory.counter_total(
+        "llm_retries_total", name="roles", reason="validation") == 1
+    assert metrics.memory.counter_total(
+        "extraction_results_total", outcome="extracted") == 1
+
+
+def test_uncached_extraction_counts_one_lookup(metrics):
+    llm = StubLLM(json.dumps(ROLES))
+    workflow = create_workflow(llm, use_cache=True)
+
+    asyncio.run(run(workflow, "Backend role, looked up once"))
+    asyncio.run(run(workflow, "Backend role, looked up once"))
+
+    assert llm.calls == 1
+    assert metrics.memory.counter_total("cache_lookups_total", result="miss") == 1
+    assert metrics.memory.counter_total("cache_lookups_total", result="hit") == 1
+
+
+def test_lookups_of_precomputed_keys_are_not_counted(metrics):
+    llm = StubLLM(json.dumps(ROLES))
+    workflow = create_workflow(llm, use_cache=True)
+    cache_key = workflow.cache_key("Backend role, planned")
+
+    asyncio.run(run(workflow, "Backend role, stripped", cache_key=cache_key))
+
+    assert metrics.memory.counter_total("cache_lookups_total") == 0
+
+
+def test_histogram_uses_its_own_buckets():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    histogram.observe(1.5)
+    assert histogram.bucket_counts == [0, 1]
+
+
+def test_sinks_must_implement_increment_and_observe():
+    with pytest.raises(TypeError):
+        MetricsSink()
+    assert isinstance(InMemorySink(), MetricsSink)
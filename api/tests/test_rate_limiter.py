@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from utils.rate_limiter import RateLimiter
+
+
+def test_timed_out_request_refunds_its_tokens():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=600)
+
+    async def time_out():
+        async with limiter.limit(600):
+            raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(time_out())
+
+    # Without the refund the bucket would be empty for a minute
+    assert limiter._reserve(600) == 0
+
+
+def test_request_cancelled_while_waiting_refunds_its_reservation():
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=60)
+    assert limiter._reserve(60) == 0
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(asyncio.wait_for(limiter.acquire(60), timeout=0.01))
+
+    # The cancelled request is no longer queued ahead of the next one
+    assert limiter._reserve(60) == pytest.approx(60, abs=1)
+
+
+def test_completed_request_keeps_its_tokens():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=600)
+
+    async def complete():
+        async with limiter.limit(600):
+            pass
+
+    asyncio.run(complete())
+
+    assert limiter._reserve(600) == pytest.approx(60, abs=1)
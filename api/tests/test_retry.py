@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from utils.retry import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    RetryPolicy,
+    run_with_retries,
+)
+from utils.validation import ValidationError
+
+
+def rate_limited(retry_after: str) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test-model", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    return breaker
+
+
+def test_open_circuit_rejects_calls_until_the_reset_timeout():
+    breaker = open_breaker()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.before_call() is True
+    # Only one trial call is let through while it is in flight
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_trial_closes_the_circuit():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+
+    breaker.record_success()
+
+    assert not breaker.is_open
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_opens_the_circuit_again():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_budget_allows_the_minimum_plus_a_ratio_of_requests():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    for _ in range(4):
+        budget.record_request()
+
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+
+
+def test_exhausted_budget_stops_retries():
+    budget = RetryBudget(ratio=0.0, min_retries=1)
+    policy = RetryPolicy(max_validation_retries=5, max_retries=5)
+    attempts = 0
+
+    async def attempt(guidance: str):
+        nonlocal attempts
+        attempts += 1
+        raise ValidationError("invalid", "Return JSON")
+
+    with pytest.raises(ValidationError):
+        asyncio.run(run_with_retries(
+            attempt, model="budget-model", policy=policy, name="budget", budget=budget
+        ))
+
+    assert attempts == 2
+
+
+def test_retry_after_is_waited_in_full():
+    policy = RetryPolicy(base_delay=0.0, max_delay=30.0)
+
+    assert policy.backoff(1, rate_limited("20")) == 20.0
+
+
+def test_retry_after_beyond_the_max_delay_gives_up_instead_of_retrying_early():
+    budget = RetryBudget(ratio=0.0, min_retries=5)
+    policy = RetryPolicy(max_transport_retries=5, max_retries=5, max_delay=30.0)
+    attempts = 0
+
+    async def attempt(guidance: str):
+        nonlocal attempts
+        attempts += 1
+        raise rate_limited("60")
+
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(run_with_retries(
+            attempt, model="retry-after-model", policy=policy, name="retry-after",
+            budget=budget,
+        ))
+
+    assert attempts == 1
+    # Giving up doesn't spend the shared budget
+    assert budget.retries == 0
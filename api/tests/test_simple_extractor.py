@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import httpx
+import openai
+from conftest import StubLLM, create_workflow, run
+
+from flows.job_extractor.simple_roles_extractor import RolesOutput
+
+ROLES = {"main_role": "Backend Engineer", "related_roles": []}
+
+
+def bad_request(code: str, param: str | None, message: str) -> openai.BadRequestError:
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    return openai.BadRequestError(
+        message,
+        response=httpx.Response(400, request=request),
+        body={"message": message, "type": "invalid_request_error",
+              "code": code, "param": param},
+    )
+
+
+def rejecting_llm(*errors: openai.BadRequestError) -> StubLLM:
+    """Raises the given errors for requests with response_format, in turn."""
+    pending = list(errors)
+
+    def respond(messages, response_format=None, **kwargs):
+        if response_format and pending:
+            raise pending.pop(0)
+        return json.dumps(ROLES)
+
+    return StubLLM(respond=respond)
+
+
+def response_formats(llm: StubLLM) -> list:
+    return [kwargs.get("response_format") for _, kwargs in llm.requests]
+
+
+def structured_workflow(llm: StubLLM, llm_model: str):
+    return create_workflow(
+        llm,
+        llm_model=llm_model,
+        output_schema=RolesOutput.model_json_schema(),
+        structured_output="json_schema",
+    )
+
+
+def test_failed_json_generation_is_reasked_with_structured_output():
+    llm = rejecting_llm(bad_request(
+        "json_validate_failed", None,
+        "Failed to generate JSON. Please adjust your prompt.",
+    ))
+
+    result = asyncio.run(run(structured_workflow(llm, "json-mode-model"), "Backend role"))
+    asyncio.run(run(structured_workflow(llm, "json-mode-model"), "Another backend role"))
+
+    assert json.loads(result) == ROLES
+    assert all(response_format for response_format in response_formats(llm))
+
+
+def test_unsupported_response_format_is_remembered_per_model():
+    llm = rejecting_llm(bad_request(
+        "invalid_request_error", "response_format",
+        "response_format json_schema is not supported with this model",
+    ))
+
+    result = asyncio.run(run(structured_workflow(llm, "plain-model"), "Backend role"))
+    # A new extractor for the same model doesn't pay for the rejected request
+    asyncio.run(run(structured_workflow(llm, "plain-model"), "Another backend role"))
+
+    assert json.loads(result) == ROLES
+    assert response_formats(llm)[0] is not None
+    assert response_formats(llm)[1:] == [None, None]
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+from conftest import StubLLM, create_workflow, run
+
+import utils.metrics
+from utils.cache import get_cached_result
+from utils.metrics import get_metrics
+from utils.single_flight import SingleFlight
+
+ROLES = {"main_role": "Backend Engineer", "related_roles": ["Python Developer"]}
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    monkeypatch.setattr(utils.metrics, "_metrics", None)
+    return get_metrics()
+
+
+def test_identical_calls_are_coalesced(metrics):
+    llm = StubLLM(json.dumps(ROLES), delay=0.01)
+
+    async def run_all():
+        workflows = [create_workflow(llm) for _ in range(3)]
+        return await asyncio.gather(
+            *(run(workflow, "Backend role, coalesced") for workflow in workflows)
+        )
+
+    results = asyncio.run(run_all())
+
+    assert [json.loads(result) for result in results] == [ROLES] * 3
+    assert llm.calls == 1
+    assert metrics.memory.counter_total(
+        "single_flight_coalesced_total", name="extraction") == 2
+
+
+def test_calls_with_different_cache_keys_save_their_own_results(metrics):
+    llm = StubLLM(json.dumps(ROLES), delay=0.01)
+    workflow = create_workflow(llm, use_cache=True)
+    cache_keys = [
+        workflow.cache_key(text) for text in ("Backend role, first", "Backend role, second")
+    ]
+
+    async def run_all():
+        return await asyncio.gather(
+            *(run(workflow, "Backend role, keyed", cache_key=key) for key in cache_keys)
+        )
+
+    asyncio.run(run_all())
+
+    assert all(get_cached_result(key, count=False) is not None for key in cache_keys)
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight(name="test")
+    started = 0
+
+    async def work():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run_all():
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await second
+        return first, result
+
+    first, result = asyncio.run(run_all())
+
+    assert first.cancelled()
+    assert result == "done"
+    assert started == 1
+    assert flight.in_flight == 0